@@ -0,0 +1,77 @@
+# addresses.py
+import ipaddress
+
+from flask import request
+
+# IPv4 addresses are stored in the IPv4-mapped IPv6 range (::ffff:0:0/96), so one column orders both families
+IPV4_MAPPED = int(ipaddress.ip_address('::ffff:0.0.0.0'))
+
+
+def normalize_ip(value):
+    """
+    Validate an IPv4 or IPv6 address and return its canonical text.
+
+    IPv6 addresses are compressed and lower-cased; IPv4-mapped IPv6 addresses
+    are written as the IPv4 address they map.
+
+    Raises:
+        ValueError: If value is not an IP address.
+    """
+    if not isinstance(value, str):
+        raise ValueError('must be an IPv4 or IPv6 address')
+    try:
+        address = ipaddress.ip_address(value.strip())
+    except ValueError:
+        raise ValueError(f'{value!r} is not an IPv4 or IPv6 address') from None
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.compressed
+
+
+def address_number(address):
+    number = int(address)
+    return number + IPV4_MAPPED if address.version == 4 else number
+
+
+def ip_number(value):
+    """
+    The 128-bit number of an address as 16 big-endian bytes, the form Server.ip_number stores.
+
+    Byte strings of equal length compare like the numbers they encode, on
+    SQLite (memcmp) and PostgreSQL (bytea) alike, so a network is a contiguous
+    range of the index. Neither has a 128-bit integer type.
+    """
+    return address_number(ipaddress.ip_address(value)).to_bytes(16, 'big')
+
+
+def cidr_bounds(cidr):
+    """
+    The (first, last) ip_number of the addresses in a CIDR block, e.g. 10.20.0.0/16.
+
+    Host bits are ignored, so 10.20.3.4/16 is the same block.
+
+    Raises:
+        ValueError: If cidr is not an IPv4 or IPv6 network.
+    """
+    try:
+        network = ipaddress.ip_network(cidr.strip(), strict=False)
+    except ValueError:
+        raise ValueError(f'{cidr!r} is not an IPv4 or IPv6 network') from None
+    first = address_number(network.network_address)
+    return first.to_bytes(16, 'big'), (first + network.num_addresses - 1).to_bytes(16, 'big')
+
+
+def cidr_arg():
+    """Read the `cidr` query parameter as ip_number bounds, returning (bounds, error); bounds is None when absent."""
+    cidr = request.args.get('cidr')
+    if not cidr:
+        return None, None
+    try:
+        return cidr_bounds(cidr), None
+    except ValueError as exc:
+        return None, f'invalid cidr: {exc}'
+
+
+def default_ip_number(context):
+    # Column default: derived from the ip_address of the row being inserted, whichever code path inserts it
+    return ip_number(context.get_current_parameters()['ip_address'])
@@ -0,0 +1,147 @@
+# aggregates.py
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from extensions import db
+from triggers import register_triggers, upsert_add
+
+# (table, key column, count column) of every counter table defined in models.py
+SERVER_COUNTS = ('server_deployment_count', 'server_id', 'deployment_count')
+MODEL_COUNTS = ('model_deployment_count', 'model_id', 'deployment_count')
+MODEL_TYPE_COUNTS = ('model_type_deployment_count', 'model_type', 'deployment_count')
+DATASET_COUNTS = ('dataset_version_count', 'dataset_id', 'version_count')
+
+# What each counter table must equal; used to rebuild and verify them
+REFERENCE_QUERIES = {
+    SERVER_COUNTS: "SELECT md.server_id, COUNT(*) FROM model_deployment md GROUP BY md.server_id",
+    MODEL_COUNTS: "SELECT v.model_id, COUNT(*) FROM model_deployment md JOIN version v ON v.id = md.version_id GROUP BY v.model_id",
+    MODEL_TYPE_COUNTS: "SELECT m.type, COUNT(*) FROM model_deployment md JOIN version v ON v.id = md.version_id JOIN model m ON m.id = v.model_id GROUP BY m.type",
+    DATASET_COUNTS: "SELECT v.dataset_id, COUNT(*) FROM version v GROUP BY v.dataset_id",
+}
+
+
+def subtract(counter, key_expr, amount='1'):
+    """Decrement the counter row matching key_expr; a missing row is left alone."""
+    table, key, count = counter
+    return f"UPDATE {table} SET {count} = {count} - {amount} WHERE {key} = {key_expr}"
+
+
+def deployment_added(row):
+    return [
+        upsert_add(SERVER_COUNTS, f"SELECT {row}.server_id, 1 WHERE true"),
+        upsert_add(MODEL_COUNTS, f"SELECT v.model_id, 1 FROM version v WHERE v.id = {row}.version_id"),
+        upsert_add(MODEL_TYPE_COUNTS, f"SELECT m.type, 1 FROM version v JOIN model m ON m.id = v.model_id WHERE v.id = {row}.version_id"),
+    ]
+
+
+def deployment_removed(row):
+    return [
+        subtract(SERVER_COUNTS, f"{row}.server_id"),
+        subtract(MODEL_COUNTS, f"(SELECT v.model_id FROM version v WHERE v.id = {row}.version_id)"),
+        subtract(MODEL_TYPE_COUNTS, f"(SELECT m.type FROM version v JOIN model m ON m.id = v.model_id WHERE v.id = {row}.version_id)"),
+    ]
+
+
+def version_deployments(row):
+    return f"(SELECT COUNT(*) FROM model_deployment md WHERE md.version_id = {row}.id)"
+
+
+def model_deployments(row):
+    return f"COALESCE((SELECT c.deployment_count FROM model_deployment_count c WHERE c.model_id = {row}.id), 0)"
+
+
+# Keep the counters in step with every row written to their source tables
+COUNTER_TRIGGERS = {
+    'trg_model_deployment_insert_counts': ('model_deployment', 'INSERT', deployment_added('NEW')),
+    'trg_model_deployment_delete_counts': ('model_deployment', 'DELETE', deployment_removed('OLD')),
+    'trg_model_deployment_update_counts': ('model_deployment', 'UPDATE OF server_id, version_id',
+                                           deployment_removed('OLD') + deployment_added('NEW')),
+    # A version appearing or disappearing also changes which deployments join to a model
+    'trg_version_insert_counts': ('version', 'INSERT', [
+        upsert_add(DATASET_COUNTS, "SELECT NEW.dataset_id, 1 WHERE true"),
+        upsert_add(MODEL_COUNTS, f"SELECT NEW.model_id, {version_deployments('NEW')} WHERE true"),
+        upsert_add(MODEL_TYPE_COUNTS, f"SELECT m.type, {version_deployments('NEW')} FROM model m WHERE m.id = NEW.model_id"),
+    ]),
+    # Deleting a version or model cascades to the rows they count, and once the parent row is gone the
+    # cascaded rows' own triggers can no longer find their model or type. So these run BEFORE the delete,
+    # while the children are still there, and the cascaded deletes then leave those counters alone.
+    'trg_version_delete_counts': ('version', 'BEFORE DELETE', [
+        subtract(DATASET_COUNTS, "OLD.dataset_id"),
+        subtract(MODEL_COUNTS, "OLD.model_id", version_deployments('OLD')),
+        subtract(MODEL_TYPE_COUNTS, "(SELECT m.type FROM model m WHERE m.id = OLD.model_id)", version_deployments('OLD')),
+    ]),
+    'trg_version_update_dataset_counts': ('version', 'UPDATE OF dataset_id', [
+        subtract(DATASET_COUNTS, "OLD.dataset_id"),
+        upsert_add(DATASET_COUNTS, "SELECT NEW.dataset_id, 1 WHERE true"),
+    ]),
+    'trg_version_update_model_counts': ('version', 'UPDATE OF model_id', [
+        subtract(MODEL_COUNTS, "OLD.model_id", version_deployments('OLD')),
+        subtract(MODEL_TYPE_COUNTS, "(SELECT m.type FROM model m WHERE m.id = OLD.model_id)", version_deployments('OLD')),
+        upsert_add(MODEL_COUNTS, f"SELECT NEW.model_id, {version_deployments('NEW')} WHERE true"),
+        upsert_add(MODEL_TYPE_COUNTS, f"SELECT m.type, {version_deployments('NEW')} FROM model m WHERE m.id = NEW.model_id"),
+    ]),
+    # Per-type counts are derived from per-model counts, so follow the model's type
+    'trg_model_insert_counts': ('model', 'INSERT', [
+        upsert_add(MODEL_TYPE_COUNTS, f"SELECT NEW.type, {model_deployments('NEW')} WHERE true"),
+    ]),
+    'trg_model_delete_counts': ('model', 'BEFORE DELETE', [
+        subtract(MODEL_TYPE_COUNTS, "OLD.type", model_deployments('OLD')),
+    ]),
+    'trg_model_update_type_counts': ('model', 'UPDATE OF type', [
+        subtract(MODEL_TYPE_COUNTS, "OLD.type", model_deployments('OLD')),
+        upsert_add(MODEL_TYPE_COUNTS, f"SELECT NEW.type, {model_deployments('NEW')} WHERE true"),
+    ]),
+}
+register_triggers(COUNTER_TRIGGERS, requires=[table for table, _, _ in REFERENCE_QUERIES])
+
+
+def rebuild_counts(conn):
+    """Recompute every counter table from its source tables."""
+    for (table, key, count), query in REFERENCE_QUERIES.items():
+        conn.execute(text(f"DELETE FROM {table}"))
+        conn.execute(text(f"INSERT INTO {table} ({key}, {count}) {query}"))
+
+
+def verify_counts(conn):
+    """
+    Compare every counter table with a fresh GROUP BY over its source tables.
+
+    Returns:
+        A list of (table, key, stored count, expected count) for every mismatch.
+    """
+    mismatches = []
+    for (table, key, count), query in REFERENCE_QUERIES.items():
+        expected = dict(conn.execute(text(query)).fetchall())
+        stored = dict(conn.execute(text(f"SELECT {key}, {count} FROM {table} WHERE {count} <> 0")).fetchall())
+        for value in sorted(set(expected) | set(stored), key=str):
+            if expected.get(value, 0) != stored.get(value, 0):
+                mismatches.append((table, value, stored.get(value, 0), expected.get(value, 0)))
+    return mismatches
+
+
+@click.group('aggregates')
+def aggregates_command():
+    """Maintain the report counter tables."""
+
+
+@aggregates_command.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Recompute the counter tables from scratch."""
+    with db.engine.begin() as conn:
+        rebuild_counts(conn)
+    click.echo("Counter tables rebuilt.")
+
+
+@aggregates_command.command('verify')
+@with_appcontext
+def verify_command():
+    """Check the counter tables against the source tables."""
+    with db.engine.connect() as conn:
+        mismatches = verify_counts(conn)
+    for table, key, stored, expected in mismatches:
+        click.echo(f"{table}: {key} has {stored}, expected {expected}")
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} counter(s) out of date, run 'flask aggregates rebuild'")
+    click.echo("Counter tables are consistent.")
@@ -1,37 +1,129 @@
 # app.py
-from datetime import datetime
-from flask import Flask
+from flask import Blueprint, Flask
 from flask_cors import CORS
 from flask_migrate import Migrate
 from extensions import db
 from flask import request, jsonify, abort
 from models import db, Model, Dataset, Version, Server, ModelDeployment
-from sqlalchemy import and_,text, create_engine
-import sqlite3
-
-
-app = Flask(__name__)
-CORS(app)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database1.db'
-
-engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'], isolation_level="SERIALIZABLE")
-db.init_app(app) # Initialize db with the Flask app
-#engine.execute('CREATE PROCEDURE my_procedure(IN param1 INT, IN param2 INT) AS BEGIN END;')
-
-migrate = Migrate(app, db)
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.exc import IntegrityError
+from config import configure_database, optimize_db_command
+from routing import init_replicas, read_only
+from pagination import ids_arg, ids_filter, lookup_ids, paginate, parse_ids, prefix_filter
+from bulk import bulk_create, bulk_delete, bulk_update, delete_rows, read_changes, update_rows
+from expand import expand
+from cache import cached_report
+from metrics import init_metrics
+from compression import init_compression
+from fastjson import json_response, row_serializer
+from export import export_command, export_deployments
+from search import search
+from changes import changes, prune_changes_command
+from reports import REPORTS, ReportError
+from seed import seed_command
+from aggregates import aggregates_command
+from timestamps import parse_time, time_arg, to_epoch, to_iso
+from version_metrics import normalize_metrics
+from addresses import cidr_arg, ip_number, normalize_ip
+
+
+EXPOSE_HEADERS = ['Link', 'X-Next-After', 'X-Next-Offset', 'ETag']  # Response headers browser clients may read
+
+api = Blueprint('api', __name__)  # Every route below; registered on each app built by create_app
+migrate = Migrate()
+
+
+def create_app(config=None):
+    """
+    Build the API app. Nothing connects to the database here, so the app can be
+    created once in a gunicorn master (preload_app) and shared by forked workers.
 
-from models import Model, Dataset, Version, Server, ModelDeployment
+    Args:
+        config: Optional mapping applied to app.config before the extensions read it.
 
-@app.route('/test')
+    Returns:
+        The configured Flask app.
+    """
+    app = Flask(__name__)
+    app.config.update(config or {})
+    CORS(app, expose_headers=EXPOSE_HEADERS)
+    init_metrics(app) # Request/SQL metrics at /metrics; registered first so its timer covers the other hooks
+    init_compression(app) # gzip/brotli/zstd for JSON and text bodies the client accepts, see compression.py
+    configure_database(app) # Database URI, pool and SQLite pragmas come from the environment, see config.py
+    db.init_app(app) # Initialize db with the Flask app
+    init_replicas(app, db) # Optional read replicas for GET requests, see routing.py
+    migrate.init_app(app, db)
+    app.register_blueprint(api)
+
+    app.cli.add_command(seed_command)
+    app.cli.add_command(aggregates_command)
+    app.cli.add_command(optimize_db_command)
+    app.cli.add_command(export_command)
+    app.cli.add_command(prune_changes_command)
+    return app
+
+# Row serializers shared by the list endpoints
+def serialize_model(model):
+    return {'id': model.id, 'name': model.name, 'description': model.description, 'type': model.type}
+
+def serialize_dataset(dataset):
+    return {'id': dataset.id, 'name': dataset.name, 'description': dataset.description, 'data_type': dataset.data_type}
+
+def serialize_version(version):
+    return {'id': version.id, 'model_id': version.model_id, 'dataset_id': version.dataset_id, 'version_number': version.version_number, 'performance_metrics': version.performance_metrics}
+
+def serialize_server(server):
+    return {'id': server.id, 'name': server.name, 'ip_address': server.ip_address}
+
+def serialize_deployment(deployment):
+    return {
+        'id': deployment.id,
+        'server_id': deployment.server_id,
+        'version_id': deployment.version_id,
+        'deployment_time': to_iso(deployment.deployment_time)
+    }
+
+# List and lookup endpoints select only these columns and read them as row tuples, so no ORM entity is
+# built or tracked per row. The statements are built once; the filters and limits each request adds
+# are bound parameters, so SQLAlchemy's compiled cache serves the same SQL string every time.
+MODEL_LIST = select(Model.id, Model.name, Model.description, Model.type)
+DATASET_LIST = select(Dataset.id, Dataset.name, Dataset.description, Dataset.data_type)
+VERSION_LIST = select(Version.id, Version.model_id, Version.dataset_id, Version.version_number, Version.performance_metrics)
+SERVER_LIST = select(Server.id, Server.name, Server.ip_address)
+DEPLOYMENT_LIST = select(ModelDeployment.id, ModelDeployment.server_id, ModelDeployment.version_id, ModelDeployment.deployment_time)
+MODELS_BY_TYPE = MODEL_LIST.where(Model.type == bindparam('model_type'))
+
+serialize_model_row = row_serializer(MODEL_LIST.selected_columns.keys())
+serialize_dataset_row = row_serializer(DATASET_LIST.selected_columns.keys())
+serialize_version_row = row_serializer(VERSION_LIST.selected_columns.keys())
+serialize_server_row = row_serializer(SERVER_LIST.selected_columns.keys())
+serialize_deployment_row = row_serializer(DEPLOYMENT_LIST.selected_columns.keys(), time_columns=('deployment_time',))
+
+# Related rows that ?expand= can nest into versions and deployments, by relationship path
+VERSION_EXPANSIONS = {'model': serialize_model, 'dataset': serialize_dataset}
+DEPLOYMENT_EXPANSIONS = {
+    'server': serialize_server,
+    'version': serialize_version,
+    'version.model': serialize_model,
+    'version.dataset': serialize_dataset,
+}
+
+# A write rejected by a constraint, e.g. a reference to a row that does not exist, is the client's error
+@api.errorhandler(IntegrityError)
+def integrity_error(error):
+    db.session.rollback()
+    return jsonify({'error': f'constraint violated: {error.orig}'}), 400
+
+@api.route('/test')
 def test():
     return 'successful'
 
-@app.route('/')
+@api.route('/')
 def index():
     return 'Welcome to the Machine Learning Model Management API!'
 
 # Create a Model
-@app.route('/models', methods=['POST'])
+@api.route('/models', methods=['POST'])
 def create_model():
     data = request.get_json()
     new_model = Model(name=data['name'], description=data['description'], type=data['type'])
@@ -39,80 +131,71 @@ def create_model():
     db.session.commit()
     return jsonify(new_model.id), 201
 
-# Read all Models
-@app.route('/models', methods=['GET'])
+# Read Models, one keyset page at a time (or streamed as NDJSON), optionally by type and name prefix
+@api.route('/models', methods=['GET'])
 def get_models():
-    models = Model.query.all()
-    models_data = [
-    {'id': model.id, 'name': model.name, 'description': model.description, 'type': model.type}
-    for model in models
-    ]
-    return jsonify(models_data), 200
-
-@app.route('/models/<int:model_id>', methods=['PUT'])
+    query = prefix_filter(MODEL_LIST, Model.name)
+    model_type = request.args.get('type')
+    if model_type:
+        query = query.filter(Model.type == model_type)
+    return paginate(query, Model.id, serialize_model_row)
+
+# Updates: PUT replaces every field, PATCH only the ones given. Either way a single UPDATE ... WHERE id = ...
+# without reading the row first; a missing row is a 404, an unknown foreign key a 400 (see integrity_error)
+@api.route('/models/<int:model_id>', methods=['PUT', 'PATCH'])
 def update_model(model_id):
-    model = Model.query.get(model_id)
-    if model is None:
+    values, error = read_changes(('name', 'description', 'type'), required=('name', 'type'))
+    if error:
+        return jsonify({'error': error}), 400
+    if not update_rows(Model, [Model.id == model_id], values):
         abort(404)
-    data = request.get_json()
-    model.name = data['name']
-    model.description = data['description']
-    model.type = data['type']
-    db.session.commit()
     return jsonify({'message': 'Model updated'}), 200
 
-@app.route('/datasets/<int:dataset_id>', methods=['PUT'])
+@api.route('/datasets/<int:dataset_id>', methods=['PUT', 'PATCH'])
 def update_dataset(dataset_id):
-    dataset = Dataset.query.get(dataset_id)
-    if not dataset:
+    values, error = read_changes(('name', 'description', 'data_type'), required=('name', 'data_type'))
+    if error:
+        return jsonify({'error': error}), 400
+    if not update_rows(Dataset, [Dataset.id == dataset_id], values):
         abort(404)
-    data = request.get_json()
-    dataset.name = data['name']
-    dataset.description = data['description']
-    dataset.data_type = data['data_type']
-    db.session.commit()
     return jsonify({'message': 'Dataset updated'}), 200
 
 
-@app.route('/versions/<int:version_id>', methods=['PUT'])
+@api.route('/versions/<int:version_id>', methods=['PUT', 'PATCH'])
 def update_version(version_id):
-    version = Version.query.get(version_id)
-    if not version:
+    values, error = read_changes(('model_id', 'dataset_id', 'version_number', 'performance_metrics'),
+                                 required=('model_id', 'dataset_id', 'version_number'),
+                                 converters={'performance_metrics': normalize_metrics})
+    if error:
+        return jsonify({'error': error}), 400
+    if not update_rows(Version, [Version.id == version_id], values):
         abort(404)
-    data = request.get_json()
-    version.model_id = data['model_id']
-    version.dataset_id = data['dataset_id']
-    version.version_number = data['version_number']
-    version.performance_metrics = data['performance_metrics']
-    db.session.commit()
     return jsonify({'message': 'Version updated'}), 200
 
-@app.route('/modeldeployments/<int:deployment_id>', methods=['PUT'])
+@api.route('/modeldeployments/<int:deployment_id>', methods=['PUT', 'PATCH'])
 def update_model_deployment(deployment_id):
-    deployment = ModelDeployment.query.get(deployment_id)
-    if not deployment:
+    values, error = read_changes(('server_id', 'version_id', 'deployment_time'),
+                                 required=('server_id', 'version_id', 'deployment_time'),
+                                 converters={'deployment_time': to_epoch})
+    if error:
+        return jsonify({'error': error}), 400
+    if not update_rows(ModelDeployment, [ModelDeployment.id == deployment_id], values):
         abort(404)
-    data = request.get_json()
-    deployment.server_id = data['server_id']
-    deployment.version_id = data['version_id']
-    deployment.deployment_time = datetime.fromisoformat(data['deployment_time'])
-    db.session.commit()
     return jsonify({'message': 'Deployment updated'}), 200
 
 
 
 # Delete a Model
-@app.route('/models/<int:model_id>', methods=['DELETE'])
+@api.route('/models/<int:model_id>', methods=['DELETE'])
 def delete_model(model_id):
     model = Model.query.get(model_id)
     if model is None:
         abort(404)
-    db.session.delete(model)
-    db.session.commit()
+    delete_rows(Model, [Model.id == model_id])  # Its versions and their deployments go too, without loading them
     return jsonify({'message': 'Model deleted'}), 200
 
 # Create and Read operations for Dataset
-@app.route('/datasets', methods=['GET', 'POST'])
+@api.route('/datasets', methods=['GET', 'POST'])
 def handle_datasets():
     if request.method == 'POST':
         data = request.get_json()
@@ -121,413 +204,295 @@ def handle_datasets():
         db.session.commit()
         return jsonify(new_dataset.id), 201
     else:
-        datasets = Dataset.query.all()
-        datasets_data = [{'id': dataset.id, 'name': dataset.name, 'description': dataset.description, 'data_type': dataset.data_type} for dataset in datasets]
-        return jsonify(datasets_data), 200
+        return paginate(prefix_filter(DATASET_LIST, Dataset.name), Dataset.id, serialize_dataset_row)
 
 # Create and Read operations for Version
-@app.route('/versions', methods=['GET', 'POST'])
+@api.route('/versions', methods=['GET', 'POST'])
 def handle_versions():
     if request.method == 'POST':
         data = request.get_json()
-        new_version = Version(model_id=data['model_id'], dataset_id=data['dataset_id'], version_number=data['version_number'], performance_metrics=data['performance_metrics'])
+        try:
+            performance_metrics = normalize_metrics(data['performance_metrics'])  # JSON object text, fed to version_metric
+        except ValueError as exc:
+            return jsonify({'error': f'invalid performance_metrics: {exc}'}), 400
+        new_version = Version(model_id=data['model_id'], dataset_id=data['dataset_id'], version_number=data['version_number'], performance_metrics=performance_metrics)
         db.session.add(new_version)
         db.session.commit()
         return jsonify(new_version.id), 201
     else:
-        versions = Version.query.all()
-        versions_data = [{'id': version.id, 'model_id': version.model_id, 'dataset_id': version.dataset_id, 'version_number': version.version_number, 'performance_metrics': version.performance_metrics} for version in versions]
-        return jsonify(versions_data), 200
+        query, serialize = expand(select(Version), Version, serialize_version, VERSION_EXPANSIONS)
+        if serialize is serialize_version:  # Nothing to nest, so no entities are needed
+            query, serialize = VERSION_LIST, serialize_version_row
+        return paginate(query, Version.id, serialize)
 
 # Create and Read operations for Server
-@app.route('/servers', methods=['GET', 'POST'])
+@api.route('/servers', methods=['GET', 'POST'])
 def handle_servers():
     if request.method == 'POST':
         data = request.get_json()
-        new_server = Server(name=data['name'], ip_address=data['ip_address'])
+        try:
+            ip_address = normalize_ip(data.get('ip_address'))  # ip_number is derived from it on insert
+        except ValueError as exc:
+            return jsonify({'error': f'invalid ip_address: {exc}'}), 400
+        new_server = Server(name=data['name'], ip_address=ip_address)
         db.session.add(new_server)
         db.session.commit()
         return jsonify(new_server.id), 201
     else:
-        servers = Server.query.all()
-        servers_data = [{'id': server.id, 'name': server.name, 'ip_address': server.ip_address} for server in servers]
-        return jsonify(servers_data), 200
-
-@app.route('/servers/<int:server_id>', methods=['PUT'])
+        bounds, error = cidr_arg()
+        if error:
+            return jsonify({'error': error}), 400
+        query = prefix_filter(SERVER_LIST, Server.name)
+        if bounds is not None:  # ?cidr=10.20.0.0/16 is a range scan of ix_server_ip_number
+            query = query.filter(Server.ip_number.between(*bounds))
+        return paginate(query, Server.id, serialize_server_row)
+
+@api.route('/servers/<int:server_id>', methods=['PUT', 'PATCH'])
 def update_server(server_id):
-    server = Server.query.get(server_id)
-    if not server:
+    values, error = read_changes(('name', 'ip_address'), required=('name', 'ip_address'),
+                                 converters={'ip_address': normalize_ip})
+    if error:
+        return jsonify({'error': error}), 400
+    if 'ip_address' in values:
+        values['ip_number'] = ip_number(values['ip_address'])
+    if not update_rows(Server, [Server.id == server_id], values):
         abort(404)
-    data = request.get_json()
-    server.name = data['name']
-    server.ip_address = data['ip_address']
-    db.session.commit()
     return jsonify({'message': 'Server updated'}), 200
 
 
-@app.route('/modeldeployments', methods=['GET', 'POST'])
+@api.route('/modeldeployments', methods=['GET', 'POST'])
 def handle_modeldeployments():
     if request.method == 'POST':
         data = request.get_json()
-        # Directly use the integer value for deployment_time without converting from datetime
-        deployment_time = data.get('deployment_time', None) # Expecting MMDD as an integer
+        deployment_time = data.get('deployment_time', None) # ISO-8601 or epoch seconds; legacy MMDD integers are still accepted
         if not deployment_time:
             return jsonify({'error': 'deployment_time is required'}), 400
         new_deployment = ModelDeployment(
         server_id=data['server_id'],
         version_id=data['version_id'],
-        deployment_time=deployment_time # Stored as an integer
+        deployment_time=parse_time(deployment_time, 'deployment_time') # Stored as epoch seconds (UTC)
         )
         db.session.add(new_deployment)
         db.session.commit()
         return jsonify(new_deployment.id), 201
     else:
-        deployments = ModelDeployment.query.all()
-        deployments_data = [{
-        'id': deployment.id,
-        'server_id': deployment.server_id,
-        'version_id': deployment.version_id,
-        'deployment_time': deployment.deployment_time # No conversion needed, directly use the integer
-        } for deployment in deployments]
-        return jsonify(deployments_data), 200
-
-
-
-@app.route('/datasets/<int:dataset_id>', methods=['PUT', 'DELETE'])
+        bounds, error = cidr_arg()
+        if error:
+            return jsonify({'error': error}), 400
+        query, serialize = expand(select(ModelDeployment), ModelDeployment, serialize_deployment, DEPLOYMENT_EXPANSIONS)
+        if serialize is serialize_deployment:  # Nothing to nest, so no entities are needed
+            query, serialize = DEPLOYMENT_LIST, serialize_deployment_row
+        if bounds is not None:  # Deployments on the servers of a network, e.g. ?cidr=10.20.0.0/16
+            query = query.filter(ModelDeployment.server_id.in_(select(Server.id).where(Server.ip_number.between(*bounds))))
+        return paginate(query, ModelDeployment.id, serialize)
+
+
+# Multi-get by id for lists too long for ?ids=: POST {"ids": [...]}, rows come back in request order
+@api.route('/models/lookup', methods=['POST'])
+@read_only
+def lookup_models():
+    return lookup_ids(MODEL_LIST, Model.id, serialize_model_row)
+
+@api.route('/datasets/lookup', methods=['POST'])
+@read_only
+def lookup_datasets():
+    return lookup_ids(DATASET_LIST, Dataset.id, serialize_dataset_row)
+
+@api.route('/versions/lookup', methods=['POST'])
+@read_only
+def lookup_versions():
+    query, serialize = expand(select(Version), Version, serialize_version, VERSION_EXPANSIONS)
+    if serialize is serialize_version:
+        query, serialize = VERSION_LIST, serialize_version_row
+    return lookup_ids(query, Version.id, serialize)
+
+@api.route('/servers/lookup', methods=['POST'])
+@read_only
+def lookup_servers():
+    return lookup_ids(SERVER_LIST, Server.id, serialize_server_row)
+
+@api.route('/modeldeployments/lookup', methods=['POST'])
+@read_only
+def lookup_modeldeployments():
+    query, serialize = expand(select(ModelDeployment), ModelDeployment, serialize_deployment, DEPLOYMENT_EXPANSIONS)
+    if serialize is serialize_deployment:
+        query, serialize = DEPLOYMENT_LIST, serialize_deployment_row
+    return lookup_ids(query, ModelDeployment.id, serialize)
+
+
+# Bulk create operations: accept a JSON array (or NDJSON) and insert it in one transaction
+@api.route('/models/bulk', methods=['POST'])
+def bulk_create_models():
+    return bulk_create(Model, ('name', 'description', 'type'), required=('name', 'type'))
+
+@api.route('/datasets/bulk', methods=['POST'])
+def bulk_create_datasets():
+    return bulk_create(Dataset, ('name', 'description', 'data_type'), required=('name', 'data_type'))
+
+@api.route('/versions/bulk', methods=['POST'])
+def bulk_create_versions():
+    return bulk_create(Version, ('model_id', 'dataset_id', 'version_number', 'performance_metrics'),
+                       foreign_keys={'model_id': Model, 'dataset_id': Dataset},
+                       required=('model_id', 'dataset_id', 'version_number'),
+                       converters={'performance_metrics': normalize_metrics})
+
+@api.route('/servers/bulk', methods=['POST'])
+def bulk_create_servers():
+    return bulk_create(Server, ('name', 'ip_address'), converters={'ip_address': normalize_ip})
+
+@api.route('/modeldeployments/bulk', methods=['POST'])
+def bulk_create_modeldeployments():
+    return bulk_create(ModelDeployment, ('server_id', 'version_id', 'deployment_time'),
+                       foreign_keys={'server_id': Server, 'version_id': Version},
+                       converters={'deployment_time': to_epoch})
+
+
+# Filtered bulk deletes: ?ids=1,5,9 on every resource, and ?before=, ?server_id=, ?version_id= on deployments.
+# Run as set-based SQL in bounded batches, rows referencing the deleted ones first (see bulk.delete_rows)
+def id_conditions(id_column):
+    ids, error = ids_arg()
+    if ids is not None and error is None:
+        ids, error = parse_ids(ids)
+    if error:
+        return None, error
+    return ([ids_filter(id_column, ids)] if ids is not None else []), None
+
+@api.route('/models', methods=['DELETE'])
+def bulk_delete_models():
+    conditions, error = id_conditions(Model.id)
+    if error:
+        return jsonify({'error': error}), 400
+    return bulk_delete(Model, conditions)
+
+@api.route('/datasets', methods=['DELETE'])
+def bulk_delete_datasets():
+    conditions, error = id_conditions(Dataset.id)
+    if error:
+        return jsonify({'error': error}), 400
+    return bulk_delete(Dataset, conditions)
+
+@api.route('/versions', methods=['DELETE'])
+def bulk_delete_versions():
+    conditions, error = id_conditions(Version.id)
+    if error:
+        return jsonify({'error': error}), 400
+    return bulk_delete(Version, conditions)
+
+@api.route('/servers', methods=['DELETE'])
+def bulk_delete_servers():
+    conditions, error = id_conditions(Server.id)
+    if error:
+        return jsonify({'error': error}), 400
+    return bulk_delete(Server, conditions)
+
+def deployment_conditions():
+    conditions, error = id_conditions(ModelDeployment.id)
+    if error:
+        return None, error
+    before = time_arg('before')
+    if before is not None:
+        conditions.append(ModelDeployment.deployment_time < before)
+    for name, column in (('server_id', ModelDeployment.server_id), ('version_id', ModelDeployment.version_id)):
+        if name in request.args:
+            value = request.args.get(name, type=int)
+            if value is None:
+                return None, f'{name} must be an integer'  # Never widen a delete or update by dropping a filter
+            conditions.append(column == value)
+    return conditions, None
+
+@api.route('/modeldeployments', methods=['DELETE'])
+def bulk_delete_modeldeployments():
+    conditions, error = deployment_conditions()
+    if error:
+        return jsonify({'error': error}), 400
+    return bulk_delete(ModelDeployment, conditions)
+
+# Set-based update with the same filters, e.g. PATCH /modeldeployments?server_id=7 {"server_id": 9}
+# moves every deployment of server 7 to server 9 in one statement
+@api.route('/modeldeployments', methods=['PATCH'])
+def bulk_update_modeldeployments():
+    conditions, error = deployment_conditions()
+    if error:
+        return jsonify({'error': error}), 400
+    return bulk_update(ModelDeployment, conditions, ('server_id', 'version_id', 'deployment_time'),
+                       required=('server_id', 'version_id', 'deployment_time'),
+                       converters={'deployment_time': to_epoch})
+
+
+# Delete a Dataset
+@api.route('/datasets/<int:dataset_id>', methods=['DELETE'])
 def handle_dataset(dataset_id):
     dataset = Dataset.query.get(dataset_id)
     if not dataset:
         abort(404, description="Resource not found")
-    if request.method == 'PUT':
-        data = request.get_json()
-        dataset.name = data['name']
-        dataset.description = data['description']
-        dataset.data_type = data['data_type']
-        db.session.commit()
-        return jsonify({'message': 'Dataset updated'}), 200
+    delete_rows(Dataset, [Dataset.id == dataset_id])
+    return jsonify({'message': 'Dataset deleted'}), 200
 
-    elif request.method == 'DELETE':
-        db.session.delete(dataset)
-        db.session.commit()
-        return jsonify({'message': 'Dataset deleted'}), 200
-
-# Update and Delete operations for Version
-@app.route('/versions/<int:version_id>', methods=['PUT', 'DELETE'])
+# Delete a Version
+@api.route('/versions/<int:version_id>', methods=['DELETE'])
 def handle_version(version_id):
     version = Version.query.get(version_id)
     if not version:
         abort(404, description="Resource not found")
-    if request.method == 'PUT':
-        data = request.get_json()
-        version.model_id = data['model_id']
-        version.dataset_id = data['dataset_id']
-        version.version_number = data['version_number']
-        version.performance_metrics = data['performance_metrics']
-        db.session.commit()
-        return jsonify({'message': 'Version updated'}), 200
-    elif request.method == 'DELETE':
-        db.session.delete(version)
-        db.session.commit()
-        return jsonify({'message': 'Version deleted'}), 200
+    delete_rows(Version, [Version.id == version_id])
+    return jsonify({'message': 'Version deleted'}), 200
 
 
-# Update and Delete operations for Server
-@app.route('/servers/<int:server_id>', methods=['PUT', 'DELETE'])
+# Delete a Server
+@api.route('/servers/<int:server_id>', methods=['DELETE'])
 def handle_server(server_id):
     server = Server.query.get(server_id)
     if not server:
         abort(404, description="Resource not found")
-    if request.method == 'PUT':
-        data = request.get_json()
-        server.name = data['name']
-        server.ip_address = data['ip_address']
-        db.session.commit()
-        return jsonify({'message': 'Server updated'}), 200
+    delete_rows(Server, [Server.id == server_id])
+    return jsonify({'message': 'Server deleted'}), 200
 
-    elif request.method == 'DELETE':
-        db.session.delete(server)
-        db.session.commit()
-        return jsonify({'message': 'Server deleted'}), 200
-
-# Update and Delete operations for ModelDeployment
-@app.route('/modeldeployments/<int:deployment_id>', methods=['PUT', 'DELETE'])
+# Delete a ModelDeployment
+@api.route('/modeldeployments/<int:deployment_id>', methods=['DELETE'])
 def handle_model_deployment(deployment_id):
     deployment = ModelDeployment.query.get(deployment_id)
     if not deployment:
         abort(404, description="Resource not found")
-    if request.method == 'PUT':
-        data = request.get_json()
-        deployment.server_id = data['server_id']
-        deployment.version_id = data['version_id']
-        # Note: deployment_time should be a datetime object, you may need to parse it from the string
-        deployment.deployment_time = datetime.fromisoformat(data['deployment_time'])
-        db.session.commit()
-        return jsonify({'message': 'Deployment updated'}), 200
-
-    elif request.method == 'DELETE':
-        db.session.delete(deployment)
-        db.session.commit()
-        return jsonify({'message': 'Deployment deleted'}), 200
+    delete_rows(ModelDeployment, [ModelDeployment.id == deployment_id])
+    return jsonify({'message': 'Deployment deleted'}), 200
 
 
-@app.route('/models/count/<model_type>', methods=['GET'])
+@api.route('/models/count/<model_type>', methods=['GET'])
 def count_models_by_type(model_type):
     # Calling a stored procedure
     result = db.session.execute(func.CountModelsByType(model_type))
     models_count = result.scalar()
     return jsonify({'model_type': model_type, 'count': models_count}), 200
 
-@app.route('/models/type/<model_type>', methods=['GET'])
+@api.route('/models/type/<model_type>', methods=['GET'])
 def get_models_by_type(model_type):
-    stmt = db.text("SELECT * FROM model WHERE type = :model_type")
-    result = db.engine.execute(stmt, model_type=model_type)
-    models = [{'id': row[0], 'name': row[1], 'description': row[2], 'type': row[3]} for row in result]
-    return jsonify(models)
-
-
-@app.route('/reports/deployments', methods=['GET'])
-def generate_deployment_report():
-    #db.session.execute(text('CREATE PROCEDURE my_procedure(IN param1 INT, IN param2 INT) AS BEGIN END;'))
-    start_date = request.args.get('start_date', type=int)
-    end_date = request.args.get('end_date', type=int)
-    model_type = request.args.get('model_type', default=None, type=str)
-
-    # Building SQL dynamically based on input
-
-    input_text = ''''''
-
-    params = {'start_date': start_date, 'end_date': end_date}
-    if model_type and model_type != "All":
-        input_text = ' AND m.type = :model_type'
-        params['model_type'] = model_type
-
-    #input_text = "SELECT md.id, s.name AS server_name, m.name AS model_name, md.deployment_time FROM model_deployment md JOIN version v ON md.version_id = v.id JOIN model m ON v.model_id = m.id JOIN server s ON md.server_id = s.id WHERE md.deployment_time BETWEEN :start_date AND :end_date" + input_text
-    input_text = "SELECT md.id, s.name AS server_name, m.name AS model_name, md.deployment_time FROM model_deployment md JOIN version v ON md.version_id = v.id JOIN model m ON v.model_id = m.id JOIN server s ON md.server_id = s.id WHERE md.deployment_time BETWEEN :start_date AND :end_date" + input_text
-
-    #db.Prepare()
-    print(input_text)
-    sql = text(input_text)
-    result = db.session.execute(sql, params).fetchall()
-    #result = db.session.execute(sql).fetchall()
-    deployments = [{
-        'id': row.id, 
-        'server_name': row.server_name, 
-        'model_name': row.model_name, 
-        'deployment_time': row.deployment_time
-    } for row in result]
-    print("dep: ", jsonify(deployments)) 
-    return jsonify(deployments)
-
-
-
-@app.route('/reports/top-servers', methods=['GET'])
-def get_top_servers():
-    top_x = request.args.get('top', default=5, type=int)  # Get the 'top' parameter from the query string, default to 5
-
-    # Build SQL query dynamically based on input
-    input_text = "SELECT s.id AS server_id, s.name AS server_name, COUNT(md.id) AS deployment_count FROM server s JOIN model_deployment md ON s.id = md.server_id GROUP BY s.id, s.name ORDER BY COUNT(md.id) DESC LIMIT :top_x"
-
-    params = {'top_x': top_x}
-
-    # Debugging: Print the final SQL query to check
-    print(input_text)
-
-    # Execute the SQL query
-    sql = text(input_text)
-    result = db.session.execute(sql, params).fetchall()
-
-    # Build a list of dictionaries to hold the result for JSON conversion
-    top_servers = [{
-        'server_id': row.server_id,
-        'server_name': row.server_name,
-        'deployment_count': row.deployment_count
-    } for row in result]
-
-    # Debugging: Print the JSON output to check
-    print("Top Servers: ", jsonify(top_servers))
-
-    return jsonify(top_servers)
-
-
-@app.route('/reports/model-types-count', methods=['GET'])
-def get_model_types_count():
-    # Build SQL query dynamically based on input
-    input_text = """
-    SELECT m.type AS model_type, COUNT(md.id) AS deployment_count
-    FROM model m
-    JOIN version v ON m.id = v.model_id
-    JOIN model_deployment md ON v.id = md.version_id
-    GROUP BY m.type
-    ORDER BY COUNT(md.id) DESC
-    """
-
-    # Debugging: Print the final SQL query to check
-    print(input_text)
-
-    # Execute the SQL query
-    sql = text(input_text)
-    result = db.session.execute(sql)
-
-    # Convert result set to dictionary format
-    model_types_count = [{
-        'model_type': row.model_type,
-        'deployment_count': row.deployment_count
-    } for row in result]
-
-    # Debugging: Print the JSON output to check
-    print("Model Types Count: ", jsonify(model_types_count))
-
-    return jsonify(model_types_count)
-
-@app.route('/reports/top-datasets', methods=['GET'])
-def get_top_datasets():
-    top_x = request.args.get('top', default=5, type=int)  # Get the 'top' parameter from the query string, default to 5
-
-    # Build SQL query dynamically based on input
-    input_text = """
-    SELECT d.id AS dataset_id, d.name AS dataset_name, COUNT(v.id) AS version_count
-    FROM dataset d
-    JOIN version v ON d.id = v.dataset_id
-    GROUP BY d.id, d.name
-    ORDER BY COUNT(v.id) DESC
-    LIMIT :top_x
-    """
-
-    params = {'top_x': top_x}
-
-    # Debugging: Print the final SQL query to check
-    print(input_text)
-
-    # Execute the SQL query
-    sql = text(input_text)
-    result = db.session.execute(sql, params).fetchall()
-
-    # Build a list of dictionaries to hold the result for JSON conversion
-    top_datasets = [{
-        'dataset_id': row.dataset_id,
-        'dataset_name': row.dataset_name,
-        'version_count': row.version_count
-    } for row in result]
-
-    # Debugging: Print the JSON output to check
-    print("Top Datasets: ", jsonify(top_datasets))
-
-    return jsonify(top_datasets)
-
-@app.route('/datasets/list', methods=['GET'])
-def list_datasets():
-    query = "SELECT id, name FROM dataset ORDER BY name"
-    result = db.session.execute(text(query))
-    datasets = [{'dataset_id': row.id, 'dataset_name': row.name} for row in result]
-    return jsonify(datasets)
-
-@app.route('/models/by-dataset', methods=['GET'])
-def models_by_dataset():
-    dataset_id = request.args.get('dataset_id', type=int)
-
-    query = """
-    SELECT m.id AS model_id, m.name AS model_name, m.description, COUNT(md.id) AS deployment_count
-    FROM model m
-    JOIN version v ON m.id = v.model_id
-    JOIN model_deployment md ON v.id = md.version_id
-    WHERE v.dataset_id = :dataset_id
-    GROUP BY m.id
-    """
-
-    params = {'dataset_id': dataset_id}
-    result = db.session.execute(text(query), params)
-    models = [{
-        'model_id': row.model_id,
-        'model_name': row.model_name,
-        'model_description': row.description,
-        'deployment_count': row.deployment_count
-    } for row in result]
-
-    return jsonify(models)
-
-
-
-@app.route('/reports/top-models', methods=['GET'])
-def get_top_models():
-    top_x = request.args.get('top', default=5, type=int)  # Get the 'top' parameter from the query string, default to 5
-
-    # Build SQL query dynamically based on input
-    input_text = """
-    SELECT m.id AS model_id, m.name AS model_name, COUNT(md.id) AS deployment_count
-    FROM model m
-    JOIN version v ON m.id = v.model_id
-    JOIN model_deployment md ON v.id = md.version_id
-    GROUP BY m.id, m.name
-    ORDER BY COUNT(md.id) DESC
-    LIMIT :top_x
-    """
-
-    params = {'top_x': top_x}
-
-    # Debugging: Print the final SQL query to check
-    print(input_text)
-
-    # Execute the SQL query
-    sql = text(input_text)
-    result = db.session.execute(sql, params).fetchall()
-
-    # Build a list of dictionaries to hold the result for JSON conversion
-    top_models = [{
-        'model_id': row.model_id,
-        'model_name': row.model_name,
-        'deployment_count': row.deployment_count
-    } for row in result]
-
-    # Debugging: Print the JSON output to check
-    print("Top Models: ", jsonify(top_models))
-
-    return jsonify(top_models)
-
-
-from sqlalchemy import text
-from sqlalchemy import func
+    result = db.session.execute(MODELS_BY_TYPE, {'model_type': model_type})
+    return json_response([serialize_model_row(row) for row in result])
 
 
+# Read-only reports. Their SQL lives in reports.py so that the async entry point (asgi.py) runs the same queries
+def report_view(report):
+    def view():
+        try:
+            stmt, params, serialize_row = report(request.args)
+        except ReportError as error:
+            return jsonify({'error': str(error)}), 400
+        return json_response([serialize_row(row) for row in db.session.execute(stmt, params)])
+    return view
 
-@app.route('/reports/server-deployments', methods=['GET'])
-def server_deployment_report():
-    start_date = request.args.get('start_date', type=int)
-    end_date = request.args.get('end_date', type=int)
-    model_type = request.args.get('model_type', default=None, type=str)
+for path, (endpoint, tables, report) in REPORTS.items():
+    api.add_url_rule(path, endpoint, cached_report(*tables)(report_view(report)), methods=['GET'])
 
-    # SQL query dynamically built based on input
-    query_parts = [
-        "SELECT s.id AS server_id, s.name AS server_name, COUNT(md.id) AS deployment_count",
-        "FROM server s",
-        "JOIN model_deployment md ON s.id = md.server_id",
-        "JOIN version v ON md.version_id = v.id",
-        "JOIN model m ON v.model_id = m.id",
-        "WHERE md.deployment_time BETWEEN :start_date AND :end_date"
-    ]
 
-    params = {'start_date': start_date, 'end_date': end_date}
-    
-    if model_type and model_type != "All":
-        query_parts.append("AND m.type = :model_type")
-        params['model_type'] = model_type
-    
-    query_parts.append("GROUP BY s.id, s.name")
-    
-    input_text = " ".join(query_parts)
+# Streaming CSV / Arrow / Parquet extract of the joined deployment facts
+api.add_url_rule('/export/deployments', view_func=export_deployments)
 
-    # Execute the SQL query
-    sql = text(input_text)
-    result = db.session.execute(sql, params).fetchall()
-    
-    # Build result JSON
-    deployments = [{
-        'server_id': row.server_id,
-        'server_name': row.server_name,
-        'deployment_count': row.deployment_count
-    } for row in result]
+# Ranked full-text search over models and datasets
+api.add_url_rule('/search', view_func=search)
 
-    return jsonify(deployments)
+# Long-polled feed of every create, update and delete, for clients keeping a local copy in sync
+api.add_url_rule('/changes', view_func=changes)
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
+    create_app().run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
@@ -0,0 +1,184 @@
+# asgi.py
+import asyncio
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_etags
+
+from app import EXPOSE_HEADERS, create_app
+from cache import GENERATIONS_QUERY, generations_of, get_cache, report_etag
+from changes import (CHANGE_BOUNDS, CHANGES_AFTER, DEFAULT_CHANGES_POLL_INTERVAL, ChangeFeedError, cursor_error,
+                     feed_args, feed_page)
+from compression import encode_etag_header, matching_etag
+from config import SQLITE_PRAGMAS
+from fastjson import dumps
+from metrics import REQUEST_LATENCY
+from reports import REPORTS, ReportError
+
+# asyncio driver used for each backend of DATABASE_URL
+ASYNC_DRIVERS = {'sqlite': 'aiosqlite', 'postgresql': 'asyncpg'}
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+
+def async_database_url(url):
+    """Swap the driver of a database URL for its asyncio counterpart (sqlite -> sqlite+aiosqlite)."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f'no asyncio driver for {backend} databases')
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}')
+
+
+def create_engine(config):
+    """
+    Create the asyncio engine for the database and pool settings of the Flask app config.
+
+    SQLite connections get the same pragmas as the Flask engine (see config.py).
+    """
+    url = async_database_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {name: value for name, value in config['SQLALCHEMY_ENGINE_OPTIONS'].items() if name in POOL_OPTIONS}
+    if options:
+        options['poolclass'] = AsyncAdaptedQueuePool  # Keep connections open; aiosqlite would reopen the file per checkout
+    if url.get_backend_name() == 'sqlite':
+        # Let SQLAlchemy own transaction boundaries, as set_sqlite_pragmas does for the sync engine
+        options['connect_args'] = {'isolation_level': None}
+    engine = create_async_engine(url, **options)
+
+    if url.get_backend_name() == 'sqlite':
+        @event.listens_for(engine.sync_engine, 'connect')
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f'PRAGMA {pragma}={value}')
+            cursor.close()
+    return engine
+
+
+flask_app = create_app()
+engine = create_engine(flask_app.config)
+compression = flask_app.extensions['compression']  # The Flask app's settings, see compression.py
+with flask_app.app_context():
+    report_cache = get_cache()  # The same cache the Flask views fill
+
+
+def render_json(data):
+    # Encoded like the Flask report views so both entry points return (and cache) identical bodies
+    return dumps(data)
+
+
+def compress(request, response):
+    # Same negotiation as compression.init_compression for the Flask routes
+    if not compression.compressible(response.media_type, response.status_code):
+        return response
+    response.headers['Vary'] = 'Accept-Encoding'
+    encoding = compression.negotiate(request.headers.get('accept-encoding'))
+    if encoding is not None and len(response.body) >= compression.min_size:
+        response.body = compression.compress(response.body, encoding)
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(response.body))
+        if 'etag' in response.headers:
+            response.headers['ETag'] = encode_etag_header(response.headers['etag'], encoding)
+    return response
+
+
+async def run_report(request, report, tables):
+    # Same ETag, cache and 400 handling as cache.cached_report around app.report_view
+    async with engine.connect() as conn:
+        generations = generations_of((await conn.execute(GENERATIONS_QUERY, {'tables': list(tables)})).fetchall(), tables)
+        etag = report_etag(request.url.path, sorted(request.query_params.multi_items()), generations)
+
+        matched = matching_etag(parse_etags(request.headers.get('if-none-match')), etag)
+        if matched:
+            response = Response(status_code=304)
+            etag = matched  # The tag the client holds, plain or compressed
+        else:
+            cached = report_cache.get(etag) if report_cache is not None else None
+            if cached is not None:
+                status, mimetype, body = cached
+                response = Response(body, status_code=status, media_type=mimetype)
+            else:
+                try:
+                    stmt, params, serialize_row = report(request.query_params)
+                except ReportError as error:
+                    response = Response(render_json({'error': str(error)}), status_code=400, media_type='application/json')
+                else:
+                    result = await conn.execute(stmt, params)
+                    body = render_json([serialize_row(row) for row in result])
+                    response = Response(body, media_type='application/json')
+                    if report_cache is not None:
+                        report_cache.set(etag, (200, 'application/json', body))
+    if response.status_code in (200, 304):  # Errors are not tagged, so a revalidation cannot confirm one
+        response.headers['ETag'] = f'"{etag}"'
+        response.headers['Cache-Control'] = 'no-cache'  # Always revalidate; a matching ETag costs no query
+    return compress(request, response)
+
+
+def report_endpoint(report, tables):
+    async def endpoint(request):
+        started = time.perf_counter()
+        response = await run_report(request, report, tables)
+        REQUEST_LATENCY.observe(time.perf_counter() - started,
+                                (request.method, request.url.path, str(response.status_code)))
+        return response
+    return endpoint
+
+
+def json_error(message, status):
+    return Response(render_json({'error': message}), status_code=status, media_type='application/json')
+
+
+async def read_feed(since, wait, limit):
+    # Same as changes.changes, but a waiting client holds no thread: it sleeps on the event loop
+    # between polls, and each poll checks a connection out only while its query runs
+    async with engine.connect() as conn:
+        bounds = tuple((await conn.execute(CHANGE_BOUNDS)).one())
+        if since is None:
+            return Response(render_json({'changes': [], 'next': bounds[1] or 0}), media_type='application/json')
+        error = cursor_error(since, bounds)
+        if error:
+            return json_error(error, 410)
+        rows = (await conn.execute(CHANGES_AFTER, {'since': since, 'limit': limit})).fetchall()
+    interval = flask_app.config.get('CHANGES_POLL_INTERVAL', DEFAULT_CHANGES_POLL_INTERVAL)
+    deadline = time.monotonic() + wait
+    while not rows and time.monotonic() < deadline:
+        await asyncio.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+        async with engine.connect() as conn:
+            rows = (await conn.execute(CHANGES_AFTER, {'since': since, 'limit': limit})).fetchall()
+    return Response(render_json(feed_page(rows, since)), media_type='application/json')
+
+
+async def changes_endpoint(request):
+    started = time.perf_counter()
+    try:
+        since, wait, limit = feed_args(request.query_params)
+    except ChangeFeedError as error:
+        response = json_error(str(error), 400)
+    else:
+        response = await read_feed(since, wait, limit)
+    response = compress(request, response)
+    REQUEST_LATENCY.observe(time.perf_counter() - started, (request.method, request.url.path, str(response.status_code)))
+    return response
+
+
+# The reports and the change feed await the database on the event loop, so a slow report or a
+# long-polling client holds no thread. Every other route of app.py is served by the Flask app
+# itself on Starlette's thread pool.
+app = Starlette(
+    routes=[Route(path, report_endpoint(report, tables), methods=['GET'], name=endpoint)
+            for path, (endpoint, tables, report) in REPORTS.items()]
+           + [Route('/changes', changes_endpoint, methods=['GET'], name='changes'),
+              Mount('', app=WSGIMiddleware(flask_app))],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'],
+                           expose_headers=EXPOSE_HEADERS)],
+    on_shutdown=[engine.dispose],
+)
+app.state.flask_app = flask_app  # For the fork hooks of gunicorn.conf.py
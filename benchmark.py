@@ -0,0 +1,408 @@
+# benchmark.py
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import click
+import requests
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCALES = '10k,1M,10M'
+DEFAULT_DATA_DIR = os.path.join(ROOT, 'bench_data')
+SEED = 42
+HISTORY_END = datetime(2024, 1, 1, tzinfo=timezone.utc)  # Seeded deployments end here, see seed.generate_deployments
+SERVER_START_TIMEOUT = 60  # Seconds to wait for gunicorn or uvicorn to answer
+
+
+# Request builders: each takes (rng, sizes, state) and returns (method, path, params, json).
+# `state` is shared by the routes of one scale so the write routes can update and then
+# delete the rows created earlier, leaving the database as it was.
+
+def random_window(rng, days):
+    end = HISTORY_END - timedelta(days=rng.randrange(365))
+    return {'start_date': (end - timedelta(days=days)).date().isoformat(), 'end_date': end.date().isoformat()}
+
+
+def list_route(path, table):
+    def build(rng, sizes, state):
+        return 'GET', path, {'after': rng.randrange(sizes[table]), 'limit': 100}, None
+    return build
+
+
+def create_deployment(rng, sizes, state):
+    deployment = {
+        'server_id': rng.randint(1, sizes['server']),
+        'version_id': rng.randint(1, sizes['version']),
+        'deployment_time': (HISTORY_END - timedelta(seconds=rng.randrange(86400 * 365))).isoformat(),
+    }
+    return 'POST', '/modeldeployments', None, deployment
+
+
+def update_deployment(rng, sizes, state):
+    deployment_id = state['created'][rng.randrange(len(state['created']))]
+    _, _, _, deployment = create_deployment(rng, sizes, state)
+    return 'PUT', f'/modeldeployments/{deployment_id}', None, deployment
+
+
+def delete_deployment(rng, sizes, state):
+    return 'DELETE', f"/modeldeployments/{state['created'].pop()}", None, None
+
+
+ROUTES = [
+    ('GET /models', list_route('/models', 'model')),
+    ('GET /models?prefix', lambda rng, sizes, state: ('GET', '/models', {'prefix': rng.choice(['G', 'Res', 'X', 'Fast'])}, None)),
+    ('GET /datasets', list_route('/datasets', 'dataset')),
+    ('GET /versions', list_route('/versions', 'version')),
+    ('GET /servers', list_route('/servers', 'server')),
+    ('GET /modeldeployments', list_route('/modeldeployments', 'model_deployment')),
+    ('GET /servers?cidr', lambda rng, sizes, state: ('GET', '/servers', {'cidr': f'{rng.randint(0, 255)}.0.0.0/8'}, None)),
+    ('GET /modeldeployments?cidr', lambda rng, sizes, state: (
+        'GET', '/modeldeployments', {'cidr': f'{rng.randint(0, 255)}.{rng.randint(0, 255)}.0.0/16'}, None)),
+    ('GET /modeldeployments?limit=1000', lambda rng, sizes, state: (
+        'GET', '/modeldeployments', {'after': rng.randrange(sizes['model_deployment']), 'limit': 1000}, None)),
+    ('GET /reports/deployments', lambda rng, sizes, state: ('GET', '/reports/deployments', random_window(rng, 1), None)),
+    ('GET /reports/deployments (30 days)', lambda rng, sizes, state: ('GET', '/reports/deployments', random_window(rng, 30), None)),
+    ('GET /reports/deployments/timeseries', lambda rng, sizes, state: (
+        'GET', '/reports/deployments/timeseries',
+        dict(random_window(rng, 90), bucket='day', group_by=rng.choice(['server', 'model_type'])), None)),
+    ('GET /reports/server-deployments', lambda rng, sizes, state: ('GET', '/reports/server-deployments', random_window(rng, 7), None)),
+    ('GET /reports/top-servers', lambda rng, sizes, state: ('GET', '/reports/top-servers', {'top': rng.randint(1, 50)}, None)),
+    ('GET /reports/top-models', lambda rng, sizes, state: ('GET', '/reports/top-models', {'top': rng.randint(1, 50)}, None)),
+    ('GET /reports/top-datasets', lambda rng, sizes, state: ('GET', '/reports/top-datasets', {'top': rng.randint(1, 50)}, None)),
+    ('GET /reports/leaderboard', lambda rng, sizes, state: ('GET', '/reports/leaderboard', {'metric': 'accuracy', 'top': rng.randint(1, 50)}, None)),
+    ('GET /reports/leaderboard?dataset_id', lambda rng, sizes, state: (
+        'GET', '/reports/leaderboard', {'metric': 'accuracy', 'dataset_id': rng.randint(1, sizes['dataset']), 'top': 10}, None)),
+    ('GET /reports/model-types-count', lambda rng, sizes, state: ('GET', '/reports/model-types-count', None, None)),
+    ('GET /models/by-dataset', lambda rng, sizes, state: ('GET', '/models/by-dataset', {'dataset_id': rng.randint(1, sizes['dataset'])}, None)),
+    ('GET /datasets/list', lambda rng, sizes, state: ('GET', '/datasets/list', None, None)),
+    ('POST /modeldeployments', create_deployment),
+    ('PUT /modeldeployments/<id>', update_deployment),
+    ('DELETE /modeldeployments/<id>', delete_deployment),
+]
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def to_ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': to_ms(percentile(ordered, 0.50)),
+        'p95_ms': to_ms(percentile(ordered, 0.95)),
+        'p99_ms': to_ms(percentile(ordered, 0.99)),
+        'mean_ms': to_ms(sum(ordered) / len(ordered)) if ordered else None,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def run_routes(make_client, sizes, count, concurrency, warmup, routes):
+    """
+    Issue count requests to each route from concurrency threads and summarise the latencies.
+
+    Args:
+        make_client: Returns a callable (method, path, params, json) -> (status, JSON body);
+            called once per thread.
+        sizes: Table sizes of the seeded database, used to pick valid ids.
+        count: Measured requests per route.
+        concurrency: Number of threads issuing requests at the same time.
+        warmup: Unmeasured requests sent to each route first.
+        routes: (name, builder) pairs to run, in order.
+    """
+    local = threading.local()
+    state = {'created': deque()}
+    results = {}
+
+    def client():
+        if not hasattr(local, 'call'):
+            local.call = make_client()
+        return local.call
+
+    for name, build in routes:
+        rng = random.Random(f'{SEED}:{name}')
+        lock = threading.Lock()
+        latencies = []
+        errors = [0]
+
+        def issue(request, measure=True):
+            started = time.perf_counter()
+            status, body = client()(*request)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if request[0] == 'POST' and status < 400 and isinstance(body, int):
+                    state['created'].append(body)
+                if measure:
+                    latencies.append(elapsed)
+                    errors[0] += status >= 400
+
+        planned = []
+        for _ in range(warmup + count):
+            if name.startswith(('PUT', 'DELETE')) and not state['created']:
+                break  # Nothing left to update or delete
+            planned.append(build(rng, sizes, state))
+        skip = warmup if len(planned) > warmup else 0
+        for request in planned[:skip]:
+            issue(request, measure=False)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(issue, planned[skip:]))
+        results[name] = summarize(latencies, errors[0], time.perf_counter() - started)
+        click.echo(f"    {name:<38} p50 {results[name]['p50_ms']} ms  p99 {results[name]['p99_ms']} ms  "
+                   f"{results[name]['throughput_rps']} req/s  errors {errors[0]}")
+    return results
+
+
+def peak_rss_self_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)  # Bytes on macOS, KiB on Linux
+
+
+def peak_rss_tree_mb(pid):
+    """Sum of the peak RSS (VmHWM) of pid and its children; None where /proc is unavailable."""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            pids += [int(child) for child in children.read().split()]
+        for process in pids:
+            with open(f'/proc/{process}/status') as status:
+                for line in status:
+                    if line.startswith('VmHWM:'):
+                        total += int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return round(total / 1024, 1)
+
+
+def client_benchmark(database_url, sizes, count, concurrency, warmup, routes, accept_encoding=None):
+    """Benchmark the app in this (freshly spawned) process through the Flask test client."""
+    os.environ['DATABASE_URL'] = database_url
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    app = create_app()
+    app.logger.disabled = True
+
+    def make_client():
+        test_client = app.test_client()
+
+        def call(method, path, params, body):
+            headers = {'Accept-Encoding': accept_encoding} if accept_encoding else None
+            response = test_client.open(path, method=method, query_string=params, json=body, headers=headers)
+            return response.status_code, response.get_json(silent=True)  # None when compressed, which is fine
+        return call
+
+    selected = [(name, build) for name, build in ROUTES if name in routes]
+    results = run_routes(make_client, sizes, count, concurrency, warmup, selected)
+    return results, peak_rss_self_mb()
+
+
+def http_client(base_url, accept_encoding=None):
+    def make_client():
+        session = requests.Session()
+        if accept_encoding:
+            session.headers['Accept-Encoding'] = accept_encoding  # requests itself sends "gzip, deflate"
+
+        def call(method, path, params, body):
+            response = session.request(method, base_url + path, params=params, json=body, timeout=60)
+            try:
+                return response.status_code, response.json()
+            except ValueError:
+                return response.status_code, None
+        return call
+    return make_client
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(target, port, workers):
+    command = ['gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}']
+    if target == 'uvicorn':
+        # uvicorn's own --workers supervisor leaves Nagle on the shared socket (~40 ms per response)
+        return command + ['--worker-class', 'uvicorn.workers.UvicornWorker', 'asgi:app']
+    return command + ['app:create_app()']
+
+
+def start_server(database_url, target, workers):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url)
+    process = subprocess.Popen(
+        [sys.executable, '-m'] + server_command(target, port, workers),
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise click.ClickException(f'{target} exited during startup; is it installed?')
+        try:
+            if requests.get(base_url + '/test', timeout=1).status_code == 200:
+                return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise click.ClickException(f'{target} did not answer within {SERVER_START_TIMEOUT}s')
+
+
+def seed_database(path, scale, reseed):
+    if os.path.exists(path) and not reseed:
+        click.echo(f'  reusing {path}')
+        return None
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}', FLASK_APP='app')
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'flask', 'seed', '--scale', str(scale), '--seed', str(SEED)],
+                   cwd=ROOT, env=env, check=True)
+    return round(time.perf_counter() - started, 2)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@click.group()
+def cli():
+    """
+    Endpoint benchmarks across data scales.
+
+    `run` seeds one SQLite database per scale (kept in --data-dir and reused),
+    drives every route through the Flask test client or a gunicorn or uvicorn server and
+    writes p50/p95/p99 latency, throughput and peak RSS to a JSON file;
+    `compare` diffs two such files.
+    """
+
+
+@cli.command()
+@click.option('--scales', default=DEFAULT_SCALES, show_default=True, help='Comma-separated deployment counts.')
+@click.option('--target', type=click.Choice(['client', 'gunicorn', 'uvicorn']), default='client', show_default=True,
+              help='Flask test client in a fresh process, a local gunicorn server, or asgi.py in uvicorn workers.')
+@click.option('--url', default=None, help='Benchmark an already running server instead (single scale, no seeding).')
+@click.option('--workers', type=int, default=4, show_default=True, help='gunicorn or uvicorn worker processes.')
+@click.option('--concurrency', type=int, default=4, show_default=True, help='Concurrent client threads.')
+@click.option('--requests', 'count', type=int, default=200, show_default=True, help='Measured requests per route.')
+@click.option('--warmup', type=int, default=20, show_default=True, help='Unmeasured requests per route.')
+@click.option('--route', 'routes', multiple=True, help='Only run routes whose name contains this text.')
+@click.option('--accept-encoding', default=None,
+              help='Accept-Encoding sent with every request, e.g. gzip or identity (compression.py negotiates it).')
+@click.option('--data-dir', default=DEFAULT_DATA_DIR, show_default=True, help='Where the seeded databases are kept.')
+@click.option('--reseed', is_flag=True, help='Seed the databases again even if they exist.')
+@click.option('--output', default=None, help='JSON file to write (default: benchmark-<revision>.json).')
+def run(scales, target, url, workers, concurrency, count, warmup, routes, accept_encoding, data_dir, reseed, output):
+    """Seed, exercise every route and record latency, throughput and peak RSS."""
+    from seed import parse_scale, table_sizes  # Kept out of the spawned benchmark processes, which import the app themselves
+
+    selected = [name for name, _ in ROUTES if not routes or any(text in name for text in routes)]
+    revision = git_revision()
+    report = {
+        'revision': revision,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'target': url or target,
+        'concurrency': concurrency,
+        'requests_per_route': count,
+        'accept_encoding': accept_encoding,
+        'scales': {},
+    }
+    os.makedirs(data_dir, exist_ok=True)
+
+    for label in (scales.split(',') if not url else [scales.split(',')[0]]):
+        scale = parse_scale(label)
+        sizes = table_sizes(scale)
+        click.echo(f'Scale {label} ({scale:,} deployments):')
+        entry = {'deployments': scale}
+        if url:
+            entry['routes'] = run_routes(http_client(url.rstrip('/'), accept_encoding), sizes, count, concurrency, warmup,
+                                         [(name, build) for name, build in ROUTES if name in selected])
+            entry['peak_rss_mb'] = None
+        else:
+            path = os.path.join(os.path.abspath(data_dir), f'bench_{label}.db')
+            entry['seed_seconds'] = seed_database(path, scale, reseed)
+            database_url = f'sqlite:///{path}'
+            if target == 'client':
+                with multiprocessing.get_context('spawn').Pool(1) as pool:
+                    entry['routes'], entry['peak_rss_mb'] = pool.apply(
+                        client_benchmark, (database_url, sizes, count, concurrency, warmup, selected, accept_encoding))
+            else:
+                process, base_url = start_server(database_url, target, workers)
+                try:
+                    entry['routes'] = run_routes(http_client(base_url, accept_encoding), sizes, count, concurrency, warmup,
+                                                 [(name, build) for name, build in ROUTES if name in selected])
+                    entry['peak_rss_mb'] = peak_rss_tree_mb(process.pid)
+                finally:
+                    process.send_signal(signal.SIGTERM)
+                    process.wait(timeout=30)
+        click.echo(f"  peak RSS: {entry['peak_rss_mb']} MB")
+        report['scales'][label] = entry
+
+    output = output or f"benchmark-{revision or 'unknown'}.json"
+    with open(output, 'w') as out:
+        json.dump(report, out, indent=2)
+    click.echo(f'Results written to {output}')
+
+
+@cli.command()
+@click.argument('baseline', type=click.File())
+@click.argument('candidate', type=click.File())
+@click.option('--threshold', type=float, default=10.0, show_default=True,
+              help='Percent slowdown of p50/p95/p99 reported as a regression.')
+def compare(baseline, candidate, threshold):
+    """Diff two result files; exits with status 1 when a route regressed beyond --threshold."""
+    old, new = json.load(baseline), json.load(candidate)
+    click.echo(f"{old.get('revision')} -> {new.get('revision')}")
+    regressions = 0
+    for label, new_scale in new['scales'].items():
+        old_scale = old['scales'].get(label)
+        if old_scale is None:
+            continue
+        click.echo(f"\nScale {label}: peak RSS {old_scale.get('peak_rss_mb')} -> {new_scale.get('peak_rss_mb')} MB")
+        click.echo(f"  {'route':<38} {'p50 ms':>18} {'p95 ms':>18} {'p99 ms':>18} {'req/s':>18}")
+        for name, stats in new_scale['routes'].items():
+            before = old_scale['routes'].get(name)
+            if before is None:
+                continue
+            cells = []
+            flagged = False
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+                if before[key] and stats[key] is not None:
+                    change = (stats[key] - before[key]) / before[key] * 100
+                    if key != 'throughput_rps' and change > threshold:
+                        flagged = True
+                    cells.append(f'{stats[key]:>8} ({change:+5.0f}%)')
+                else:
+                    cells.append(f'{str(stats[key]):>18}')
+            regressions += flagged
+            click.echo(f"{'!' if flagged else ' '} {name:<38} " + ' '.join(cells))
+    if regressions:
+        click.echo(f'\n{regressions} route(s) slower than the {threshold:g}% threshold.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    cli()
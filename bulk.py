@@ -0,0 +1,304 @@
+# bulk.py
+import json
+
+from flask import current_app, jsonify, request
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+from pagination import NDJSON_MIMETYPE
+
+DEFAULT_BULK_CHUNK_SIZE = 500  # Rows per INSERT statement, override with BULK_INSERT_CHUNK_SIZE
+ID_LOOKUP_CHUNK_SIZE = 500     # Stay well below SQLite's bound-parameter limit for IN (...)
+DEFAULT_DELETE_BATCH_SIZE = 5000  # Rows per DELETE statement and transaction, override with BULK_DELETE_BATCH_SIZE
+
+
+def read_items():
+    """
+    Read the request body as a list of items.
+
+    Accepts a JSON array or, with `Content-Type: application/x-ndjson`, one JSON
+    object per line. Returns a list of (item, error) pairs so that a malformed
+    line is reported against its own index instead of failing the whole batch.
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append((json.loads(line), None))
+            except ValueError as exc:
+                items.append((None, f'invalid JSON: {exc}'))
+        return items
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        return None
+    return [(item, None) for item in data]
+
+
+def existing_ids(table, ids):
+    """Return the subset of ids present in table, using one IN query per chunk."""
+    ids = list(ids)
+    found = set()
+    for start in range(0, len(ids), ID_LOOKUP_CHUNK_SIZE):
+        chunk = ids[start:start + ID_LOOKUP_CHUNK_SIZE]
+        stmt = select(table.c.id).where(table.c.id.in_(chunk))
+        found.update(db.session.execute(stmt).scalars())
+    return found
+
+
+def insert_chunk(conn, table, rows):
+    """
+    Insert rows with as few statements as the backend allows and return their ids in order.
+
+    Backends with RETURNING get a single multi-row INSERT. Elsewhere the first row is
+    inserted on its own, which takes the write lock and yields the next id, and the
+    remaining rows are inserted with explicitly allocated ids in one executemany.
+    """
+    if conn.dialect.full_returning:
+        result = conn.execute(table.insert().values(rows).returning(table.c.id))
+        return [row.id for row in result]
+    first_id = conn.execute(table.insert(), rows[0]).inserted_primary_key[0]
+    ids = list(range(first_id, first_id + len(rows)))
+    if len(rows) > 1:
+        conn.execute(table.insert(), [dict(row, id=row_id) for row, row_id in zip(rows[1:], ids[1:])])
+    return ids
+
+
+def bulk_create(model, fields, foreign_keys=None, required=None, converters=None):
+    """
+    Create many rows of model from a JSON/NDJSON array in one transaction.
+
+    Every item is validated up front: missing fields, foreign keys that are not
+    integers and foreign keys that do not exist (checked with one set-based
+    query per referenced table) are reported per item and skipped. Valid items are inserted in chunks of
+    BULK_INSERT_CHUNK_SIZE rows; if a chunk is rejected by the database its rows
+    are retried one by one so only the offending items fail.
+
+    Args:
+        model: Model class to insert into.
+        fields: Column names read from each item.
+        foreign_keys: Mapping of column name to the referenced model class.
+        required: Subset of fields that must be present and non-empty
+            (defaults to all of them).
+        converters: Mapping of field name to a callable turning the submitted
+            value into the stored one; a ValueError is reported for that item.
+
+    Returns:
+        201 with `ids` aligned to the request items (null where the item failed)
+        and a list of `errors` as {"index", "error"}; 400 if nothing was created.
+    """
+    foreign_keys = foreign_keys or {}
+    converters = converters or {}
+    required = fields if required is None else required
+    items = read_items()
+    if items is None:
+        return jsonify({'error': 'expected a JSON array or NDJSON body'}), 400
+
+    ids = [None] * len(items)
+    errors = []
+    rows = []  # (index, row) pairs that passed validation
+
+    for index, (item, error) in enumerate(items):
+        if error is None and not isinstance(item, dict):
+            error = 'item must be a JSON object'
+        if error is None:
+            missing = [field for field in required if item.get(field) in (None, '')]
+            if missing:
+                error = f"missing required field(s): {', '.join(missing)}"
+        if error is None:
+            row = {field: item.get(field) for field in fields}
+            try:
+                for field, convert in converters.items():
+                    if row[field] is not None:
+                        row[field] = convert(row[field])
+            except ValueError as exc:
+                error = f'invalid {field}: {exc}'
+        if error is None:
+            # The keys are collected into a set and bound into IN (...) below, so only ids get that far
+            for column in foreign_keys:
+                if row[column] is not None and (isinstance(row[column], bool) or not isinstance(row[column], int)):
+                    error = f'invalid {column}: must be an integer id'
+                    break
+        if error is not None:
+            errors.append({'index': index, 'error': error})
+            continue
+        rows.append((index, row))
+
+    # Validate every foreign key with one IN query per referenced table
+    for column, target in foreign_keys.items():
+        wanted = {row[column] for _, row in rows}
+        found = existing_ids(target.__table__, wanted)
+        valid = []
+        for index, row in rows:
+            if row[column] in found:
+                valid.append((index, row))
+            else:
+                errors.append({'index': index, 'error': f'{column} {row[column]} does not exist'})
+        rows = valid
+
+    chunk_size = current_app.config.get('BULK_INSERT_CHUNK_SIZE', DEFAULT_BULK_CHUNK_SIZE)
+    table = model.__table__
+    conn = db.session.connection()
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            with conn.begin_nested():
+                chunk_ids = insert_chunk(conn, table, [row for _, row in chunk])
+            for (index, _), row_id in zip(chunk, chunk_ids):
+                ids[index] = row_id
+        except SQLAlchemyError:
+            # Isolate the failing rows instead of rejecting the whole chunk
+            for index, row in chunk:
+                try:
+                    with conn.begin_nested():
+                        ids[index] = conn.execute(table.insert(), row).inserted_primary_key[0]
+                except SQLAlchemyError as exc:
+                    errors.append({'index': index, 'error': str(exc.orig if hasattr(exc, 'orig') else exc)})
+    db.session.commit()
+
+    errors.sort(key=lambda error: error['index'])
+    status = 201 if any(row_id is not None for row_id in ids) or not items else 400
+    return jsonify({'ids': ids, 'errors': errors}), status
+
+
+def cascading_children(table):
+    """(child table, foreign key column, referenced column) of the rows the database deletes along with rows of table."""
+    return [(child, foreign_key.parent, foreign_key.column)
+            for child in db.metadata.sorted_tables
+            for foreign_key in child.foreign_keys
+            if foreign_key.column.table is table and foreign_key.ondelete == 'CASCADE']
+
+
+def delete_where(table, condition, batch_size, deleted):
+    """
+    Delete the rows of table matching condition, batch_size rows per statement and commit.
+
+    Rows that ON DELETE CASCADE would remove with them are deleted first, in
+    batches of their own, so no statement or transaction ever touches more than
+    batch_size rows and the write lock is released between batches.
+    """
+    for child, column, referenced in cascading_children(table):
+        delete_where(child, column.in_(select(referenced).where(condition)), batch_size, deleted)
+    key = list(table.primary_key.columns)
+    key_expr = key[0] if len(key) == 1 else tuple_(*key)  # Composite keys, e.g. version_metric, match as row values
+    while True:
+        batch = select(*key).where(condition).limit(batch_size)
+        count = db.session.execute(table.delete().where(key_expr.in_(batch))).rowcount
+        db.session.commit()
+        deleted[table.name] = deleted.get(table.name, 0) + count
+        if count < batch_size:
+            return
+
+
+def delete_rows(model, conditions):
+    """
+    Delete every row of model matching all conditions, and the rows referencing them, as set-based SQL.
+
+    Nothing is loaded into the session however many rows match; see delete_where.
+
+    Returns:
+        The number of rows deleted per table name.
+    """
+    batch_size = current_app.config.get('BULK_DELETE_BATCH_SIZE', DEFAULT_DELETE_BATCH_SIZE)
+    deleted = {}
+    delete_where(model.__table__, and_(*conditions), batch_size, deleted)
+    return deleted
+
+
+def bulk_delete(model, conditions):
+    """
+    Delete the rows of model selected by the request's filters.
+
+    Args:
+        model: Model class to delete from.
+        conditions: Filter expressions built from the query string; at least one
+            is required so that a bare DELETE cannot empty the table.
+
+    Returns:
+        200 with `deleted`, the number of rows removed per table (referencing rows
+        included), or 400 without filters.
+    """
+    if not conditions:
+        return jsonify({'error': 'at least one filter is required'}), 400
+    return jsonify({'deleted': delete_rows(model, conditions)}), 200
+
+
+def read_changes(fields, required=(), converters=None):
+    """
+    Read the request's JSON object as the column values to write.
+
+    A PATCH may set any subset of fields; a PUT replaces the row and must give
+    every one of them. Fields in required cannot be cleared (null or empty).
+
+    Args:
+        fields: Column names the client may set.
+        required: Subset of fields that are NOT NULL.
+        converters: Mapping of field name to a callable turning the submitted
+            value into the stored one, as for bulk_create.
+
+    Returns:
+        (values, error): the column values, or None and a message for a 400.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None, 'expected a JSON object'
+    unknown = sorted(set(data) - set(fields))
+    if unknown:
+        return None, f"unknown field(s): {', '.join(unknown)}"
+    if request.method != 'PATCH':
+        missing = [field for field in fields if field not in data]
+        if missing:
+            return None, f"missing field(s): {', '.join(missing)}"
+    if not data:
+        return None, 'no fields to update'
+    cleared = [field for field in required if field in data and data[field] in (None, '')]
+    if cleared:
+        return None, f"required field(s) cannot be empty: {', '.join(cleared)}"
+    values = dict(data)
+    for field, convert in (converters or {}).items():
+        if values.get(field) is not None:
+            try:
+                values[field] = convert(values[field])
+            except ValueError as exc:
+                return None, f'invalid {field}: {exc}'
+    return values, None
+
+
+def update_rows(model, conditions, values):
+    """
+    Set values on every row of model matching all conditions with a single UPDATE and commit.
+
+    The rows are never loaded: a missing row shows up as a count of 0, and a
+    foreign key that does not exist is rejected by the database (IntegrityError).
+
+    Returns:
+        The number of rows updated.
+    """
+    table = model.__table__
+    count = db.session.execute(table.update().where(and_(*conditions)).values(values)).rowcount
+    db.session.commit()
+    return count
+
+
+def bulk_update(model, conditions, fields, required=(), converters=None):
+    """
+    Apply the request's PATCH body to every row of model selected by the query string filters.
+
+    Args:
+        model: Model class to update.
+        conditions: Filter expressions built from the query string; at least one
+            is required so that a bare PATCH cannot rewrite the whole table.
+        fields, required, converters: As for read_changes.
+
+    Returns:
+        200 with `updated`, the number of rows changed, or 400 without filters or
+        with an invalid body.
+    """
+    if not conditions:
+        return jsonify({'error': 'at least one filter is required'}), 400
+    values, error = read_changes(fields, required, converters)
+    if error:
+        return jsonify({'error': error}), 400
+    return jsonify({'updated': update_rows(model, conditions, values)}), 200
@@ -0,0 +1,188 @@
+# cache.py
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, make_response, request
+from sqlalchemy import bindparam, text
+
+from compression import matching_etag
+from extensions import db
+from triggers import register_triggers, upsert_add
+
+GENERATIONS = ('table_generation', 'table_name', 'generation')
+TRACKED_TABLES = ('model', 'dataset', 'version', 'server', 'model_deployment')
+
+DEFAULT_CACHE_BACKEND = 'memory'  # 'memory', 'sqlite' or 'none'
+DEFAULT_CACHE_TTL = 300           # Seconds; generations already invalidate on writes, the TTL only bounds staleness of the backend
+DEFAULT_CACHE_SIZE = 256          # Entries kept by the in-process LRU
+DEFAULT_CACHE_PATH = 'report_cache.db'
+
+
+# Every committed write to a tracked table bumps its generation, whichever worker or code path made it
+GENERATION_TRIGGERS = {
+    f'trg_{table}_{operation.lower()}_generation': (table, operation, [
+        upsert_add(GENERATIONS, f"SELECT '{table}', 1 WHERE true"),
+    ])
+    for table in TRACKED_TABLES
+    for operation in ('INSERT', 'UPDATE', 'DELETE')
+}
+register_triggers(GENERATION_TRIGGERS, requires=('table_generation',))
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class SQLiteCache:
+    """
+    Cache stored in a local SQLite file, shared by every worker process on the host.
+
+    Each thread keeps its own connection; the file runs in WAL mode so readers
+    do not block the worker that is filling an entry.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.local = threading.local()
+
+    @property
+    def conn(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')  # Losing a cache entry on power loss is harmless
+            conn.execute('CREATE TABLE IF NOT EXISTS report_cache (key TEXT PRIMARY KEY, status INTEGER, mimetype TEXT, body BLOB, expires_at REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_report_cache_expires_at ON report_cache (expires_at)')
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self.conn.execute('SELECT status, mimetype, body FROM report_cache WHERE key = ? AND expires_at >= ?', (key, time.time())).fetchone()
+        return (row[0], row[1], bytes(row[2])) if row else None
+
+    def set(self, key, value):
+        status, mimetype, body = value
+        conn = self.conn
+        conn.execute('INSERT OR REPLACE INTO report_cache VALUES (?, ?, ?, ?, ?)', (key, status, mimetype, body, time.time() + self.ttl))
+        # Keep the file bounded: drop expired rows, then the entries closest to expiry
+        conn.execute('DELETE FROM report_cache WHERE expires_at < ?', (time.time(),))
+        conn.execute('DELETE FROM report_cache WHERE key IN (SELECT key FROM report_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+
+def get_cache():
+    """Return the report cache configured for the current app, creating it on first use."""
+    if 'report_cache' not in current_app.extensions:
+        config = current_app.config
+        backend = config.get('REPORT_CACHE_BACKEND', DEFAULT_CACHE_BACKEND)
+        ttl = config.get('REPORT_CACHE_TTL', DEFAULT_CACHE_TTL)
+        size = config.get('REPORT_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+        if backend == 'memory':
+            cache = MemoryCache(size, ttl)
+        elif backend == 'sqlite':
+            cache = SQLiteCache(config.get('REPORT_CACHE_PATH', DEFAULT_CACHE_PATH), size, ttl)
+        elif backend == 'none':
+            cache = None
+        else:
+            raise ValueError(f"unknown REPORT_CACHE_BACKEND '{backend}'")
+        current_app.extensions['report_cache'] = cache
+    return current_app.extensions['report_cache']
+
+
+GENERATIONS_QUERY = text('SELECT table_name, generation FROM table_generation WHERE table_name IN :tables').bindparams(
+    bindparam('tables', expanding=True))
+
+
+def generations_of(rows, tables):
+    """Order the (table_name, generation) rows of GENERATIONS_QUERY by tables; unseen tables are at 0."""
+    generations = dict(rows)
+    return [generations.get(table, 0) for table in tables]
+
+
+def table_generations(tables):
+    """Read the current generation of each table with a single primary-key lookup."""
+    rows = db.session.execute(GENERATIONS_QUERY, {'tables': list(tables)})
+    return generations_of(rows.fetchall(), tables)
+
+
+def report_etag(path, params, generations):
+    """ETag, and cache key, of a report: its path, sorted (name, value) query parameters and table generations."""
+    return hashlib.sha1(repr((path, params, generations)).encode()).hexdigest()
+
+
+def bump_generations(conn):
+    """Move every tracked table to a new generation, for writes made while the triggers were dropped."""
+    epoch = int(time.time())  # Also stays ahead of generations seen before the tables were recreated
+    for table in TRACKED_TABLES:
+        conn.execute(text(upsert_add(GENERATIONS, "SELECT :table, :epoch WHERE true")), {'table': table, 'epoch': epoch})
+
+
+def cached_report(*tables):
+    """
+    Cache a GET report keyed by path, normalised query string and the generations of tables.
+
+    The ETag is derived from that key, so a client revalidating with If-None-Match
+    gets a 304 without the report query running. Any write to one of the tables
+    moves its generation and therefore every key built from it.
+
+    Args:
+        tables: Source tables the report reads.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            params = sorted(request.args.items(multi=True))
+            etag = report_etag(request.path, params, table_generations(tables))
+
+            matched = matching_etag(request.if_none_match, etag)
+            if matched:
+                response = Response(status=304)
+                response.set_etag(matched)  # The tag the client holds, plain or compressed
+            else:
+                cache = get_cache()
+                cached = cache.get(etag) if cache is not None else None
+                if cached is not None:
+                    status, mimetype, body = cached
+                    response = Response(body, status=status, mimetype=mimetype)
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if cache is not None and response.status_code == 200:
+                        cache.set(etag, (response.status_code, response.mimetype, response.get_data()))
+                if response.status_code != 200:
+                    return response  # Errors are not tagged, so a revalidation cannot confirm one with a 304
+                response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'  # Always revalidate; a matching ETag costs no query
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,165 @@
+# changes.py
+import json
+import time
+
+import click
+from flask import current_app, jsonify, request
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from extensions import db
+from fastjson import json_response
+from models import Dataset, Model, ModelDeployment, Server, Version
+from routing import reads_primary
+from timestamps import to_iso
+from triggers import register_triggers
+
+DEFAULT_CHANGES_LIMIT = 1000
+MAX_CHANGES_LIMIT = 10000
+MAX_CHANGES_WAIT = 30                 # Seconds; stays below the gunicorn worker timeout
+DEFAULT_CHANGES_POLL_INTERVAL = 0.25  # Seconds between checks for new changes while a request waits
+
+# Index keys rather than API fields; clients never see them
+INTERNAL_COLUMNS = {'ip_number'}
+# Table -> the columns each of its changes carries, the fields its list endpoint returns
+FEED_TABLES = {
+    model.__tablename__: [column.name for column in model.__table__.columns if column.name not in INTERNAL_COLUMNS]
+    for model in (Model, Dataset, Version, Server, ModelDeployment)
+}
+# Stored as epoch seconds, returned as ISO-8601 like the endpoints do
+TIME_COLUMNS = {'model_deployment': ('deployment_time',)}
+
+CHANGES_AFTER = text("SELECT seq, table_name, row_id, operation, data FROM change_log "
+                     "WHERE seq > :since ORDER BY seq LIMIT :limit")
+# Both are single index lookups; a combined MIN/MAX would scan the table on SQLite
+CHANGE_BOUNDS = text("SELECT (SELECT MIN(seq) FROM change_log), (SELECT MAX(seq) FROM change_log)")
+PRUNE_CHANGES = text("DELETE FROM change_log WHERE changed_at < :cutoff "
+                     "AND seq < (SELECT MAX(seq) FROM change_log)")  # The newest change marks where the feed is
+
+
+class ChangeFeedError(ValueError):
+    """A /changes parameter is invalid; the message is returned to the client with status 400."""
+
+
+def change_row(dialect, table, operation, row):
+    """Statement appending the change of one row to change_log, as a trigger runs it."""
+    if operation == 'delete':
+        data = 'NULL'
+    elif dialect == 'sqlite':
+        data = f"json_object({', '.join(f'{column!r}, {row}.{column}' for column in FEED_TABLES[table])})"
+    else:
+        data = f"json_build_object({', '.join(f'{column!r}, {row}.{column}' for column in FEED_TABLES[table])})::text"
+    now = "CAST(strftime('%s', 'now') AS INTEGER)" if dialect == 'sqlite' else "extract(epoch FROM now())::bigint"
+    return (f"INSERT INTO change_log (table_name, row_id, operation, data, changed_at) "
+            f"VALUES ('{table}', {row}.id, '{operation}', {data}, {now})")
+
+
+# Every write to an API table, whichever code path makes it (bulk statements and ON DELETE CASCADE
+# included), appends one change. SQLite runs one writer at a time, so changes commit in seq order.
+# PostgreSQL hands out sequence values before commit, so each transaction writing to the feed takes a
+# transaction-level lock; otherwise a reader could see seq 11 commit while 10 is still pending and skip
+# 10 for good. It serializes writes to these tables from their first change to commit.
+for dialect in ('sqlite', 'postgresql'):
+    lock = ["PERFORM pg_advisory_xact_lock(hashtext('change_log'))"] if dialect == 'postgresql' else []
+    register_triggers({
+        f'trg_{table}_{operation}_changes_{dialect}': (table, operation.upper(), lock + [
+            change_row(dialect, table, operation, 'OLD' if operation == 'delete' else 'NEW'),
+        ])
+        for table in FEED_TABLES
+        for operation in ('insert', 'update', 'delete')
+    }, dialects=(dialect,), requires=('change_log',))
+
+
+def feed_args(args):
+    """
+    Read the since, wait and limit parameters of a /changes request.
+
+    Returns:
+        (since, wait, limit); since is None when the client asks where the feed is.
+
+    Raises:
+        ChangeFeedError: If a parameter is malformed.
+    """
+    try:
+        since = int(args['since']) if args.get('since') not in (None, '') else None
+        wait = float(args.get('wait') or 0)
+        limit = int(args.get('limit') or DEFAULT_CHANGES_LIMIT)
+    except ValueError:
+        raise ChangeFeedError('since and limit must be integers and wait a number of seconds') from None
+    if since is not None and since < 0:
+        raise ChangeFeedError('since must not be negative')
+    if not 0 <= wait <= MAX_CHANGES_WAIT:
+        raise ChangeFeedError(f'wait must be between 0 and {MAX_CHANGES_WAIT} seconds')
+    return since, wait, min(max(limit, 1), MAX_CHANGES_LIMIT)
+
+
+def cursor_error(since, bounds):
+    """Why changes after since can no longer be read from the log (and the client must re-fetch), or None."""
+    first, last = bounds
+    if last is None:
+        return None
+    if since > last:
+        return 'since is ahead of the change log, which has been reset; re-fetch the tables'
+    if since < first - 1:
+        return 'changes after since have been pruned; re-fetch the tables'
+    return None
+
+
+def serialize_change(row):
+    data = json.loads(row.data) if row.data is not None else None
+    if data is not None:
+        for name in TIME_COLUMNS.get(row.table_name, ()):
+            if data.get(name) is not None:
+                data[name] = to_iso(data[name])
+    return {'seq': row.seq, 'table': row.table_name, 'id': row.row_id, 'op': row.operation, 'data': data}
+
+
+def feed_page(rows, since):
+    # next is the since of the client's following request
+    return {'changes': [serialize_change(row) for row in rows], 'next': rows[-1].seq if rows else since}
+
+
+@reads_primary
+def changes():
+    """
+    Changes to the API tables after seq `since`, oldest first: GET /changes?since=&wait=&limit=.
+
+    Each change has its `seq`, `table`, row `id`, `op` (insert, update or
+    delete) and `data`, the row as its list endpoint returns it (null for
+    deletes); `next` is the since of the following request. When nothing is
+    newer, the request waits up to `wait` seconds for a change before
+    returning an empty page. Without since, the page is empty and `next` is
+    the latest seq, the point to resume from after fetching the tables. A since
+    the log no longer covers (pruned, or from before a reseed) returns 410.
+    """
+    try:
+        since, wait, limit = feed_args(request.args)
+    except ChangeFeedError as error:
+        return jsonify({'error': str(error)}), 400
+    bounds = tuple(db.session.execute(CHANGE_BOUNDS).one())
+    if since is None:
+        return json_response({'changes': [], 'next': bounds[1] or 0})
+    error = cursor_error(since, bounds)
+    if error:
+        return jsonify({'error': error}), 410
+
+    interval = current_app.config.get('CHANGES_POLL_INTERVAL', DEFAULT_CHANGES_POLL_INTERVAL)
+    deadline = time.monotonic() + wait
+    rows = db.session.execute(CHANGES_AFTER, {'since': since, 'limit': limit}).fetchall()
+    while not rows and time.monotonic() < deadline:
+        # End the read transaction, so the next poll sees new commits, and return the connection meanwhile
+        db.session.commit()
+        time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+        rows = db.session.execute(CHANGES_AFTER, {'since': since, 'limit': limit}).fetchall()
+    return json_response(feed_page(rows, since))
+
+
+@click.command('prune-changes')
+@click.option('--days', default=7, show_default=True, help='Keep the changes of the last DAYS days.')
+@with_appcontext
+def prune_changes_command(days):
+    """Delete old entries of the change log; clients further behind must re-fetch the tables."""
+    cutoff = int(time.time()) - days * 86400
+    deleted = db.session.execute(PRUNE_CHANGES, {'cutoff': cutoff}).rowcount
+    db.session.commit()
+    click.echo(f"Pruned {deleted:,} changes older than {days} days.")
@@ -0,0 +1,136 @@
+# compression.py
+import importlib.util
+import zlib
+
+from flask import request
+from werkzeug.http import parse_accept_header, quote_etag, unquote_etag
+
+DEFAULT_COMPRESS_MIN_SIZE = 1024  # Smaller bodies are sent as is, override with COMPRESS_MIN_SIZE
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html'}
+
+
+def gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 writes the gzip container
+    return compressor.compress, compressor.flush
+
+
+def brotli_compressor(level):
+    import brotli  # Optional dependency
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.finish
+
+
+def zstd_compressor(level):
+    import zstandard  # Optional dependency
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return compressor.compress, compressor.flush
+
+
+# Content-Encoding -> (compressor factory, module it needs, default level), best first when the client
+# accepts several equally. The levels favour speed: these bodies are compressed on every request.
+ENCODINGS = {
+    'zstd': (zstd_compressor, 'zstandard', 3),
+    'br': (brotli_compressor, 'brotli', 4),
+    'gzip': (gzip_compressor, None, 6),
+}
+
+
+def encoded_etag(etag, encoding):
+    """ETag of the representation of etag compressed with encoding; each encoding gets its own strong tag."""
+    return f'{etag}-{encoding}'
+
+
+def encode_etag_header(value, encoding):
+    """Rewrite an ETag header value for the compressed body, keeping it weak if it was."""
+    etag, weak = unquote_etag(value)
+    return quote_etag(encoded_etag(etag, encoding), weak)
+
+
+def matching_etag(etags, etag):
+    """
+    The tag of an If-None-Match header that matches etag, or None.
+
+    The client may hold the plain tag or the tag of any compressed form, since
+    which one it got depended on its Accept-Encoding; a 304 answers with it.
+    """
+    for candidate in [etag] + [encoded_etag(etag, encoding) for encoding in ENCODINGS]:
+        if etags.contains_weak(candidate):
+            return candidate
+    return None
+
+
+class Compression:
+    """
+    Negotiated response compression settings of an app.
+
+    Encodings whose module is not installed are left out, so gzip is always
+    available and brotli and zstd are used once their packages are.
+    """
+
+    def __init__(self, encodings=None, levels=None, min_size=DEFAULT_COMPRESS_MIN_SIZE):
+        encodings = list(ENCODINGS) if encodings is None else encodings
+        self.encodings = [name for name in encodings
+                          if ENCODINGS[name][1] is None or importlib.util.find_spec(ENCODINGS[name][1])]
+        self.levels = {name: (levels or {}).get(name, ENCODINGS[name][2]) for name in self.encodings}
+        self.min_size = min_size
+
+    def negotiate(self, accept_encoding):
+        """Pick the encoding for an Accept-Encoding header value, or None to send the body as is."""
+        return parse_accept_header(accept_encoding).best_match(self.encodings)
+
+    def compressor(self, encoding):
+        return ENCODINGS[encoding][0](self.levels[encoding])
+
+    def compress(self, data, encoding):
+        compress, flush = self.compressor(encoding)
+        return compress(data) + flush()
+
+    def compress_stream(self, chunks, encoding):
+        """Compress an iterable of body chunks, yielding output whenever the compressor emits some."""
+        compress, flush = self.compressor(encoding)
+        for chunk in chunks:
+            data = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield flush()
+
+    def compressible(self, mimetype, status):
+        return mimetype in COMPRESSIBLE_MIMETYPES and 200 <= status and status not in (204, 304)
+
+
+def init_compression(app):
+    """
+    Compress app's text and JSON responses with the best encoding the client accepts.
+
+    zstd, brotli (br) and gzip are offered in that order; COMPRESS_ENCODINGS
+    narrows or reorders them and COMPRESS_LEVELS overrides their levels. Bodies
+    under COMPRESS_MIN_SIZE bytes are not worth the CPU and are sent as is;
+    streamed bodies (NDJSON, exports) are compressed chunk by chunk as they are
+    written. A compressed response gets `Vary: Accept-Encoding` and its ETag the
+    encoding as a suffix, so caches never take one encoding's bytes for another's.
+    """
+    compression = Compression(app.config.get('COMPRESS_ENCODINGS'), app.config.get('COMPRESS_LEVELS'),
+                              app.config.get('COMPRESS_MIN_SIZE', DEFAULT_COMPRESS_MIN_SIZE))
+    app.extensions['compression'] = compression  # Also used by the report routes of asgi.py
+
+    @app.after_request
+    def compress_response(response):
+        if (request.method == 'HEAD' or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or not compression.compressible(response.mimetype, response.status_code)):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = compression.negotiate(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            response.response = compression.compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < compression.min_size:
+                return response
+            response.set_data(compression.compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        if 'ETag' in response.headers:
+            response.headers['ETag'] = encode_etag_header(response.headers['ETag'], encoding)
+        return response
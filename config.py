@@ -0,0 +1,170 @@
+# config.py
+import os
+import sqlite3
+import threading
+import time
+
+import click
+from flask import has_request_context
+from flask.cli import with_appcontext
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+
+from extensions import db
+from metrics import InstrumentedQueuePool
+from routing import reads_only
+
+DEFAULT_DATABASE_URL = 'sqlite:///database1.db'
+
+# Applied to every new SQLite connection; filled from the app config by configure_database
+SQLITE_PRAGMAS = {}
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def database_url():
+    """Read the database URL from DATABASE_URL, accepting the legacy postgres:// scheme."""
+    url = os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL)
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def configure_database(app):
+    """
+    Configure the SQLAlchemy engine for app from the environment.
+
+    The URL comes from DATABASE_URL (SQLite by default, PostgreSQL works unchanged).
+    Pool sizing is read from DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT and
+    DB_POOL_RECYCLE. SQLite connections are switched to WAL with
+    synchronous=NORMAL so readers no longer wait for writers, enforce foreign
+    keys (and with them ON DELETE CASCADE), and get their
+    page cache, mmap window and busy timeout from SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE and SQLITE_BUSY_TIMEOUT. Statistics are refreshed every
+    DB_OPTIMIZE_INTERVAL seconds (0 disables it).
+    """
+    config = app.config
+    config.setdefault('SQLALCHEMY_DATABASE_URI', database_url())
+    config.setdefault('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+    config.setdefault('DB_OPTIMIZE_INTERVAL', env_int('DB_OPTIMIZE_INTERVAL', 3600))
+    config.setdefault('SQLITE_PRAGMAS', {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        'cache_size': env_int('SQLITE_CACHE_SIZE', -64 * 1024),  # Negative values are KiB, i.e. 64 MiB
+        'busy_timeout': env_int('SQLITE_BUSY_TIMEOUT', 5000),    # Milliseconds to wait for a lock before failing
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',  # SQLite only enforces foreign keys, and ON DELETE CASCADE, when enabled per connection
+    })
+
+    options = {
+        'pool_size': env_int('DB_POOL_SIZE', 5),
+        'max_overflow': env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+        'poolclass': InstrumentedQueuePool,  # QueuePool that also records checkout wait times
+    }
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            options = {}  # Flask-SQLAlchemy pins in-memory databases to a single shared connection
+        else:
+            # Keep connections (and their page cache) instead of reopening the file per checkout
+            options['connect_args'] = {'check_same_thread': False}
+        SQLITE_PRAGMAS.update(config['SQLITE_PRAGMAS'])
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    if config['DB_OPTIMIZE_INTERVAL'] > 0:
+        start_optimizer(app)
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    # Let SQLAlchemy own transaction boundaries (see begin_sqlite_transaction) so SAVEPOINTs nest properly
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {pragma}={value}')
+    cursor.close()
+
+
+@event.listens_for(Engine, 'begin')
+def begin_sqlite_transaction(conn):
+    if conn.dialect.name != 'sqlite':
+        return
+    if conn.get_execution_options().get('isolation_level') == 'AUTOCOMMIT':
+        return  # e.g. alembic's autocommit_block, for pragmas that are ignored inside a transaction
+    if has_request_context() and not reads_only():
+        # A deferred transaction that reads before writing cannot upgrade its lock once another
+        # writer has committed, and fails at once instead of waiting out busy_timeout
+        conn.exec_driver_sql('BEGIN IMMEDIATE')
+    else:
+        conn.exec_driver_sql('BEGIN')
+
+
+def dispose_engines(app):
+    """
+    Close the pooled connections of app's primary and replica engines.
+
+    Pooled connections must not cross a fork: two processes sharing one socket
+    or SQLite file handle corrupt each other's sessions. The pools refill on
+    the next checkout.
+    """
+    with app.app_context():
+        db.engine.dispose()
+    for replica in app.extensions.get('replicas', ()):
+        replica.engine.dispose()
+
+
+def optimize_database(conn):
+    """Refresh planner statistics: PRAGMA optimize on SQLite, ANALYZE elsewhere."""
+    if conn.dialect.name == 'sqlite':
+        conn.execute(text('PRAGMA optimize'))
+    else:
+        conn.execute(text('ANALYZE'))
+
+
+def start_optimizer(app):
+    """
+    Refresh statistics every DB_OPTIMIZE_INTERVAL seconds from a daemon thread.
+
+    The thread is started by the first request handled in each process, so it
+    also runs in workers forked from a preloaded app.
+    """
+    state = {'pid': None}
+    lock = threading.Lock()
+
+    def run():
+        while True:
+            time.sleep(app.config['DB_OPTIMIZE_INTERVAL'])
+            try:
+                with app.app_context(), db.engine.connect() as conn:
+                    optimize_database(conn)
+            except Exception:
+                app.logger.exception('Periodic database optimize failed')
+
+    @app.before_request
+    def ensure_optimizer():
+        if state['pid'] == os.getpid():
+            return
+        with lock:
+            if state['pid'] != os.getpid():
+                state['pid'] = os.getpid()
+                threading.Thread(target=run, name='db-optimize', daemon=True).start()
+
+
+@click.command('optimize-db')
+@with_appcontext
+def optimize_db_command():
+    """Refresh the query planner statistics now."""
+    with db.engine.connect() as conn:
+        optimize_database(conn)
+    click.echo("Database statistics refreshed.")
@@ -0,0 +1,61 @@
+# expand.py
+from flask import abort, request
+from sqlalchemy.orm import joinedload
+
+
+def expanded_paths(paths):
+    """Add the parents of every dotted path ("version.model" needs "version"), ordered parents first."""
+    full = set()
+    for path in paths:
+        parts = path.split('.')
+        full.update('.'.join(parts[:depth]) for depth in range(1, len(parts) + 1))
+    return sorted(full, key=lambda path: (path.count('.'), path))
+
+
+def expand(query, model, serialize, expansions):
+    """
+    Apply the `expand` query parameter to a list query and its serializer.
+
+    Each requested relationship (dotted paths walk through several, e.g.
+    `version.model`) is eager-loaded with a join in the same statement instead
+    of a lazy load per row, and nested under its name in every serialized row.
+
+    Args:
+        query: select() of model's entities.
+        model: Model class the query selects.
+        serialize: Serializer for one row of model.
+        expansions: Mapping of relationship path to the serializer of the related row.
+
+    Returns:
+        The query with eager-load options and a serializer that nests the expanded rows.
+    """
+    requested = [path.strip() for path in request.args.get('expand', '').split(',') if path.strip()]
+    unknown = [path for path in requested if path not in expansions]
+    if unknown:
+        abort(400, description=f"cannot expand {', '.join(unknown)}; expected any of {', '.join(expansions)}")
+    if not requested:
+        return query, serialize
+
+    for path in requested:
+        loader, target = None, model
+        for name in path.split('.'):
+            attribute = getattr(target, name)
+            loader = joinedload(attribute) if loader is None else loader.joinedload(attribute)
+            target = attribute.property.mapper.class_
+        query = query.options(loader)
+
+    paths = expanded_paths(requested)
+
+    def serialize_expanded(row):
+        data = serialize(row)
+        for path in paths:
+            *parents, name = path.split('.')
+            parent_row, parent_data = row, data
+            for parent in parents:
+                parent_row, parent_data = getattr(parent_row, parent), parent_data[parent]
+            if parent_data is None:
+                continue  # The parent reference is dangling, so there is nothing to nest under it
+            related = getattr(parent_row, name)
+            parent_data[name] = expansions[path](related) if related is not None else None
+        return data
+    return query, serialize_expanded
@@ -0,0 +1,190 @@
+# export.py
+import csv
+import io
+import sys
+
+import click
+from flask import Response, current_app, jsonify, request, stream_with_context
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from extensions import db
+from timestamps import time_arg, to_epoch, to_iso
+
+DEFAULT_EXPORT_CHUNK_SIZE = 50000  # Rows per CSV chunk / Arrow record batch / Parquet row group
+
+# Output column, SQL expression and Arrow type name of every exported fact
+EXPORT_COLUMNS = [
+    ('deployment_id', 'md.id', 'int64'),
+    ('deployment_time', 'md.deployment_time', 'timestamp'),
+    ('server_id', 'md.server_id', 'int64'),
+    ('server_name', 's.name', 'string'),
+    ('server_ip_address', 's.ip_address', 'string'),
+    ('version_id', 'md.version_id', 'int64'),
+    ('version_number', 'v.version_number', 'string'),
+    ('model_id', 'v.model_id', 'int64'),
+    ('model_name', 'm.name', 'string'),
+    ('model_type', 'm.type', 'string'),
+    ('dataset_id', 'v.dataset_id', 'int64'),
+    ('dataset_name', 'd.name', 'string'),
+    ('dataset_data_type', 'd.data_type', 'string'),
+]
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def export_query(start_date=None, end_date=None, model_type=None):
+    """Build the joined deployment facts query with the filters of the deployment report."""
+    columns = ', '.join(f'{expression} AS {name}' for name, expression, _ in EXPORT_COLUMNS)
+    conditions = []
+    params = {}
+    if start_date is not None:
+        conditions.append('md.deployment_time >= :start_date')
+        params['start_date'] = start_date
+    if end_date is not None:
+        conditions.append('md.deployment_time <= :end_date')
+        params['end_date'] = end_date
+    if model_type and model_type != 'All':
+        conditions.append('m.type = :model_type')
+        params['model_type'] = model_type
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    sql = (f"SELECT {columns} FROM model_deployment md "
+           f"JOIN version v ON v.id = md.version_id JOIN model m ON m.id = v.model_id "
+           f"JOIN dataset d ON d.id = v.dataset_id JOIN server s ON s.id = md.server_id"
+           f"{where} ORDER BY md.deployment_time, md.id")
+    return text(sql), params
+
+
+def fetch_chunks(start_date, end_date, model_type, chunk_size):
+    """Yield the matching facts as lists of rows, reading them from a server-side cursor."""
+    stmt, params = export_query(start_date, end_date, model_type)
+    result = db.session.execute(stmt, params, execution_options={'stream_results': True})
+    yield from result.partitions(chunk_size)
+
+
+def csv_chunks(chunks):
+    names = [name for name, _, _ in EXPORT_COLUMNS]
+    time_index = names.index('deployment_time')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in chunks:
+        for row in rows:
+            row = list(row)
+            row[time_index] = to_iso(row[time_index])
+            writer.writerow(row)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()  # Header of an empty export
+
+
+def arrow_schema(pa):
+    types = {'int64': pa.int64(), 'string': pa.string(), 'timestamp': pa.timestamp('s', tz='UTC')}
+    return pa.schema([(name, types[kind]) for name, _, kind in EXPORT_COLUMNS])
+
+
+def record_batch(pa, schema, rows):
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.RecordBatch.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                                      schema=schema)
+
+
+def arrow_chunks(chunks, file_format):
+    """Encode chunks as an Arrow IPC stream or a Parquet file, yielding bytes as each batch is written."""
+    import pyarrow as pa  # Optional dependency, only needed for the columnar formats
+    schema = arrow_schema(pa)
+    sink = io.BytesIO()
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+
+        def write(batch):
+            writer.write_table(pa.Table.from_batches([batch]))  # One row group per chunk
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    for rows in chunks:
+        write(record_batch(pa, schema, rows))
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+def encode(chunks, file_format):
+    if file_format == 'csv':
+        return csv_chunks(chunks)
+    return arrow_chunks(chunks, file_format)
+
+
+def columnar_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def export_deployments():
+    """
+    Stream joined deployment/version/model/dataset/server facts for analysis tools.
+
+    Query parameters: `format` (csv, arrow or parquet; default csv) and the
+    `start_date`, `end_date` and `model_type` filters of /reports/deployments.
+    Rows are read from a server-side cursor and written EXPORT_CHUNK_SIZE at a
+    time, so memory use does not grow with the size of the extract.
+    """
+    file_format = request.args.get('format', default='csv')
+    if file_format not in FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+    if file_format != 'csv' and not columnar_available():
+        return jsonify({'error': f'{file_format} export requires pyarrow'}), 501
+    start_date = time_arg('start_date')
+    end_date = time_arg('end_date', end_of_day=True)
+    model_type = request.args.get('model_type')
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', DEFAULT_EXPORT_CHUNK_SIZE)
+
+    mimetype, extension = FORMATS[file_format]
+    chunks = fetch_chunks(start_date, end_date, model_type, chunk_size)
+    response = Response(stream_with_context(encode(chunks, file_format)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=deployments.{extension}'
+    return response
+
+
+@click.command('export')
+@click.option('--format', 'file_format', type=click.Choice(list(FORMATS)), default='csv', show_default=True)
+@click.option('--output', type=click.Path(dir_okay=False, allow_dash=True), default='-', show_default=True,
+              help='File to write, or - for standard output.')
+@click.option('--start-date', default=None, help='ISO-8601 date/time or epoch seconds.')
+@click.option('--end-date', default=None, help='ISO-8601 date/time or epoch seconds; a bare date includes the whole day.')
+@click.option('--model-type', default=None)
+@click.option('--chunk-size', type=int, default=DEFAULT_EXPORT_CHUNK_SIZE, show_default=True, help='Rows per chunk.')
+@with_appcontext
+def export_command(file_format, output, start_date, end_date, model_type, chunk_size):
+    """Export joined deployment facts as CSV, Arrow IPC or Parquet."""
+    if file_format != 'csv' and not columnar_available():
+        raise click.ClickException(f'{file_format} export requires pyarrow')
+    try:
+        start = to_epoch(start_date) if start_date else None
+        end = to_epoch(end_date, end_of_day=True) if end_date else None
+    except ValueError:
+        raise click.BadParameter('dates must be ISO-8601 timestamps or epoch seconds')
+    out = sys.stdout.buffer if output == '-' else open(output, 'wb')
+    try:
+        for data in encode(fetch_chunks(start, end, model_type, chunk_size), file_format):
+            out.write(data)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
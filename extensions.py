@@ -1,4 +1,15 @@
 # extensions.py
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import orm
 
-db = SQLAlchemy()
+from routing import RoutingSession
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """SQLAlchemy extension whose sessions can send reads to a replica, see routing.py."""
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy()
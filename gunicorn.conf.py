@@ -0,0 +1,55 @@
+# gunicorn.conf.py
+#
+# Loaded automatically by gunicorn started from this directory:
+#
+#     gunicorn                                                   # the Flask app, gthread workers
+#     gunicorn --worker-class uvicorn.workers.UvicornWorker asgi:app
+#
+# Settings come from the environment: GUNICORN_BIND, WEB_CONCURRENCY (worker processes),
+# GUNICORN_WORKER_CLASS (gthread, sync, ...), GUNICORN_THREADS (per gthread worker) and
+# GUNICORN_TIMEOUT. Keep DB_POOL_SIZE + DB_MAX_OVERFLOW at or above the thread count.
+import multiprocessing
+import os
+import time
+
+CONFIG_LOADED = time.perf_counter()  # The app is imported and built after this file, see when_ready
+
+wsgi_app = 'app:create_app()'
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+# Import and build the app once in the master; forked workers share its memory pages
+# and start serving without repeating the import.
+preload_app = True
+
+
+def flask_app(server):
+    # The preloaded Flask app, also when it is served through asgi.py; None without preload_app
+    if not server.cfg.preload_app:
+        return None
+    from flask import Flask
+    app = server.app.wsgi()
+    return app if isinstance(app, Flask) else getattr(getattr(app, 'state', None), 'flask_app', None)
+
+
+def when_ready(server):
+    server.log.info('Application imported and created in %.2fs', time.perf_counter() - CONFIG_LOADED)
+    app = flask_app(server)
+    if app is not None:
+        from config import dispose_engines
+        dispose_engines(app)  # Anything opened while loading must not be inherited by the workers
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+    app = flask_app(server)
+    if app is not None:
+        from config import dispose_engines
+        dispose_engines(app)  # Start every worker with empty pools of its own
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s ready %.3fs after fork', worker.pid, time.perf_counter() - worker.forked_at)
@@ -0,0 +1,240 @@
+# metrics.py
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10  # A statement run more often than this in one request is reported
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self.lock:
+            self.values[labels] += amount
+
+    def samples(self):
+        with self.lock:
+            values = list(self.values.items())
+        for labels, value in values:
+            yield f'{self.name}{format_labels(self.labelnames, labels)} {value:g}'
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket bounds and optional labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels -> [count per bucket..., count above the last bound, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self.lock:
+            values = [(labels, list(counts)) for labels, counts in self.values.items()]
+        names = self.labelnames + ('le',)
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                yield f'{self.name}_bucket{format_labels(names, labels + (le,))} {cumulative}'
+            yield f'{self.name}_sum{format_labels(self.labelnames, labels)} {counts[-1]:g}'
+            yield f'{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}'
+
+
+REQUEST_LABELS = ('method', 'endpoint', 'status')
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Time spent handling a request.', REQUEST_LABELS)
+REQUEST_QUERIES = Histogram('http_request_db_queries', 'SQL statements executed per request.', ('endpoint',), QUERY_COUNT_BUCKETS)
+REQUEST_DB_TIME = Histogram('http_request_db_seconds', 'Time spent executing SQL per request.', ('endpoint',))
+DB_ROWS = Counter('db_rows_total', 'Rows returned by queries or affected by writes.', ('endpoint',))
+N_PLUS_ONE = Counter('db_repeated_statements_total', 'Requests that ran one statement more than the N+1 threshold.', ('endpoint',))
+POOL_CHECKOUT = Histogram('db_pool_checkout_seconds', 'Time spent waiting for a pooled connection.')
+METRICS = [REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, DB_ROWS, N_PLUS_ONE, POOL_CHECKOUT]
+
+
+def render_metrics():
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'rows', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.statements = defaultdict(int)
+
+
+class RequestLocal(threading.local):
+    stats = None  # RequestStats of the request being handled by this thread, if any
+
+
+current = RequestLocal()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT.observe(time.perf_counter() - started)
+
+
+class CountingCursor:
+    """
+    DB-API cursor that adds the rows each fetch returns to a request's stats.
+
+    sqlite3 reports rowcount -1 for SELECT, so its result cursors are wrapped
+    while a request is being handled. fetchmany and fetchall, which ORM loads
+    and exports use, cost one len() per call rather than a Python call per
+    row. Rows a streamed response fetches after after_request are not counted.
+    """
+
+    __slots__ = ('cursor', 'stats')
+
+    def __init__(self, cursor, stats):
+        self.cursor = cursor
+        self.stats = stats
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is not None:
+            self.stats.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self.cursor.fetchmany(*args)
+        self.stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self.stats.rows += len(rows)
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if current.stats is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = current.stats
+    if stats is None or not conn.info.get('query_started'):
+        return
+    stats.db_time += time.perf_counter() - conn.info['query_started'].pop()
+    stats.queries += 1
+    stats.statements[statement] += 1
+    if cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+    elif cursor.description is not None:
+        context.cursor = CountingCursor(cursor, stats)  # The result about to be built fetches through it
+
+
+def init_metrics(app):
+    """
+    Record request and SQL metrics for app and serve them at /metrics.
+
+    Every request gets its latency, number of SQL statements, time spent in
+    SQL and rows read or written recorded per endpoint. A statement executed
+    more than METRICS_N_PLUS_ONE_THRESHOLD times in one request is counted
+    and logged once per endpoint as a likely N+1 query. Metrics are kept per
+    process; each worker serves its own values.
+    """
+    app.config.setdefault('METRICS_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+    reported = set()
+
+    @app.before_request
+    def start_request_metrics():
+        request.metrics_started = time.perf_counter()
+        current.stats = RequestStats()
+
+    @app.after_request
+    def record_request_metrics(response):
+        stats, current.stats = current.stats, None
+        if stats is None:
+            return response
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - request.metrics_started,
+                                (request.method, endpoint, str(response.status_code)))
+        REQUEST_QUERIES.observe(stats.queries, (endpoint,))
+        REQUEST_DB_TIME.observe(stats.db_time, (endpoint,))
+        if stats.rows:
+            DB_ROWS.inc((endpoint,), stats.rows)
+
+        threshold = app.config['METRICS_N_PLUS_ONE_THRESHOLD']
+        repeated = [(statement, count) for statement, count in stats.statements.items() if count > threshold]
+        if repeated:
+            N_PLUS_ONE.inc((endpoint,))
+            for statement, count in repeated:
+                if (endpoint, statement) not in reported:
+                    reported.add((endpoint, statement))
+                    app.logger.warning('Possible N+1 query on %s: statement ran %d times: %s',
+                                       endpoint, count, ' '.join(statement.split())[:200])
+        return response
+
+    @app.teardown_request
+    def clear_request_metrics(exc):
+        current.stats = None
+
+    def metrics():
+        return Response(render_metrics(), mimetype=PROMETHEUS_MIMETYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
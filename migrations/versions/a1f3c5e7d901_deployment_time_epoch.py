@@ -0,0 +1,58 @@
+"""Store model_deployment.deployment_time as epoch seconds instead of MMDD
+
+Revision ID: a1f3c5e7d901
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f3c5e7d901'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+MAX_LEGACY_MMDD = 1231  # Integers up to this are MMDD dates, not epoch seconds
+# MMDD values carry no year; they are placed in this one, or the year given with
+# `flask db upgrade -x legacy_year=YYYY`. Month and day are added as offsets from
+# January 1st so an out-of-range day rolls over instead of failing.
+LEGACY_YEAR = 2024
+
+BACKFILL = {
+    'sqlite': "CAST(strftime('%s', :year || '-01-01', '+' || (deployment_time / 100 - 1) || ' months', "
+              "'+' || (deployment_time % 100 - 1) || ' days') AS INTEGER)",
+    'postgresql': "EXTRACT(EPOCH FROM make_date(:year, 1, 1) + make_interval(months => deployment_time / 100 - 1, "
+                  "days => deployment_time % 100 - 1))::bigint",
+}
+
+REVERT = {
+    'sqlite': "CAST(strftime('%m%d', deployment_time, 'unixepoch') AS INTEGER)",
+    'postgresql': "to_char(to_timestamp(deployment_time) AT TIME ZONE 'UTC', 'MMDD')::integer",
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect != 'sqlite':
+        # SQLite integers are already 64-bit; rebuilding the table there would also drop its triggers
+        op.alter_column('model_deployment', 'deployment_time', type_=sa.BigInteger(),
+                        existing_type=sa.Integer(), existing_nullable=False)
+    bind.execute(
+        sa.text(f"UPDATE model_deployment SET deployment_time = {BACKFILL[dialect]} "
+                f"WHERE deployment_time BETWEEN 101 AND {MAX_LEGACY_MMDD}"),
+        {'year': int(context.get_x_argument(as_dictionary=True).get('legacy_year', LEGACY_YEAR))},
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    bind.execute(sa.text(f"UPDATE model_deployment SET deployment_time = {REVERT[dialect]} "
+                         f"WHERE deployment_time > {MAX_LEGACY_MMDD}"))
+    if dialect != 'sqlite':
+        op.alter_column('model_deployment', 'deployment_time', type_=sa.Integer(),
+                        existing_type=sa.BigInteger(), existing_nullable=False)
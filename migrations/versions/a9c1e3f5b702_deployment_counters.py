@@ -0,0 +1,149 @@
+"""Keep per-server, per-model, per-type and per-dataset counts in trigger-maintained tables
+
+Revision ID: a9c1e3f5b702
+Revises: a1f3c5e7d901
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c1e3f5b702'
+down_revision = 'a1f3c5e7d901'
+branch_labels = None
+depends_on = None
+
+# counter table -> (key column, its type, count column, what the counts must equal)
+COUNTER_TABLES = {
+    'server_deployment_count': ('server_id', sa.Integer(), 'deployment_count',
+        "SELECT md.server_id, COUNT(*) FROM model_deployment md GROUP BY md.server_id"),
+    'model_deployment_count': ('model_id', sa.Integer(), 'deployment_count',
+        "SELECT v.model_id, COUNT(*) FROM model_deployment md JOIN version v ON v.id = md.version_id GROUP BY v.model_id"),
+    'model_type_deployment_count': ('model_type', sa.String(length=50), 'deployment_count',
+        "SELECT m.type, COUNT(*) FROM model_deployment md JOIN version v ON v.id = md.version_id "
+        "JOIN model m ON m.id = v.model_id GROUP BY m.type"),
+    'dataset_version_count': ('dataset_id', sa.Integer(), 'version_count',
+        "SELECT v.dataset_id, COUNT(*) FROM version v GROUP BY v.dataset_id"),
+}
+
+ADD_SERVER_DEPLOYMENT = (
+    "INSERT INTO server_deployment_count (server_id, deployment_count) SELECT NEW.server_id, 1 WHERE true "
+    "ON CONFLICT (server_id) DO UPDATE SET deployment_count = server_deployment_count.deployment_count + excluded.deployment_count")
+ADD_MODEL_DEPLOYMENT = (
+    "INSERT INTO model_deployment_count (model_id, deployment_count) SELECT v.model_id, 1 FROM version v WHERE v.id = NEW.version_id "
+    "ON CONFLICT (model_id) DO UPDATE SET deployment_count = model_deployment_count.deployment_count + excluded.deployment_count")
+ADD_MODEL_TYPE_DEPLOYMENT = (
+    "INSERT INTO model_type_deployment_count (model_type, deployment_count) SELECT m.type, 1 FROM version v "
+    "JOIN model m ON m.id = v.model_id WHERE v.id = NEW.version_id "
+    "ON CONFLICT (model_type) DO UPDATE SET deployment_count = model_type_deployment_count.deployment_count + excluded.deployment_count")
+REMOVE_SERVER_DEPLOYMENT = (
+    "UPDATE server_deployment_count SET deployment_count = deployment_count - 1 WHERE server_id = OLD.server_id")
+REMOVE_MODEL_DEPLOYMENT = (
+    "UPDATE model_deployment_count SET deployment_count = deployment_count - 1 "
+    "WHERE model_id = (SELECT v.model_id FROM version v WHERE v.id = OLD.version_id)")
+REMOVE_MODEL_TYPE_DEPLOYMENT = (
+    "UPDATE model_type_deployment_count SET deployment_count = deployment_count - 1 "
+    "WHERE model_type = (SELECT m.type FROM version v JOIN model m ON m.id = v.model_id WHERE v.id = OLD.version_id)")
+ADD_DATASET_VERSION = (
+    "INSERT INTO dataset_version_count (dataset_id, version_count) SELECT NEW.dataset_id, 1 WHERE true "
+    "ON CONFLICT (dataset_id) DO UPDATE SET version_count = dataset_version_count.version_count + excluded.version_count")
+REMOVE_DATASET_VERSION = (
+    "UPDATE dataset_version_count SET version_count = version_count - 1 WHERE dataset_id = OLD.dataset_id")
+ADD_VERSION_TO_MODEL = (
+    "INSERT INTO model_deployment_count (model_id, deployment_count) "
+    "SELECT NEW.model_id, (SELECT COUNT(*) FROM model_deployment md WHERE md.version_id = NEW.id) WHERE true "
+    "ON CONFLICT (model_id) DO UPDATE SET deployment_count = model_deployment_count.deployment_count + excluded.deployment_count")
+ADD_VERSION_TO_MODEL_TYPE = (
+    "INSERT INTO model_type_deployment_count (model_type, deployment_count) "
+    "SELECT m.type, (SELECT COUNT(*) FROM model_deployment md WHERE md.version_id = NEW.id) FROM model m WHERE m.id = NEW.model_id "
+    "ON CONFLICT (model_type) DO UPDATE SET deployment_count = model_type_deployment_count.deployment_count + excluded.deployment_count")
+REMOVE_VERSION_FROM_MODEL = (
+    "UPDATE model_deployment_count SET deployment_count = deployment_count - "
+    "(SELECT COUNT(*) FROM model_deployment md WHERE md.version_id = OLD.id) WHERE model_id = OLD.model_id")
+REMOVE_VERSION_FROM_MODEL_TYPE = (
+    "UPDATE model_type_deployment_count SET deployment_count = deployment_count - "
+    "(SELECT COUNT(*) FROM model_deployment md WHERE md.version_id = OLD.id) "
+    "WHERE model_type = (SELECT m.type FROM model m WHERE m.id = OLD.model_id)")
+ADD_MODEL_TO_TYPE = (
+    "INSERT INTO model_type_deployment_count (model_type, deployment_count) "
+    "SELECT NEW.type, COALESCE((SELECT c.deployment_count FROM model_deployment_count c WHERE c.model_id = NEW.id), 0) WHERE true "
+    "ON CONFLICT (model_type) DO UPDATE SET deployment_count = model_type_deployment_count.deployment_count + excluded.deployment_count")
+REMOVE_MODEL_FROM_TYPE = (
+    "UPDATE model_type_deployment_count SET deployment_count = deployment_count - "
+    "COALESCE((SELECT c.deployment_count FROM model_deployment_count c WHERE c.model_id = OLD.id), 0) WHERE model_type = OLD.type")
+
+# name -> (table, event, statements), all run after the row is written
+COUNTER_TRIGGERS = {
+    'trg_model_deployment_insert_counts': ('model_deployment', 'INSERT', [
+        ADD_SERVER_DEPLOYMENT, ADD_MODEL_DEPLOYMENT, ADD_MODEL_TYPE_DEPLOYMENT,
+    ]),
+    'trg_model_deployment_delete_counts': ('model_deployment', 'DELETE', [
+        REMOVE_SERVER_DEPLOYMENT, REMOVE_MODEL_DEPLOYMENT, REMOVE_MODEL_TYPE_DEPLOYMENT,
+    ]),
+    'trg_model_deployment_update_counts': ('model_deployment', 'UPDATE OF server_id, version_id', [
+        REMOVE_SERVER_DEPLOYMENT, REMOVE_MODEL_DEPLOYMENT, REMOVE_MODEL_TYPE_DEPLOYMENT,
+        ADD_SERVER_DEPLOYMENT, ADD_MODEL_DEPLOYMENT, ADD_MODEL_TYPE_DEPLOYMENT,
+    ]),
+    'trg_version_insert_counts': ('version', 'INSERT', [
+        ADD_DATASET_VERSION, ADD_VERSION_TO_MODEL, ADD_VERSION_TO_MODEL_TYPE,
+    ]),
+    'trg_version_delete_counts': ('version', 'DELETE', [
+        REMOVE_DATASET_VERSION, REMOVE_VERSION_FROM_MODEL, REMOVE_VERSION_FROM_MODEL_TYPE,
+    ]),
+    'trg_version_update_dataset_counts': ('version', 'UPDATE OF dataset_id', [
+        REMOVE_DATASET_VERSION, ADD_DATASET_VERSION,
+    ]),
+    'trg_version_update_model_counts': ('version', 'UPDATE OF model_id', [
+        REMOVE_VERSION_FROM_MODEL, REMOVE_VERSION_FROM_MODEL_TYPE, ADD_VERSION_TO_MODEL, ADD_VERSION_TO_MODEL_TYPE,
+    ]),
+    'trg_model_insert_counts': ('model', 'INSERT', [ADD_MODEL_TO_TYPE]),
+    'trg_model_delete_counts': ('model', 'DELETE', [REMOVE_MODEL_FROM_TYPE]),
+    'trg_model_update_type_counts': ('model', 'UPDATE OF type', [REMOVE_MODEL_FROM_TYPE, ADD_MODEL_TO_TYPE]),
+}
+
+
+def trigger_ddl(dialect, name, table, event, statements):
+    body = ''.join(f'    {statement};\n' for statement in statements)
+    if dialect == 'sqlite':
+        return [f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} FOR EACH ROW BEGIN\n{body}END"]
+    return [
+        f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$\nBEGIN\n{body}    RETURN NULL;\nEND\n$$ LANGUAGE plpgsql",
+        f"DROP TRIGGER IF EXISTS {name} ON {table}",
+        f"CREATE TRIGGER {name} AFTER {event} ON {table} FOR EACH ROW EXECUTE FUNCTION {name}()",
+    ]
+
+
+def upgrade():
+    for table, (key, key_type, count, _) in COUNTER_TABLES.items():
+        op.create_table(table,
+            sa.Column(key, key_type, nullable=False),
+            sa.Column(count, sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint(key)
+        )
+        op.create_index(f'ix_{table}_{count}', table, [count], unique=False)
+    # Per-version deployment counts and joins from version read this instead of scanning model_deployment
+    op.create_index('ix_model_deployment_version_id', 'model_deployment', ['version_id'], unique=False)
+
+    bind = op.get_bind()
+    # Counts of the rows already present, then the triggers that keep them current
+    for table, (key, _, count, query) in COUNTER_TABLES.items():
+        bind.execute(sa.text(f"INSERT INTO {table} ({key}, {count}) {query}"))
+    for name, (table, event, statements) in COUNTER_TRIGGERS.items():
+        for ddl in trigger_ddl(bind.dialect.name, name, table, event, statements):
+            bind.execute(sa.text(ddl))
+
+
+def downgrade():
+    bind = op.get_bind()
+    for name, (table, _, _) in COUNTER_TRIGGERS.items():
+        if bind.dialect.name == 'postgresql':
+            bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {name} ON {table}"))
+            bind.execute(sa.text(f"DROP FUNCTION IF EXISTS {name}()"))
+        else:
+            bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {name}"))
+    op.drop_index('ix_model_deployment_version_id', table_name='model_deployment')
+    for table, (_, _, count, _) in COUNTER_TABLES.items():
+        op.drop_index(f'ix_{table}_{count}', table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,68 @@
+"""Track a generation per API table, bumped by trigger on every write, for report cache keys
+
+Revision ID: a9e4b6c8d027
+Revises: a9c1e3f5b702
+Create Date: 2026-10-18 09:45:00.000000
+
+"""
+import time
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9e4b6c8d027'
+down_revision = 'a9c1e3f5b702'
+branch_labels = None
+depends_on = None
+
+TRACKED_TABLES = ('model', 'dataset', 'version', 'server', 'model_deployment')
+OPERATIONS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def bump(table):
+    return (f"INSERT INTO table_generation (table_name, generation) SELECT '{table}', 1 WHERE true "
+            f"ON CONFLICT (table_name) DO UPDATE SET generation = table_generation.generation + excluded.generation")
+
+
+def trigger_ddl(dialect, name, table, operation):
+    if dialect == 'sqlite':
+        return [f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {operation} ON {table} FOR EACH ROW BEGIN\n"
+                f"    {bump(table)};\nEND"]
+    return [
+        f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$\nBEGIN\n    {bump(table)};\n    RETURN NULL;\nEND\n$$ LANGUAGE plpgsql",
+        f"DROP TRIGGER IF EXISTS {name} ON {table}",
+        f"CREATE TRIGGER {name} AFTER {operation} ON {table} FOR EACH ROW EXECUTE FUNCTION {name}()",
+    ]
+
+
+def generation_triggers():
+    return [(f'trg_{table}_{operation.lower()}_generation', table, operation)
+            for table in TRACKED_TABLES for operation in OPERATIONS]
+
+
+def upgrade():
+    op.create_table('table_generation',
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    bind = op.get_bind()
+    # One row per tracked table, starting at the current epoch so it is past any generation a cache may still hold
+    bind.execute(sa.text("INSERT INTO table_generation (table_name, generation) VALUES (:table, :epoch)"),
+                 [{'table': table, 'epoch': int(time.time())} for table in TRACKED_TABLES])
+    for name, table, operation in generation_triggers():
+        for ddl in trigger_ddl(bind.dialect.name, name, table, operation):
+            bind.execute(sa.text(ddl))
+
+
+def downgrade():
+    bind = op.get_bind()
+    for name, table, _ in generation_triggers():
+        if bind.dialect.name == 'postgresql':
+            bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {name} ON {table}"))
+            bind.execute(sa.text(f"DROP FUNCTION IF EXISTS {name}()"))
+        else:
+            bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {name}"))
+    op.drop_table('table_generation')
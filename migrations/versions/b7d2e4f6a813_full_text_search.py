@@ -0,0 +1,93 @@
+"""Add full-text search indexes over models and datasets
+
+Revision ID: b7d2e4f6a813
+Revises: a9e4b6c8d027
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e4f6a813'
+down_revision = 'a9e4b6c8d027'
+branch_labels = None
+depends_on = None
+
+# SQLite: external-content FTS5 tables storing only the index, filled from the rows already present
+# and kept in step by triggers. Prefix indexes on 2 and 3 characters keep short typeahead prefixes fast.
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE model_search USING fts5(name, description, type, content='model', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO model_search (model_search) VALUES ('rebuild')",
+    "CREATE TRIGGER IF NOT EXISTS trg_model_insert_search AFTER INSERT ON model FOR EACH ROW BEGIN\n"
+    "    INSERT INTO model_search (rowid, name, description, type) VALUES (new.id, new.name, new.description, new.type);\n"
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS trg_model_delete_search AFTER DELETE ON model FOR EACH ROW BEGIN\n"
+    "    INSERT INTO model_search (model_search, rowid, name, description, type) "
+    "VALUES ('delete', old.id, old.name, old.description, old.type);\n"
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS trg_model_update_search AFTER UPDATE OF name, description, type ON model FOR EACH ROW BEGIN\n"
+    "    INSERT INTO model_search (model_search, rowid, name, description, type) "
+    "VALUES ('delete', old.id, old.name, old.description, old.type);\n"
+    "    INSERT INTO model_search (rowid, name, description, type) VALUES (new.id, new.name, new.description, new.type);\n"
+    "END",
+    "CREATE VIRTUAL TABLE dataset_search USING fts5(name, description, data_type, content='dataset', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO dataset_search (dataset_search) VALUES ('rebuild')",
+    "CREATE TRIGGER IF NOT EXISTS trg_dataset_insert_search AFTER INSERT ON dataset FOR EACH ROW BEGIN\n"
+    "    INSERT INTO dataset_search (rowid, name, description, data_type) VALUES (new.id, new.name, new.description, new.data_type);\n"
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS trg_dataset_delete_search AFTER DELETE ON dataset FOR EACH ROW BEGIN\n"
+    "    INSERT INTO dataset_search (dataset_search, rowid, name, description, data_type) "
+    "VALUES ('delete', old.id, old.name, old.description, old.data_type);\n"
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS trg_dataset_update_search AFTER UPDATE OF name, description, data_type ON dataset FOR EACH ROW BEGIN\n"
+    "    INSERT INTO dataset_search (dataset_search, rowid, name, description, data_type) "
+    "VALUES ('delete', old.id, old.name, old.description, old.data_type);\n"
+    "    INSERT INTO dataset_search (rowid, name, description, data_type) VALUES (new.id, new.name, new.description, new.data_type);\n"
+    "END",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS trg_model_insert_search",
+    "DROP TRIGGER IF EXISTS trg_model_delete_search",
+    "DROP TRIGGER IF EXISTS trg_model_update_search",
+    "DROP TABLE IF EXISTS model_search",
+    "DROP TRIGGER IF EXISTS trg_dataset_insert_search",
+    "DROP TRIGGER IF EXISTS trg_dataset_delete_search",
+    "DROP TRIGGER IF EXISTS trg_dataset_update_search",
+    "DROP TABLE IF EXISTS dataset_search",
+]
+
+# PostgreSQL: a generated, weighted tsvector column per table with a GIN index; no triggers needed
+POSTGRESQL_UPGRADE = [
+    "ALTER TABLE model ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(type, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_model_search_vector ON model USING GIN (search_vector)",
+    "ALTER TABLE dataset ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(data_type, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_dataset_search_vector ON dataset USING GIN (search_vector)",
+]
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_model_search_vector",
+    "ALTER TABLE model DROP COLUMN IF EXISTS search_vector",
+    "DROP INDEX IF EXISTS ix_dataset_search_vector",
+    "ALTER TABLE dataset DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    for ddl in SQLITE_UPGRADE if bind.dialect.name == 'sqlite' else POSTGRESQL_UPGRADE:
+        bind.execute(sa.text(ddl))
+
+
+def downgrade():
+    bind = op.get_bind()
+    for ddl in SQLITE_DOWNGRADE if bind.dialect.name == 'sqlite' else POSTGRESQL_DOWNGRADE:
+        bind.execute(sa.text(ddl))
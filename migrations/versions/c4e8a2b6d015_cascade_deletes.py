@@ -0,0 +1,104 @@
+"""Delete versions and deployments with their parents (ON DELETE CASCADE)
+
+Revision ID: c4e8a2b6d015
+Revises: b7d2e4f6a813
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2b6d015'
+down_revision = 'b7d2e4f6a813'
+branch_labels = None
+depends_on = None
+
+# table -> (column, referenced table) of every foreign key that cascades
+FOREIGN_KEYS = {
+    'version': [('model_id', 'model'), ('dataset_id', 'dataset')],
+    'model_deployment': [('server_id', 'server'), ('version_id', 'version')],
+}
+
+# Names for the unnamed SQLite constraints, so batch mode can drop them
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+# Deleting a version or model now cascades to the rows they count, and once the parent row is gone the
+# cascaded rows' own triggers can no longer find their model or type. So these counter triggers move to
+# BEFORE DELETE, while the children are still there; the downgrade moves them back to AFTER.
+DELETE_COUNT_TRIGGERS = {
+    'trg_version_delete_counts': ('version', [
+        "UPDATE dataset_version_count SET version_count = version_count - 1 WHERE dataset_id = OLD.dataset_id",
+        "UPDATE model_deployment_count SET deployment_count = deployment_count - "
+        "(SELECT COUNT(*) FROM model_deployment md WHERE md.version_id = OLD.id) WHERE model_id = OLD.model_id",
+        "UPDATE model_type_deployment_count SET deployment_count = deployment_count - "
+        "(SELECT COUNT(*) FROM model_deployment md WHERE md.version_id = OLD.id) "
+        "WHERE model_type = (SELECT m.type FROM model m WHERE m.id = OLD.model_id)",
+    ]),
+    'trg_model_delete_counts': ('model', [
+        "UPDATE model_type_deployment_count SET deployment_count = deployment_count - "
+        "COALESCE((SELECT c.deployment_count FROM model_deployment_count c WHERE c.model_id = OLD.id), 0) "
+        "WHERE model_type = OLD.type",
+    ]),
+}
+
+
+def delete_trigger_ddl(dialect, name, table, timing, statements):
+    body = ''.join(f'    {statement};\n' for statement in statements)
+    if dialect == 'sqlite':
+        return [f"DROP TRIGGER IF EXISTS {name}",
+                f"CREATE TRIGGER {name} {timing} DELETE ON {table} FOR EACH ROW BEGIN\n{body}END"]
+    # A row-level BEFORE trigger must return the row, or the delete is skipped
+    returned = "RETURN OLD" if timing == 'BEFORE' else "RETURN NULL"
+    return [
+        f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$\nBEGIN\n{body}    {returned};\nEND\n$$ LANGUAGE plpgsql",
+        f"DROP TRIGGER IF EXISTS {name} ON {table}",
+        f"CREATE TRIGGER {name} {timing} DELETE ON {table} FOR EACH ROW EXECUTE FUNCTION {name}()",
+    ]
+
+
+def constraint_name(dialect, table, column, referred):
+    if dialect == 'postgresql':
+        return f'{table}_{column}_fkey'  # PostgreSQL's default name
+    return f'fk_{table}_{column}_{referred}'
+
+
+def replace_foreign_keys(ondelete, timing):
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    triggers = []
+    if dialect == 'sqlite':
+        # Batch mode copies each table and drops the original, which drops its triggers, and renaming the
+        # copy fails while a trigger on another table names the missing original. So every trigger is set
+        # aside here and recreated from its stored SQL afterwards.
+        triggers = bind.execute(sa.text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")).fetchall()
+        for name, _ in triggers:
+            bind.execute(sa.text(f"DROP TRIGGER {name}"))
+        # With foreign keys enforced, dropping version would cascade into (or be refused by) the
+        # deployments that reference it. The pragma is ignored inside a transaction, hence the autocommit block.
+        with op.get_context().autocommit_block():
+            bind.exec_driver_sql('PRAGMA foreign_keys=OFF')
+    for table, columns in FOREIGN_KEYS.items():
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+            for column, referred in columns:
+                name = constraint_name(dialect, table, column, referred)
+                batch.drop_constraint(name, type_='foreignkey')
+                batch.create_foreign_key(name, referred, [column], ['id'], ondelete=ondelete)
+    if dialect == 'sqlite':
+        with op.get_context().autocommit_block():
+            bind.exec_driver_sql('PRAGMA foreign_keys=ON')
+        for name, sql in triggers:
+            if name not in DELETE_COUNT_TRIGGERS:
+                bind.exec_driver_sql(sql)
+    for name, (table, statements) in DELETE_COUNT_TRIGGERS.items():
+        for ddl in delete_trigger_ddl(dialect, name, table, timing, statements):
+            bind.execute(sa.text(ddl))
+
+
+def upgrade():
+    replace_foreign_keys('CASCADE', 'BEFORE')
+
+
+def downgrade():
+    replace_foreign_keys(None, 'AFTER')
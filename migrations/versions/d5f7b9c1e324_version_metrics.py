@@ -0,0 +1,162 @@
+"""Store numeric performance metrics of versions in an indexed version_metric table
+
+Revision ID: d5f7b9c1e324
+Revises: c4e8a2b6d015
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import json
+import math
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f7b9c1e324'
+down_revision = 'c4e8a2b6d015'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 10000
+MAX_METRIC_NAME_LENGTH = 50
+
+# "Accuracy: 95%", "F1: 0.91, Latency ms: 12": what performance_metrics held before it became JSON
+LEGACY_METRIC = re.compile(r'\s*([^:,;\n]+?)\s*:\s*(-?\d+(?:\.\d+)?)\s*(%?)\s*(?:[,;\n]|$)')
+
+# The numeric entries of a JSON object in performance_metrics; anything else (free text, arrays) yields none.
+# SQLite evaluates json_each for every row it is given, so non-objects are turned into NULL first.
+SQLITE_METRICS = ("INSERT OR IGNORE INTO version_metric (version_id, name, value) "
+                  "SELECT NEW.id, lower(j.key), j.value FROM json_each(CASE WHEN json_valid(NEW.performance_metrics) "
+                  "THEN CASE json_type(NEW.performance_metrics) WHEN 'object' THEN NEW.performance_metrics END END) j "
+                  "WHERE j.type IN ('integer', 'real')")
+# PostgreSQL raises on text that is not JSON, or not an object; the block's handler skips such rows
+POSTGRESQL_METRICS = ("BEGIN INSERT INTO version_metric (version_id, name, value) "
+                      "SELECT NEW.id, lower(j.key), (j.value #>> '{}')::double precision "
+                      "FROM jsonb_each(NEW.performance_metrics::jsonb) j WHERE jsonb_typeof(j.value) = 'number' "
+                      "ON CONFLICT DO NOTHING; "
+                      "EXCEPTION WHEN invalid_text_representation OR invalid_parameter_value THEN NULL; END")
+INSERT_METRICS = {'sqlite': SQLITE_METRICS, 'postgresql': POSTGRESQL_METRICS}
+
+
+def metric_triggers(dialect):
+    # name -> (event, statements) of the triggers on version
+    return {
+        f'trg_version_insert_metrics_{dialect}': ('INSERT', [INSERT_METRICS[dialect]]),
+        f'trg_version_update_metrics_{dialect}': ('UPDATE OF performance_metrics', [
+            "DELETE FROM version_metric WHERE version_id = OLD.id",
+            INSERT_METRICS[dialect],
+        ]),
+    }
+
+
+def trigger_ddl(dialect, name, event, statements):
+    body = ''.join(f'    {statement};\n' for statement in statements)
+    if dialect == 'sqlite':
+        return [f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON version FOR EACH ROW BEGIN\n{body}END"]
+    return [
+        f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$\nBEGIN\n{body}    RETURN NULL;\nEND\n$$ LANGUAGE plpgsql",
+        f"DROP TRIGGER IF EXISTS {name} ON version",
+        f"CREATE TRIGGER {name} AFTER {event} ON version FOR EACH ROW EXECUTE FUNCTION {name}()",
+    ]
+
+
+def parse_legacy_metrics(value):
+    metrics = {}
+    position = 0
+    for match in LEGACY_METRIC.finditer(value):
+        if match.start() != position:
+            return None
+        name, number, percent = match.groups()
+        metrics[name] = float(number) / 100 if percent else float(number)
+        position = match.end()
+    if not metrics or value[position:].strip():
+        return None
+    return metrics
+
+
+def normalize_metrics(stored):
+    # Canonical JSON with lower-cased names for a JSON object or a legacy list (percentages become
+    # fractions); other text is returned as it is, and None for an object that cannot be stored as metrics
+    try:
+        parsed = json.loads(stored)
+    except ValueError:
+        parsed = parse_legacy_metrics(stored)
+    if not isinstance(parsed, dict):
+        return stored
+    metrics = {}
+    for name, number in parsed.items():
+        name = name.strip().lower()
+        if not name or len(name) > MAX_METRIC_NAME_LENGTH:
+            return None
+        if isinstance(number, bool) or not isinstance(number, (int, float)) or not math.isfinite(number):
+            return None
+        metrics[name] = number
+    return json.dumps(metrics, sort_keys=True)
+
+
+def metrics_of(stored):
+    # The {name: value} rows the triggers derive from a stored performance_metrics value
+    try:
+        parsed = json.loads(stored)
+    except ValueError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    return {name.lower(): float(value) for name, value in parsed.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)}
+
+
+def normalize_existing(bind):
+    # Legacy "Accuracy: 95%" text becomes the JSON the triggers read; free text is left as it is
+    rows = bind.execute(sa.text("SELECT id, performance_metrics FROM version WHERE performance_metrics IS NOT NULL")).fetchall()
+    changed = []
+    for version_id, stored in rows:
+        normalized = normalize_metrics(stored)
+        if normalized is not None and normalized != stored:
+            changed.append({'id': version_id, 'performance_metrics': normalized})
+    update = sa.text("UPDATE version SET performance_metrics = :performance_metrics WHERE id = :id")
+    for start in range(0, len(changed), CHUNK_SIZE):
+        bind.execute(update, changed[start:start + CHUNK_SIZE])
+
+
+def fill_metrics(bind):
+    rows = bind.execute(sa.text("SELECT id, performance_metrics FROM version WHERE performance_metrics IS NOT NULL")).fetchall()
+    metrics = [{'version_id': version_id, 'name': name, 'value': value}
+               for version_id, stored in rows
+               for name, value in metrics_of(stored).items()]
+    insert = sa.text("INSERT INTO version_metric (version_id, name, value) VALUES (:version_id, :name, :value)")
+    for start in range(0, len(metrics), CHUNK_SIZE):
+        bind.execute(insert, metrics[start:start + CHUNK_SIZE])
+
+
+def upgrade():
+    op.create_table('version_metric',
+        sa.Column('version_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['version_id'], ['version.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('version_id', 'name')
+    )
+    op.create_index('idx_version_metric_name_value', 'version_metric', ['name', 'value', 'version_id'], unique=False)
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    normalize_existing(bind)
+    fill_metrics(bind)
+    for name, (event, statements) in metric_triggers(dialect).items():
+        for ddl in trigger_ddl(dialect, name, event, statements):
+            bind.execute(sa.text(ddl))
+
+
+def downgrade():
+    bind = op.get_bind()
+    # The performance_metrics text keeps its JSON form
+    for name in metric_triggers(bind.dialect.name):
+        if bind.dialect.name == 'postgresql':
+            bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {name} ON version"))
+            bind.execute(sa.text(f"DROP FUNCTION IF EXISTS {name}()"))
+        else:
+            bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {name}"))
+    op.drop_index('idx_version_metric_name_value', table_name='version_metric')
+    op.drop_table('version_metric')
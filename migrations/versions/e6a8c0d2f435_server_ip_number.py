@@ -0,0 +1,72 @@
+"""Store server addresses as indexed 128-bit numbers for CIDR queries
+
+Revision ID: e6a8c0d2f435
+Revises: d5f7b9c1e324
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import ipaddress
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a8c0d2f435'
+down_revision = 'd5f7b9c1e324'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK_SIZE = 10000
+
+# IPv4 addresses are stored in the IPv4-mapped IPv6 range (::ffff:0:0/96), so one column orders both families
+IPV4_MAPPED = int(ipaddress.ip_address('::ffff:0.0.0.0'))
+
+
+def canonical_address(stored):
+    # The canonical text of an IPv4 or IPv6 address (IPv4-mapped IPv6 written as IPv4), or None if it is not one
+    try:
+        address = ipaddress.ip_address(stored.strip())
+    except (AttributeError, ValueError):
+        return None
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address
+
+
+def address_number(address):
+    # The address as 16 big-endian bytes, which compare like the 128-bit numbers they encode
+    number = int(address) + IPV4_MAPPED if address.version == 4 else int(address)
+    return number.to_bytes(16, 'big')
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        # SQLite does not enforce VARCHAR lengths, and rebuilding server in batch mode would drop its triggers
+        op.alter_column('server', 'ip_address', type_=sa.String(length=45),
+                        existing_type=sa.String(length=15), existing_nullable=False)
+    op.add_column('server', sa.Column('ip_number', sa.LargeBinary(length=16), nullable=True))
+
+    # Canonical text and its number for every address that parses; the others keep a NULL ip_number
+    rows = bind.execute(sa.text("SELECT id, ip_address FROM server")).fetchall()
+    changes = []
+    for server_id, stored in rows:
+        address = canonical_address(stored)
+        if address is not None:
+            changes.append({'id': server_id, 'ip_address': address.compressed, 'ip_number': address_number(address)})
+    update = sa.text("UPDATE server SET ip_address = :ip_address, ip_number = :ip_number WHERE id = :id").bindparams(
+        sa.bindparam('ip_number', type_=sa.LargeBinary()))
+    for start in range(0, len(changes), BACKFILL_CHUNK_SIZE):
+        bind.execute(update, changes[start:start + BACKFILL_CHUNK_SIZE])
+
+    op.create_index('ix_server_ip_number', 'server', ['ip_number'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_server_ip_number', table_name='server')
+    op.drop_column('server', 'ip_number')
+    if op.get_bind().dialect.name != 'sqlite':
+        # IPv6 addresses no longer fit and are cut to the old width
+        op.alter_column('server', 'ip_address', type_=sa.String(length=15), existing_type=sa.String(length=45),
+                        existing_nullable=False, postgresql_using='left(ip_address, 15)')
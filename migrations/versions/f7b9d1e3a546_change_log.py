@@ -0,0 +1,96 @@
+"""Record every write to the API tables in an append-only change_log
+
+Revision ID: f7b9d1e3a546
+Revises: e6a8c0d2f435
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b9d1e3a546'
+down_revision = 'e6a8c0d2f435'
+branch_labels = None
+depends_on = None
+
+# Table -> the columns each of its changes carries, as of this revision
+FEED_TABLES = {
+    'model': ['id', 'name', 'description', 'type'],
+    'dataset': ['id', 'name', 'description', 'data_type'],
+    'version': ['id', 'model_id', 'dataset_id', 'version_number', 'performance_metrics'],
+    'server': ['id', 'name', 'ip_address'],
+    'model_deployment': ['id', 'server_id', 'version_id', 'deployment_time'],
+}
+OPERATIONS = ('insert', 'update', 'delete')
+NOW = {
+    'sqlite': "CAST(strftime('%s', 'now') AS INTEGER)",
+    'postgresql': "extract(epoch FROM now())::bigint",
+}
+
+
+def change_row(dialect, table, operation):
+    # Statement appending the change of one row to change_log
+    row = 'OLD' if operation == 'delete' else 'NEW'
+    fields = ', '.join(f'{column!r}, {row}.{column}' for column in FEED_TABLES[table])
+    if operation == 'delete':
+        data = 'NULL'
+    elif dialect == 'sqlite':
+        data = f"json_object({fields})"
+    else:
+        data = f"json_build_object({fields})::text"
+    return (f"INSERT INTO change_log (table_name, row_id, operation, data, changed_at) "
+            f"VALUES ('{table}', {row}.id, '{operation}', {data}, {NOW[dialect]})")
+
+
+def trigger_ddl(dialect, name, table, operation):
+    event = f'AFTER {operation.upper()}'
+    if dialect == 'sqlite':
+        return [f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON {table} FOR EACH ROW BEGIN\n"
+                f"    {change_row(dialect, table, operation)};\nEND"]
+    # Writers to the feed take a transaction-level lock, so changes commit in seq order
+    return [
+        f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$\nBEGIN\n"
+        f"    PERFORM pg_advisory_xact_lock(hashtext('change_log'));\n"
+        f"    {change_row(dialect, table, operation)};\n"
+        f"    RETURN NULL;\nEND\n$$ LANGUAGE plpgsql",
+        f"DROP TRIGGER IF EXISTS {name} ON {table}",
+        f"CREATE TRIGGER {name} {event} ON {table} FOR EACH ROW EXECUTE FUNCTION {name}()",
+    ]
+
+
+def change_triggers(dialect):
+    return [(f'trg_{table}_{operation}_changes_{dialect}', table, operation)
+            for table in FEED_TABLES for operation in OPERATIONS]
+
+
+def upgrade():
+    op.create_table('change_log',
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('table_name', sa.String(length=50), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('operation', sa.String(length=6), nullable=False),
+        sa.Column('data', sa.Text(), nullable=True),
+        sa.Column('changed_at', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('seq'),
+        sqlite_autoincrement=True
+    )
+    # The feed starts empty; clients fetch the tables once and follow it from there
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    for name, table, operation in change_triggers(dialect):
+        for ddl in trigger_ddl(dialect, name, table, operation):
+            bind.execute(sa.text(ddl))
+
+
+def downgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    for name, table, _ in change_triggers(dialect):
+        if dialect == 'postgresql':
+            bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {name} ON {table}"))
+            bind.execute(sa.text(f"DROP FUNCTION IF EXISTS {name}()"))
+        else:
+            bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {name}"))
+    op.drop_table('change_log')
@@ -1,13 +1,14 @@
 from sqlalchemy import Index
-from app import db  # Assuming 'app' is the correct import for db, remove 'from extensions import db' if not used
+from extensions import db
 from sqlalchemy.orm import relationship
+from addresses import default_ip_number
 
 class Model(db.Model):
     __tablename__ = 'model'
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)  # Indexing model name for prefix lookups
     description = db.Column(db.Text, nullable=True)
-    versions = relationship('Version', backref='model', lazy=True)
+    versions = relationship('Version', backref='model', lazy=True, cascade='all, delete-orphan', passive_deletes=True)  # Unloaded versions are left to ON DELETE CASCADE
     type = db.Column(db.String(50), nullable=False, index=True)  # Indexing on model type for faster access on type-based queries
 
     __table_args__ = (
@@ -20,13 +21,13 @@ class Dataset(db.Model):
     name = db.Column(db.String(100), nullable=False, index=True)  # Indexing on dataset name for alphabetical sorting and quick lookup
     description = db.Column(db.Text, nullable=True)
     data_type = db.Column(db.String(50), nullable=False)
-    versions = relationship('Version', backref='dataset', lazy=True)
+    versions = relationship('Version', backref='dataset', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
 class Version(db.Model):
     __tablename__ = 'version'
     id = db.Column(db.Integer, primary_key=True)
-    model_id = db.Column(db.Integer, db.ForeignKey('model.id'), nullable=False)
-    dataset_id = db.Column(db.Integer, db.ForeignKey('dataset.id'), nullable=False)
+    model_id = db.Column(db.Integer, db.ForeignKey('model.id', ondelete='CASCADE'), nullable=False)
+    dataset_id = db.Column(db.Integer, db.ForeignKey('dataset.id', ondelete='CASCADE'), nullable=False)
     version_number = db.Column(db.String(50), nullable=False)
     performance_metrics = db.Column(db.Text, nullable=True)
 
@@ -34,20 +35,75 @@ class Version(db.Model):
         Index('idx_version_model_dataset', 'model_id', 'dataset_id'),  # Composite index for efficient joins and filtering on model and dataset
     )
 
+class VersionMetric(db.Model):
+    # One row per numeric entry of Version.performance_metrics, kept in step by the triggers in version_metrics.py
+    __tablename__ = 'version_metric'
+    version_id = db.Column(db.Integer, db.ForeignKey('version.id', ondelete='CASCADE'), primary_key=True)
+    name = db.Column(db.String(50), primary_key=True)  # Lower-cased metric name, e.g. accuracy
+    value = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        Index('idx_version_metric_name_value', 'name', 'value', 'version_id'),  # Leaderboards read one metric in value order straight from this index
+    )
+
 class Server(db.Model):
     __tablename__ = 'server'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, index=True)  # Indexing server name for quick lookups
-    ip_address = db.Column(db.String(15), nullable=False)  # IPv4 address format, consider if indexing is needed based on query patterns
-    model_versions = relationship('ModelDeployment', backref='server', lazy=True)
+    ip_address = db.Column(db.String(45), nullable=False)  # Canonical IPv4 or IPv6 text, see addresses.normalize_ip
+    # The address as a 128-bit number (16 big-endian bytes), so a CIDR block is an index range scan.
+    # NULL only for rows written before addresses were validated that do not parse.
+    ip_number = db.Column(db.LargeBinary(16), nullable=True, index=True, default=default_ip_number)
+    model_versions = relationship('ModelDeployment', backref='server', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
 class ModelDeployment(db.Model):
     __tablename__ = 'model_deployment'
     id = db.Column(db.Integer, primary_key=True)
-    server_id = db.Column(db.Integer, db.ForeignKey('server.id'), nullable=False)
-    version_id = db.Column(db.Integer, db.ForeignKey('version.id'), nullable=False)
-    deployment_time = db.Column(db.Integer, nullable=False, index=True)  # Indexing deployment time for filtering by date ranges
+    server_id = db.Column(db.Integer, db.ForeignKey('server.id', ondelete='CASCADE'), nullable=False)
+    version_id = db.Column(db.Integer, db.ForeignKey('version.id', ondelete='CASCADE'), nullable=False, index=True)  # Indexing version for per-version deployment counts and joins from version
+    deployment_time = db.Column(db.BigInteger, nullable=False, index=True)  # Seconds since the Unix epoch (UTC); indexed for time range scans and bucketing
+    version = relationship('Version', lazy=True)  # Many-to-one only: no backref, so deleting a version does not touch its deployments through the ORM
 
     __table_args__ = (
         Index('idx_deployment_server_time', 'server_id', 'deployment_time'),  # Composite index to optimize queries filtering by server and time range
     )
+
+# Counter tables kept up to date by the triggers in aggregates.py, so the top-N reports
+# read k rows in index order instead of grouping every deployment on each request
+
+class ServerDeploymentCount(db.Model):
+    __tablename__ = 'server_deployment_count'
+    server_id = db.Column(db.Integer, primary_key=True)
+    deployment_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+class ModelDeploymentCount(db.Model):
+    __tablename__ = 'model_deployment_count'
+    model_id = db.Column(db.Integer, primary_key=True)
+    deployment_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+class ModelTypeDeploymentCount(db.Model):
+    __tablename__ = 'model_type_deployment_count'
+    model_type = db.Column(db.String(50), primary_key=True)
+    deployment_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+class DatasetVersionCount(db.Model):
+    __tablename__ = 'dataset_version_count'
+    dataset_id = db.Column(db.Integer, primary_key=True)
+    version_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+
+class TableGeneration(db.Model):
+    __tablename__ = 'table_generation'
+    table_name = db.Column(db.String(50), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)  # Bumped by trigger on every write to table_name, see cache.py
+
+class ChangeLog(db.Model):
+    # Append-only feed of every write to the API tables, written by the triggers in changes.py
+    __tablename__ = 'change_log'
+    seq = db.Column(db.Integer, primary_key=True)  # Grows with every change; clients resume after the last seq they applied
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(6), nullable=False)  # insert, update or delete
+    data = db.Column(db.Text, nullable=True)  # The row's fields as JSON after the write; NULL for deletes
+    changed_at = db.Column(db.BigInteger, nullable=False)  # Seconds since the Unix epoch (UTC), for pruning
+
+    __table_args__ = {'sqlite_autoincrement': True}  # Never hand out the seq of a pruned change again
@@ -0,0 +1,181 @@
+# pagination.py
+import json
+from itertools import islice
+
+from flask import Response, current_app, jsonify, request, stream_with_context, url_for
+from sqlalchemy import func, select
+
+from extensions import db
+from fastjson import dumps, json_response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 1000  # Rows fetched per round trip when streaming NDJSON
+NDJSON_MIMETYPE = 'application/x-ndjson'
+DEFAULT_MAX_IDS = 10000   # Ids accepted by one multi-get, override with MULTI_GET_MAX_IDS
+
+
+def wants_ndjson():
+    """Return True when the client explicitly asked for newline-delimited JSON."""
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_ndjson(rows, serialize):
+    """
+    Stream rows as one JSON document per line without materialising the result set.
+
+    Lines are written STREAM_CHUNK_SIZE rows at a time rather than one write (and,
+    when compressed, one compressor call) per row.
+    """
+    def generate():
+        rows_left = iter(rows)
+        while True:
+            chunk = list(islice(rows_left, STREAM_CHUNK_SIZE))
+            if not chunk:
+                return
+            yield b''.join([dumps(serialize(row)) for row in chunk])
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with prefix, or None if there is none."""
+    last = prefix[-1]
+    if ord(last) == 0x10FFFF:
+        return None
+    return prefix[:-1] + chr(ord(last) + 1)
+
+
+def prefix_filter(query, column):
+    """
+    Narrow query to rows whose column starts with the `prefix` query parameter.
+
+    The prefix is expressed as a range on column so an index on it is used as a
+    range scan; the LIKE guards against collations where the range alone is not exact.
+    """
+    prefix = request.args.get('prefix')
+    if not prefix:
+        return query
+    query = query.filter(column >= prefix, column.startswith(prefix, autoescape=True))
+    upper = prefix_upper_bound(prefix)
+    if upper is not None:
+        query = query.filter(column < upper)
+    return query
+
+
+def parse_ids(values):
+    """Validate a list of ids, returning (ids, error)."""
+    if not isinstance(values, list) or not all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        return None, 'ids must be a list of integers'
+    max_ids = current_app.config.get('MULTI_GET_MAX_IDS', DEFAULT_MAX_IDS)
+    if len(values) > max_ids:
+        return None, f'at most {max_ids} ids may be requested at once'
+    return values, None
+
+
+def ids_arg():
+    """Read the `ids=1,5,9` query parameter (repeatable), returning (ids, error); ids is None when absent."""
+    if 'ids' not in request.args:
+        return None, None
+    try:
+        ids = [int(value) for arg in request.args.getlist('ids') for value in arg.split(',') if value.strip()]
+    except ValueError:
+        return None, 'ids must be a comma-separated list of integers'
+    return ids, None
+
+
+def ids_filter(column, ids):
+    """
+    Condition matching column against ids in a single statement, whatever the number of ids.
+
+    SQLite limits bound parameters per statement, so the ids are passed as one
+    JSON array and expanded with json_each; other backends take a plain IN list.
+    """
+    if db.session.get_bind().dialect.name == 'sqlite':
+        values = func.json_each(json.dumps(ids)).table_valued('value')
+        return column.in_(select(values.c.value))
+    return column.in_(ids)
+
+
+def fetch_rows(stmt):
+    """
+    Execute a list statement and return its rows.
+
+    A select of one mapped class (as expand builds for ?expand=) yields the ORM
+    entities; any other select yields row tuples.
+    """
+    result = db.session.execute(stmt)
+    description = stmt.column_descriptions
+    if len(description) == 1 and description[0]['expr'] is description[0]['entity']:
+        return result.scalars()
+    return result
+
+
+def fetch_by_ids(query, id_column, ids, serialize):
+    """
+    Return the rows of query with the given ids, in the order they were requested.
+
+    The response is aligned with ids: repeated ids repeat their row and ids
+    that do not exist (or are excluded by the query's filters) are null.
+    """
+    ids, error = parse_ids(ids)
+    if error:
+        return jsonify({'error': error}), 400
+    rows = fetch_rows(query.filter(ids_filter(id_column, list(set(ids))))).all() if ids else []
+    by_id = {row.id: serialize(row) for row in rows}
+    return json_response([by_id.get(row_id) for row_id in ids])
+
+
+def lookup_ids(query, id_column, serialize):
+    """POST variant of a multi-get for id lists too long for a URL: the body is {"ids": [...]} or a bare array."""
+    data = request.get_json(silent=True)
+    ids = data.get('ids') if isinstance(data, dict) else data
+    return fetch_by_ids(query, id_column, ids, serialize)
+
+
+def paginate(query, id_column, serialize):
+    """
+    Keyset-paginate a query on its integer primary key.
+
+    Clients pass `after` (the last id they have seen) and `limit`. The JSON body
+    stays a plain list; the cursor for the next page is returned in the
+    `X-Next-After` and `Link` headers and is absent on the last page.
+    With `Accept: application/x-ndjson` every row after `after` (optionally capped
+    by `limit`) is streamed from a server-side cursor in chunks instead.
+    With `ids=1,5,9` only those rows are returned, in that order (see fetch_by_ids).
+
+    Args:
+        query: select() of the rows to list, see fetch_rows.
+        id_column: Primary key column used as the cursor.
+        serialize: Callable turning one row into a JSON-serialisable dict (see fastjson.dumps).
+    """
+    if 'ids' in request.args:
+        ids, error = ids_arg()
+        if error:
+            return jsonify({'error': error}), 400
+        return fetch_by_ids(query, id_column, ids, serialize)
+
+    after = request.args.get('after', default=0, type=int)
+    query = query.filter(id_column > after).order_by(id_column)
+
+    if wants_ndjson():
+        limit = request.args.get('limit', type=int)
+        if limit:
+            query = query.limit(limit)
+        return stream_ndjson(fetch_rows(query.execution_options(yield_per=STREAM_CHUNK_SIZE)), serialize)
+
+    limit = request.args.get('limit', default=DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # Fetch one extra row to learn whether another page exists without a COUNT(*)
+    rows = fetch_rows(query.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response = json_response([serialize(row) for row in rows])
+    if has_more:
+        next_after = rows[-1].id
+        args = request.args.to_dict()
+        args.update(after=next_after, limit=limit)
+        response.headers['X-Next-After'] = str(next_after)
+        response.headers['Link'] = f'<{url_for(request.endpoint, **request.view_args, **args)}>; rel="next"'
+    return response, 200
@@ -0,0 +1,275 @@
+# reports.py
+from functools import lru_cache
+
+from sqlalchemy import text
+
+from fastjson import row_serializer
+from timestamps import BUCKETS, MAX_BUCKETS, to_epoch, to_iso
+
+MAX_LEADERBOARD_SIZE = 100  # Upper bound of the leaderboard's top parameter
+
+
+@lru_cache(maxsize=256)
+def prepared(sql):
+    """
+    Return text(sql), constructed once per distinct SQL string.
+
+    Constructing text() scans the string for bind parameters; the reports only
+    ever produce a handful of SQL variants, so each is built once and reused.
+    SQLAlchemy caches the compiled form either way, keyed on the string.
+    """
+    return text(sql)
+
+
+class ReportError(ValueError):
+    """A report parameter is invalid; the message is returned to the client with status 400."""
+
+
+def int_arg(args, name, default=None):
+    # Like request.args.get(name, type=int): a malformed value falls back to the default
+    try:
+        return int(args[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def time_arg(args, name, end_of_day=False):
+    """Read query parameter name as epoch seconds, or None when it is absent."""
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return to_epoch(value, end_of_day)
+    except ValueError:
+        raise ReportError(f'{name} must be an ISO-8601 timestamp or epoch seconds')
+
+
+# Every report takes the query parameters (any mapping with .get, e.g. request.args) and returns
+# (statement, bind parameters, row serializer), so the Flask views and the async views of asgi.py
+# run exactly the same SQL.
+
+def deployment_report(args):
+    start_date = time_arg(args, 'start_date')
+    end_date = time_arg(args, 'end_date', end_of_day=True)  # A bare date includes the whole day
+    model_type = args.get('model_type')
+
+    sql = ("SELECT md.id, s.name AS server_name, m.name AS model_name, md.deployment_time FROM model_deployment md "
+           "JOIN version v ON md.version_id = v.id JOIN model m ON v.model_id = m.id JOIN server s ON md.server_id = s.id "
+           "WHERE md.deployment_time BETWEEN :start_date AND :end_date")
+    params = {'start_date': start_date, 'end_date': end_date}
+    if model_type and model_type != "All":
+        sql += " AND m.type = :model_type"
+        params['model_type'] = model_type
+
+    serialize = row_serializer(('id', 'server_name', 'model_name', 'deployment_time'), time_columns=('deployment_time',))
+    return prepared(sql), params, serialize
+
+
+def top_servers_report(args):
+    # Reads the trigger-maintained counter table in index order instead of grouping every deployment
+    sql = """
+    SELECT s.id AS server_id, s.name AS server_name, c.deployment_count
+    FROM server_deployment_count c
+    JOIN server s ON s.id = c.server_id
+    WHERE c.deployment_count > 0
+    ORDER BY c.deployment_count DESC
+    LIMIT :top_x
+    """
+    params = {'top_x': int_arg(args, 'top', 5)}
+
+    def serialize(row):
+        return {'server_id': row.server_id, 'server_name': row.server_name, 'deployment_count': row.deployment_count}
+    return prepared(sql), params, serialize
+
+
+def model_types_count_report(args):
+    sql = """
+    SELECT c.model_type, c.deployment_count
+    FROM model_type_deployment_count c
+    WHERE c.deployment_count > 0
+    ORDER BY c.deployment_count DESC
+    """
+
+    def serialize(row):
+        return {'model_type': row.model_type, 'deployment_count': row.deployment_count}
+    return prepared(sql), {}, serialize
+
+
+def top_datasets_report(args):
+    sql = """
+    SELECT d.id AS dataset_id, d.name AS dataset_name, c.version_count
+    FROM dataset_version_count c
+    JOIN dataset d ON d.id = c.dataset_id
+    WHERE c.version_count > 0
+    ORDER BY c.version_count DESC
+    LIMIT :top_x
+    """
+    params = {'top_x': int_arg(args, 'top', 5)}
+
+    def serialize(row):
+        return {'dataset_id': row.dataset_id, 'dataset_name': row.dataset_name, 'version_count': row.version_count}
+    return prepared(sql), params, serialize
+
+
+def top_models_report(args):
+    sql = """
+    SELECT m.id AS model_id, m.name AS model_name, c.deployment_count
+    FROM model_deployment_count c
+    JOIN model m ON m.id = c.model_id
+    WHERE c.deployment_count > 0
+    ORDER BY c.deployment_count DESC
+    LIMIT :top_x
+    """
+    params = {'top_x': int_arg(args, 'top', 5)}
+
+    def serialize(row):
+        return {'model_id': row.model_id, 'model_name': row.model_name, 'deployment_count': row.deployment_count}
+    return prepared(sql), params, serialize
+
+
+def dataset_list_report(args):
+    def serialize(row):
+        return {'dataset_id': row.id, 'dataset_name': row.name}
+    return prepared("SELECT id, name FROM dataset ORDER BY name"), {}, serialize
+
+
+def models_by_dataset_report(args):
+    sql = """
+    SELECT m.id AS model_id, m.name AS model_name, m.description, COUNT(md.id) AS deployment_count
+    FROM model m
+    JOIN version v ON m.id = v.model_id
+    JOIN model_deployment md ON v.id = md.version_id
+    WHERE v.dataset_id = :dataset_id
+    GROUP BY m.id
+    """
+    params = {'dataset_id': int_arg(args, 'dataset_id')}
+
+    def serialize(row):
+        return {
+            'model_id': row.model_id,
+            'model_name': row.model_name,
+            'model_description': row.description,
+            'deployment_count': row.deployment_count
+        }
+    return prepared(sql), params, serialize
+
+
+def server_deployment_report(args):
+    start_date = time_arg(args, 'start_date')
+    end_date = time_arg(args, 'end_date', end_of_day=True)  # A bare date includes the whole day
+    model_type = args.get('model_type')
+
+    query_parts = [
+        "SELECT s.id AS server_id, s.name AS server_name, COUNT(md.id) AS deployment_count",
+        "FROM server s",
+        "JOIN model_deployment md ON s.id = md.server_id",
+        "JOIN version v ON md.version_id = v.id",
+        "JOIN model m ON v.model_id = m.id",
+        "WHERE md.deployment_time BETWEEN :start_date AND :end_date"
+    ]
+    params = {'start_date': start_date, 'end_date': end_date}
+    if model_type and model_type != "All":
+        query_parts.append("AND m.type = :model_type")
+        params['model_type'] = model_type
+    query_parts.append("GROUP BY s.id, s.name")
+
+    def serialize(row):
+        return {'server_id': row.server_id, 'server_name': row.server_name, 'deployment_count': row.deployment_count}
+    return prepared(" ".join(query_parts)), params, serialize
+
+
+def deployment_timeseries_report(args):
+    # Deployment counts per hour/day/week bucket between start_date and end_date, optionally
+    # split by server or model_type. Buckets are computed in SQL so only the aggregated points
+    # leave the database; buckets without deployments are omitted.
+    bucket = args.get('bucket', 'day')
+    group_by = args.get('group_by')
+    server_id = int_arg(args, 'server_id')
+    start_date = time_arg(args, 'start_date')
+    end_date = time_arg(args, 'end_date', end_of_day=True)
+    if bucket not in BUCKETS:
+        raise ReportError(f"bucket must be one of {', '.join(BUCKETS)}")
+    if group_by not in (None, 'server', 'model_type'):
+        raise ReportError('group_by must be server or model_type')
+    if start_date is None or end_date is None:
+        raise ReportError('start_date and end_date are required')
+    width, origin = BUCKETS[bucket]
+    if (end_date - start_date) // width + 1 > MAX_BUCKETS:
+        raise ReportError(f'range covers more than {MAX_BUCKETS} {bucket} buckets')
+
+    # Subtract each timestamp's offset into its bucket. % truncates toward zero on SQLite and PostgreSQL,
+    # so the offset of a pre-1970 timestamp comes out negative; adding width and taking % again fixes that.
+    bucket_expr = "md.deployment_time - ((md.deployment_time - :origin) % :width + :width) % :width AS bucket"
+    time_range = "md.deployment_time BETWEEN :start_date AND :end_date"
+    params = {'origin': origin, 'width': width, 'start_date': start_date, 'end_date': end_date}
+    if server_id is not None:
+        time_range += " AND md.server_id = :server_id"  # Range scan on idx_deployment_server_time
+        params['server_id'] = server_id
+
+    if group_by == 'server':
+        # Aggregate first, then look up the names of the servers that appear
+        sql = (f"SELECT b.bucket, b.server_id, s.name AS server_name, b.deployment_count "
+               f"FROM (SELECT {bucket_expr}, md.server_id, COUNT(*) AS deployment_count "
+               f"FROM model_deployment md WHERE {time_range} GROUP BY bucket, md.server_id) b "
+               f"JOIN server s ON s.id = b.server_id ORDER BY b.bucket, b.server_id")
+    elif group_by == 'model_type':
+        sql = (f"SELECT {bucket_expr}, m.type AS model_type, COUNT(*) AS deployment_count "
+               f"FROM model_deployment md JOIN version v ON v.id = md.version_id JOIN model m ON m.id = v.model_id "
+               f"WHERE {time_range} GROUP BY bucket, m.type ORDER BY bucket, m.type")
+    else:
+        sql = (f"SELECT {bucket_expr}, COUNT(*) AS deployment_count "
+               f"FROM model_deployment md WHERE {time_range} GROUP BY bucket ORDER BY bucket")
+
+    def serialize(row):
+        point = {'bucket': to_iso(row.bucket), 'deployment_count': row.deployment_count}
+        if group_by == 'server':
+            point.update(server_id=row.server_id, server_name=row.server_name)
+        elif group_by == 'model_type':
+            point['model_type'] = row.model_type
+        return point
+    return prepared(sql), params, serialize
+
+
+def leaderboard_report(args):
+    # Top versions by one metric, read from idx_version_metric_name_value in value order and stopping
+    # after `top` rows, instead of sorting every version; ties go to the newest version. With a
+    # dataset_id, analyzed statistics let the planner start from that dataset's few versions instead.
+    metric = (args.get('metric') or '').strip().lower()
+    if not metric:
+        raise ReportError('metric is required')
+    order = args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise ReportError('order must be asc or desc')  # asc ranks metrics where lower is better, e.g. loss
+    query_parts = [
+        "SELECT vm.version_id, v.version_number, v.model_id, m.name AS model_name, v.dataset_id, vm.value",
+        "FROM version_metric vm",
+        "JOIN version v ON v.id = vm.version_id",
+        "JOIN model m ON m.id = v.model_id",
+        "WHERE vm.name = :metric",
+    ]
+    params = {'metric': metric, 'top': min(max(int_arg(args, 'top', 10), 1), MAX_LEADERBOARD_SIZE)}
+    dataset_id = int_arg(args, 'dataset_id')
+    if dataset_id is not None:
+        query_parts.append("AND v.dataset_id = :dataset_id")
+        params['dataset_id'] = dataset_id
+    query_parts.append(f"ORDER BY vm.value {order.upper()}, vm.version_id {order.upper()}")
+    query_parts.append("LIMIT :top")
+
+    columns = ('version_id', 'version_number', 'model_id', 'model_name', 'dataset_id', 'value')
+    return prepared(" ".join(query_parts)), params, row_serializer(columns)
+
+
+# path -> (endpoint, tables the report reads, report); the tables key the report cache, see cache.cached_report
+REPORTS = {
+    '/reports/deployments': ('generate_deployment_report', ('model_deployment', 'version', 'model', 'server'), deployment_report),
+    '/reports/top-servers': ('get_top_servers', ('server', 'model_deployment'), top_servers_report),
+    '/reports/model-types-count': ('get_model_types_count', ('model', 'version', 'model_deployment'), model_types_count_report),
+    '/reports/top-datasets': ('get_top_datasets', ('dataset', 'version'), top_datasets_report),
+    '/datasets/list': ('list_datasets', ('dataset',), dataset_list_report),
+    '/models/by-dataset': ('models_by_dataset', ('model', 'version', 'model_deployment'), models_by_dataset_report),
+    '/reports/top-models': ('get_top_models', ('model', 'version', 'model_deployment'), top_models_report),
+    '/reports/server-deployments': ('server_deployment_report', ('server', 'model_deployment', 'version', 'model'), server_deployment_report),
+    '/reports/deployments/timeseries': ('deployment_timeseries', ('model_deployment', 'server', 'version', 'model'), deployment_timeseries_report),
+    # version_metric is written only by the version triggers, so the version generation covers it
+    '/reports/leaderboard': ('get_leaderboard', ('version', 'model'), leaderboard_report),
+}
@@ -0,0 +1,207 @@
+# routing.py
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_REPLICA_MAX_LAG = 60           # Seconds a replica may trail the primary and still serve reads
+DEFAULT_REPLICA_REFRESH_INTERVAL = 30  # Seconds between SQLite snapshot refreshes
+DEFAULT_REPLICA_LAG_CHECK_INTERVAL = 1 # Seconds a measured PostgreSQL replay lag is reused
+STICKY_COOKIE = 'read_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def read_only(view):
+    """Mark a view that only reads even though it is called with POST (e.g. a lookup with a large body)."""
+    view.read_only = True
+    return view
+
+
+def reads_primary(view):
+    """Mark a read-only view that must see the latest commits, e.g. a feed clients poll for new writes."""
+    view.reads_primary = True
+    return view
+
+
+def reads_only():
+    """True while handling a request that does not write: a safe method or a view marked read_only."""
+    if not has_request_context():
+        return False
+    if request.method in SAFE_METHODS:
+        return True
+    return getattr(current_app.view_functions.get(request.endpoint), 'read_only', False)
+
+
+class RoutingSession(SignallingSession):
+    """Session that sends statements to the read replica chosen for the current request, if any."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = g.get('read_replica') if has_app_context() else None
+        if replica is not None and not self._flushing:
+            return replica
+        return super().get_bind(mapper, clause)
+
+
+class SnapshotReplica:
+    """
+    A read-only copy of a SQLite primary, refreshed with the online backup API.
+
+    Each refresh writes a new file and renames it over the old one, so readers
+    never see a partial copy; the snapshot time is kept as the file's mtime so
+    every worker process agrees on how stale it is.
+    """
+
+    def __init__(self, path, primary_path):
+        self.path = path
+        self.primary_path = primary_path
+        self.opened = None
+        self.lock = threading.Lock()
+        self.engine = create_engine(f'sqlite:///file:{path}?immutable=1&uri=true',
+                                    poolclass=QueuePool, connect_args={'check_same_thread': False})
+
+    def lag(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return float('inf')
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        if identity != self.opened:
+            with self.lock:
+                if identity != self.opened:
+                    # Pooled connections still read the replaced file; reopen against the new one
+                    self.engine.dispose()
+                    self.opened = identity
+        return time.time() - stat.st_mtime
+
+    def refresh(self, interval):
+        if self.lag() < interval:
+            return  # Another worker refreshed it recently
+        started = time.time()
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        source = sqlite3.connect(self.primary_path, timeout=30)
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(target)
+            target.execute('PRAGMA journal_mode=DELETE')  # Self-contained file, no -wal/-shm needed to read it
+        finally:
+            target.close()
+            source.close()
+        os.utime(tmp_path, (started, started))
+        os.replace(tmp_path, self.path)
+
+
+class StreamingReplica:
+    """A server-side replica (e.g. PostgreSQL hot standby) whose replay lag is measured periodically."""
+
+    def __init__(self, url, options, check_interval):
+        self.engine = create_engine(url, **options)
+        self.check_interval = check_interval
+        self.checked_at = 0
+        self.measured_lag = float('inf')
+
+    def lag(self):
+        if time.monotonic() - self.checked_at > self.check_interval:
+            try:
+                with self.engine.connect() as conn:
+                    lag = conn.execute(text(
+                        'SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)')).scalar()
+                self.measured_lag = float(lag)
+            except Exception:
+                self.measured_lag = float('inf')
+            self.checked_at = time.monotonic()
+        return self.measured_lag
+
+    def refresh(self, interval):
+        pass
+
+
+def replica_urls():
+    """Read replica URLs from the comma-separated DATABASE_REPLICA_URLS environment variable."""
+    return [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+
+
+def init_replicas(app, db):
+    """
+    Route reads to replicas configured in REPLICA_URLS (default: DATABASE_REPLICA_URLS).
+
+    GET/HEAD requests (and views marked read_only) use a random replica whose lag is within REPLICA_MAX_LAG,
+    falling back to the primary when none is fresh enough. A SQLite replica URL
+    names a snapshot file of the SQLite primary that is refreshed every
+    REPLICA_REFRESH_INTERVAL seconds; other URLs are treated as streaming
+    replicas. After a successful write the client gets a cookie that keeps its
+    reads on the primary for REPLICA_MAX_LAG seconds, so it always reads its
+    own writes.
+    """
+    config = app.config
+    config.setdefault('REPLICA_URLS', replica_urls())
+    config.setdefault('REPLICA_MAX_LAG', DEFAULT_REPLICA_MAX_LAG)
+    config.setdefault('REPLICA_REFRESH_INTERVAL', DEFAULT_REPLICA_REFRESH_INTERVAL)
+    config.setdefault('REPLICA_LAG_CHECK_INTERVAL', DEFAULT_REPLICA_LAG_CHECK_INTERVAL)
+    if not config['REPLICA_URLS']:
+        return
+
+    with app.app_context():
+        primary_url = db.engine.url
+    replicas = []
+    for url in config['REPLICA_URLS']:
+        url = make_url(url)
+        if url.get_backend_name() == 'sqlite':
+            path = url.database if os.path.isabs(url.database) else os.path.join(app.root_path, url.database)
+            replicas.append(SnapshotReplica(path, primary_url.database))
+        else:
+            options = {key: value for key, value in config['SQLALCHEMY_ENGINE_OPTIONS'].items()
+                       if key not in ('poolclass', 'connect_args')}
+            replicas.append(StreamingReplica(url, options, config['REPLICA_LAG_CHECK_INTERVAL']))
+    app.extensions['replicas'] = replicas
+    start_refresher(app, replicas)
+
+    @app.before_request
+    def choose_read_bind():
+        if not reads_only() or getattr(current_app.view_functions.get(request.endpoint), 'reads_primary', False):
+            return
+        if request.cookies.get(STICKY_COOKIE, type=float, default=0) > time.time():
+            return  # This client wrote recently; replicas may not have caught up yet
+        fresh = [replica for replica in replicas if replica.lag() <= config['REPLICA_MAX_LAG']]
+        if fresh:
+            g.read_replica = random.choice(fresh).engine
+
+    @app.after_request
+    def stick_to_primary(response):
+        if not reads_only() and response.status_code < 400:
+            max_lag = config['REPLICA_MAX_LAG']
+            response.set_cookie(STICKY_COOKIE, str(time.time() + max_lag), max_age=max_lag, httponly=True)
+        return response
+
+
+def start_refresher(app, replicas):
+    """Refresh snapshot replicas from a daemon thread started by the first request in each process."""
+    if not any(isinstance(replica, SnapshotReplica) for replica in replicas):
+        return
+    state = {'pid': None}
+    lock = threading.Lock()
+
+    def run():
+        interval = app.config['REPLICA_REFRESH_INTERVAL']
+        while True:
+            for replica in replicas:
+                try:
+                    replica.refresh(interval)
+                except Exception:
+                    app.logger.exception('Replica snapshot refresh failed')
+            time.sleep(interval)
+
+    @app.before_request
+    def ensure_refresher():
+        if state['pid'] == os.getpid():
+            return
+        with lock:
+            if state['pid'] != os.getpid():
+                state['pid'] = os.getpid()
+                threading.Thread(target=run, name='replica-refresh', daemon=True).start()
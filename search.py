@@ -0,0 +1,154 @@
+# search.py
+import re
+
+from flask import jsonify, request, url_for
+from sqlalchemy import event, text
+
+from extensions import db
+from reports import prepared
+from triggers import register_triggers
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+# kind -> (FTS5 table, indexed columns, column reported as the item's category, bm25 column weights)
+SEARCH_INDEXES = {
+    'model': ('model_search', ('name', 'description', 'type'), 'type', (10.0, 1.0, 5.0)),
+    'dataset': ('dataset_search', ('name', 'description', 'data_type'), 'data_type', (10.0, 1.0, 5.0)),
+}
+
+
+def fts_row(fts_table, columns, row, command=None):
+    """Statement adding (or, with command='delete', removing) row of an external-content FTS5 table."""
+    names = ', '.join(columns)
+    values = ', '.join(f'{row}.{column}' for column in columns)
+    if command:
+        return f"INSERT INTO {fts_table} ({fts_table}, rowid, {names}) VALUES ('{command}', {row}.id, {values})"
+    return f"INSERT INTO {fts_table} (rowid, {names}) VALUES ({row}.id, {values})"
+
+
+# On SQLite the FTS5 tables store only the index; these triggers keep it in step with the source rows.
+# PostgreSQL uses a generated tsvector column instead, see create_search_indexes.
+SEARCH_TRIGGERS = {
+    name: trigger
+    for table, (fts_table, columns, _, _) in SEARCH_INDEXES.items()
+    for name, trigger in {
+        f'trg_{table}_insert_search': (table, 'INSERT', [fts_row(fts_table, columns, 'new')]),
+        f'trg_{table}_delete_search': (table, 'DELETE', [fts_row(fts_table, columns, 'old', 'delete')]),
+        f'trg_{table}_update_search': (table, f"UPDATE OF {', '.join(columns)}", [
+            fts_row(fts_table, columns, 'old', 'delete'),
+            fts_row(fts_table, columns, 'new'),
+        ]),
+    }.items()
+}
+register_triggers(SEARCH_TRIGGERS, dialects=('sqlite',))
+
+
+def create_search_indexes(conn):
+    """Create the full-text indexes if they are missing, indexing any rows already present."""
+    for table, (fts_table, columns, _, (name_weight, description_weight, category_weight)) in SEARCH_INDEXES.items():
+        if conn.dialect.name == 'sqlite':
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                                  {'name': fts_table}).first()
+            if exists:
+                continue
+            # Prefix indexes on 2 and 3 characters keep short typeahead prefixes fast
+            conn.execute(text(f"CREATE VIRTUAL TABLE {fts_table} USING fts5({', '.join(columns)}, "
+                              f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2', "
+                              f"prefix='2 3')"))
+            conn.execute(text(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')"))
+        elif conn.dialect.name == 'postgresql':
+            name, description, category = columns
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+                f"setweight(to_tsvector('simple', coalesce({name}, '')), 'A') || "
+                f"setweight(to_tsvector('simple', coalesce({category}, '')), 'B') || "
+                f"setweight(to_tsvector('simple', coalesce({description}, '')), 'C')) STORED"))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)"))
+
+
+def rebuild_search_indexes(conn):
+    """Re-index every row, for writes made while the triggers were dropped (a no-op on PostgreSQL)."""
+    if conn.dialect.name == 'sqlite':
+        for fts_table, _, _, _ in SEARCH_INDEXES.values():
+            conn.execute(text(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')"))
+
+
+@event.listens_for(db.metadata, 'after_create')
+def install_search_indexes(target, connection, **kw):
+    create_search_indexes(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def drop_search_indexes(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for fts_table, _, _, _ in SEARCH_INDEXES.values():
+            connection.execute(text(f"DROP TABLE IF EXISTS {fts_table}"))
+
+
+def match_query(q, dialect):
+    """
+    Turn free text into a full-text query where every word must match as a prefix.
+
+    Only word characters are kept, so user input cannot inject query syntax.
+    Returns None when q contains no words.
+    """
+    words = re.findall(r'\w+', q)
+    if not words:
+        return None
+    if dialect == 'postgresql':
+        return ' & '.join(f'{word}:*' for word in words)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_select(kind, dialect):
+    fts_table, _, category, weights = SEARCH_INDEXES[kind]
+    columns = f"'{kind}' AS kind, t.id, t.name, t.description, t.{category} AS category"
+    if dialect == 'postgresql':
+        # Negated so that lower is better on both backends, as with bm25()
+        return (f"SELECT {columns}, -ts_rank(t.search_vector, to_tsquery('simple', :query)) AS score "
+                f"FROM {kind} t WHERE t.search_vector @@ to_tsquery('simple', :query)")
+    return (f"SELECT {columns}, bm25({fts_table}, {', '.join(map(str, weights))}) AS score "
+            f"FROM {fts_table} JOIN {kind} t ON t.id = {fts_table}.rowid WHERE {fts_table} MATCH :query")
+
+
+def search():
+    """
+    Ranked full-text search over models and datasets.
+
+    Query parameters: `q` (every word is matched as a prefix of a word in the
+    name, description or type), `kind` (model or dataset; default both),
+    `limit` and `offset`. Results are ordered best first; the next page is
+    advertised in the `X-Next-Offset` and `Link` headers.
+    """
+    kind = request.args.get('kind')
+    if kind not in (None, '', *SEARCH_INDEXES):
+        return jsonify({'error': f"kind must be one of {', '.join(SEARCH_INDEXES)}"}), 400
+    dialect = db.session.get_bind().dialect.name
+    query = match_query(request.args.get('q', ''), dialect)
+    if query is None:
+        return jsonify({'error': 'q must contain at least one word'}), 400
+    limit = max(1, min(request.args.get('limit', default=DEFAULT_SEARCH_LIMIT, type=int), MAX_SEARCH_LIMIT))
+    offset = max(0, request.args.get('offset', default=0, type=int))
+
+    kinds = [kind] if kind else list(SEARCH_INDEXES)
+    sql = (' UNION ALL '.join(search_select(k, dialect) for k in kinds)
+           + ' ORDER BY score, kind, id LIMIT :limit OFFSET :offset')
+    # Fetch one extra row to learn whether another page exists
+    rows = db.session.execute(prepared(sql), {'query': query, 'limit': limit + 1, 'offset': offset}).fetchall()
+
+    results = [{
+        'kind': row.kind,
+        'id': row.id,
+        'name': row.name,
+        'description': row.description,
+        SEARCH_INDEXES[row.kind][2]: row.category,
+        'score': row.score,
+    } for row in rows[:limit]]
+    response = jsonify(results)
+    if len(rows) > limit:
+        args = request.args.to_dict()
+        args.update(offset=offset + limit, limit=limit)
+        response.headers['X-Next-Offset'] = str(offset + limit)
+        response.headers['Link'] = f'<{url_for(request.endpoint, **args)}>; rel="next"'
+    return response
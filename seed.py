@@ -1,48 +1,39 @@
-from app import app
-from extensions import db
-from models import Model, Dataset, Version, Server, ModelDeployment
+import itertools
+import json
 import random
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 
-def generate_random_date_int(start_year, start_month, start_day, end_year, end_month, end_day):
-    """
-    Generates a random date between two specified dates and converts it to an integer format like "101" for January 1st.
-    
-    Args:
-        start_year, start_month, start_day: Start date components.
-        end_year, end_month, end_day: End date components.
-        
-    Returns:
-        An integer representing the random date in the specified format.
-    """
-    start_date = datetime(start_year, start_month, start_day)
-    end_date = datetime(end_year, end_month, end_day)
-
-    # Generate a random date between start_date and end_date
-    delta = end_date - start_date
-    random_days = random.randrange(delta.days + 1)
-    random_date = start_date + timedelta(days=random_days)
-    
-    # Convert the random date to the specified integer format
-    date_int = random_date.month * 100 + random_date.day
-    return date_int
+import click
+from flask.cli import with_appcontext
+from flask_migrate import stamp
+from sqlalchemy import text
+
+from aggregates import rebuild_counts
+from cache import bump_generations
+from config import SQLITE_PRAGMAS
+from extensions import db
+from models import Model, Dataset, Version, Server, ModelDeployment
+from search import rebuild_search_indexes
+from triggers import create_triggers, drop_triggers
+from version_metrics import rebuild_metrics
 
 # Sample data for seeding
 model_names = [
-    "ChatGPT", "Claude", "Stable Diffusion", "BERT", "GPT-3", "RoBERTa", "Linear Regression", "Logistic Regression", 
+    "ChatGPT", "Claude", "Stable Diffusion", "BERT", "GPT-3", "RoBERTa", "Linear Regression", "Logistic Regression",
     "SVM", "Random Forest", "XGBoost", "AdaBoost", "Naive Bayes", "KNN", "Decision Trees", "GPT-2", "GPT-Neo", "ELECTRA",
     "YOLOv4", "FastAI", "Prophet", "ARIMA", "LSTM", "GRU", "CNN", "ResNet", "VGG16", "InceptionV3", "MobileNet", "EfficientNet",
-    "DALL-E", "CycleGAN", "U-Net", "R-CNN", "Fast R-CNN", "Mask R-CNN", "RetinaNet", "Transformer", "T5", "BART", "ERNIE", 
+    "DALL-E", "CycleGAN", "U-Net", "R-CNN", "Fast R-CNN", "Mask R-CNN", "RetinaNet", "Transformer", "T5", "BART", "ERNIE",
     "ALBERT", "XLNet", "WaveNet", "DeepLab", "Capsule Network", "Flair", "DistilBERT"
 ]
 
 dataset_names = [
-    "10B Parameter Tokens", "Zillow Dataset", "ImageNet", "COCO", "MNIST", "Fashion MNIST", "CIFAR-10", "CIFAR-100", 
-    "20 Newsgroups", "Reuters-21578", "IMDb Reviews", "Amazon Product Reviews", "Google Speech Commands", "LibriSpeech", 
-    "SQuAD", "GLUE Benchmark", "SuperGLUE Benchmark", "Stanford Sentiment Treebank", "Flickr30k", "Cityscapes", 
+    "10B Parameter Tokens", "Zillow Dataset", "ImageNet", "COCO", "MNIST", "Fashion MNIST", "CIFAR-10", "CIFAR-100",
+    "20 Newsgroups", "Reuters-21578", "IMDb Reviews", "Amazon Product Reviews", "Google Speech Commands", "LibriSpeech",
+    "SQuAD", "GLUE Benchmark", "SuperGLUE Benchmark", "Stanford Sentiment Treebank", "Flickr30k", "Cityscapes",
     "PASCAL VOC", "Affective Text", "TREC Question Classification", "UCI Machine Learning Repository", "Kaggle Datasets",
     "EuroSAT", "Spam Text Message Data", "YouTube-8M", "GoEmotions", "Open Images Dataset", "DeepFashion", "CelebA", "LFW",
-    "CASIA WebFace", "VGGFace2", "MS-Celeb-1M", "YouTube Faces DB", "QuickDraw Dataset", "GTSRB", "TT100K", "BSDS500", 
+    "CASIA WebFace", "VGGFace2", "MS-Celeb-1M", "YouTube Faces DB", "QuickDraw Dataset", "GTSRB", "TT100K", "BSDS500",
     "NYU Depth V2", "KITTI Vision Benchmark", "DAVIS", "VOT Challenge", "AloT Dataset", "BigEarthNet", "Aerial Image Dataset",
     "Satellite Imagery Multi-vehicles Dataset", "NWPU-RESISC45", "UC Merced Land Use Dataset"
 ]
@@ -56,59 +47,221 @@ server_providers = [
     "Namecheap", "ResellerClub", "JustHost", "HostPapa", "HostMonster"
 ]
 
-def seed_data():
+# Table sizes relative to the number of deployments, with floors so small scales stay useful
+TABLE_RATIOS = {
+    'model': (1000, 50),
+    'dataset': (1000, 50),
+    'server': (100, 50),
+    'version': (10, 100),
+}
+
+
+def parse_scale(value):
+    """
+    Parse a human-friendly row count such as "1000", "10k", "1.5M" or "2B".
+
+    Args:
+        value: The count as a string, optionally suffixed with k, M or B.
+
+    Returns:
+        The count as an integer.
+    """
+    multipliers = {'k': 10 ** 3, 'm': 10 ** 6, 'b': 10 ** 9}
+    value = str(value).strip()
+    suffix = value[-1:].lower()
+    try:
+        if suffix in multipliers:
+            return int(float(value[:-1]) * multipliers[suffix])
+        return int(value)
+    except ValueError:
+        raise click.BadParameter(f"invalid scale '{value}', expected e.g. 10k, 1M or 10M")
+
+
+def table_sizes(scale):
+    """Derive the row count of every table from the number of deployments."""
+    sizes = {table: max(scale // divisor, floor) for table, (divisor, floor) in TABLE_RATIOS.items()}
+    sizes['model_deployment'] = scale
+    return sizes
+
+
+class ZipfSampler:
+    """
+    Draws ids 1..n with Zipfian popularity (weight of rank r is 1 / r**skew).
+
+    Ranks are assigned to ids through a seeded shuffle so the popular ids are
+    spread across the table instead of all being the lowest ones.
+    """
+
+    def __init__(self, rng, n, skew):
+        self.rng = rng
+        self.ids = list(range(1, n + 1))
+        rng.shuffle(self.ids)
+        self.cum_weights = list(itertools.accumulate(1.0 / rank ** skew for rank in range(1, n + 1)))
+
+    def sample(self, k):
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+
+def model_type_for(name):
+    if 'GPT' in name or 'BERT' in name or 'Transformer' in name:
+        return 'LLM'
+    elif 'Regression' in name:
+        return 'Regression'
+    return 'Neural Network'
+
+
+def encode_deployment_time(moment):
+    """Convert a naive UTC datetime to the representation stored in model_deployment.deployment_time (epoch seconds)."""
+    return int(moment.replace(tzinfo=timezone.utc).timestamp())
+
+
+def generate_models(rng, count):
+    for _ in range(count):
+        name = rng.choice(model_names)
+        yield {'name': name, 'description': f'{name} model description.', 'type': model_type_for(name)}
+
+
+def generate_datasets(rng, count):
+    for _ in range(count):
+        name = rng.choice(dataset_names)
+        yield {'name': name, 'description': f'{name} dataset description.', 'data_type': rng.choice(["text", "image", "audio", "video"])}
+
+
+def generate_servers(rng, count):
+    for _ in range(count):
+        provider = rng.choice(server_providers)
+        yield {'name': f"{provider} Server", 'ip_address': '.'.join(str(rng.randint(0, 255)) for _ in range(4))}
+
+
+def generate_versions(rng, count, sizes, skew, chunk_size):
+    models = ZipfSampler(rng, sizes['model'], skew)
+    for start in range(0, count, chunk_size):
+        k = min(chunk_size, count - start)
+        for offset, model_id in enumerate(models.sample(k)):
+            yield {
+                'model_id': model_id,
+                'dataset_id': rng.randint(1, sizes['dataset']),
+                'version_number': f'v{start + offset}.0',
+                'performance_metrics': json.dumps({'accuracy': rng.randint(50, 99) / 100}),
+            }
+
+
+def generate_deployments(rng, count, sizes, skew, years, chunk_size):
+    servers = ZipfSampler(rng, sizes['server'], skew)
+    versions = ZipfSampler(rng, sizes['version'], skew)
+    end = datetime(2024, 1, 1)
+    span_seconds = int(timedelta(days=365 * years).total_seconds())
+    for start in range(0, count, chunk_size):
+        k = min(chunk_size, count - start)
+        for server_id, version_id in zip(servers.sample(k), versions.sample(k)):
+            moment = end - timedelta(seconds=rng.randrange(span_seconds))
+            yield {'server_id': server_id, 'version_id': version_id, 'deployment_time': encode_deployment_time(moment)}
+
+
+def load_table(conn, table, rows, chunk_size):
+    """
+    Insert rows with executemany in chunks, committing after each chunk.
+
+    Returns:
+        The number of rows inserted.
+    """
+    started = time.perf_counter()
+    inserted = 0
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        with conn.begin():
+            conn.execute(table.insert(), chunk)
+        inserted += len(chunk)
+    elapsed = time.perf_counter() - started
+    click.echo(f"  {table.name:<17} {inserted:>12,} rows in {elapsed:8.2f}s ({inserted / max(elapsed, 1e-9):,.0f} rows/s)")
+    return inserted
+
+
+def seed_data(scale=1000, seed=None, skew=1.1, years=3, chunk_size=10000, defer_indexes=True):
+    """
+    Drop and recreate the schema, then fill it with generated data.
+
+    Args:
+        scale: Number of model deployments; other tables are sized from it.
+        seed: Random seed; the same seed and scale always produce the same data.
+        skew: Zipf exponent for server/model/version popularity.
+        years: Span of deployment timestamps, ending at 2024-01-01.
+        chunk_size: Rows per INSERT batch and per commit.
+        defer_indexes: Drop secondary indexes during the load and build them afterwards.
+    """
+    rng = random.Random(seed)
+    sizes = table_sizes(scale)
+    tables = [Model.__table__, Dataset.__table__, Server.__table__, Version.__table__, ModelDeployment.__table__]
+
     db.drop_all()
     db.create_all()
+    # create_all builds the latest schema; record that as the migration head so `flask db upgrade` has nothing to replay
+    stamp(revision='head')
+
+    started = time.perf_counter()
+    with db.engine.connect() as conn:
+        sqlite = conn.dialect.name == 'sqlite'
+        if sqlite:
+            # The database is being rebuilt from scratch, so durability during the load is not needed
+            conn.execute(text('PRAGMA synchronous=OFF'))
+            conn.execute(text('PRAGMA foreign_keys=OFF'))  # Generated references are valid by construction
+        # Derived tables are rebuilt in one pass after the load rather than maintained row by row
+        drop_triggers(conn)
+        if defer_indexes:
+            for table in tables:
+                for index in table.indexes:
+                    index.drop(conn)
+
+        click.echo(f"Seeding {sum(sizes.values()):,} rows (seed={seed}, skew={skew}):")
+        total = 0
+        total += load_table(conn, Model.__table__, generate_models(rng, sizes['model']), chunk_size)
+        total += load_table(conn, Dataset.__table__, generate_datasets(rng, sizes['dataset']), chunk_size)
+        total += load_table(conn, Server.__table__, generate_servers(rng, sizes['server']), chunk_size)
+        total += load_table(conn, Version.__table__, generate_versions(rng, sizes['version'], sizes, skew, chunk_size), chunk_size)
+        total += load_table(conn, ModelDeployment.__table__, generate_deployments(rng, sizes['model_deployment'], sizes, skew, years, chunk_size), chunk_size)
+
+        if defer_indexes:
+            index_started = time.perf_counter()
+            for table in tables:
+                for index in table.indexes:
+                    index.create(conn)
+            click.echo(f"  indexes built in {time.perf_counter() - index_started:.2f}s")
+
+        counts_started = time.perf_counter()
+        with conn.begin():
+            rebuild_counts(conn)
+            rebuild_search_indexes(conn)
+            rebuild_metrics(conn)
+            bump_generations(conn)
+            create_triggers(conn)
+        click.echo(f"  report counters, search index and version metrics built in {time.perf_counter() - counts_started:.2f}s")
+
+        if sqlite:
+            # The connection goes back to the pool, so restore the configured durability
+            conn.execute(text(f"PRAGMA synchronous={SQLITE_PRAGMAS.get('synchronous', 'FULL')}"))
+            conn.execute(text(f"PRAGMA foreign_keys={SQLITE_PRAGMAS.get('foreign_keys', 'OFF')}"))
+
+    elapsed = time.perf_counter() - started
+    click.echo(f"Database seeded with {total:,} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/s).")
+
+
+@click.command('seed')
+@click.option('--scale', default='1000', show_default=True, help='Number of deployments, e.g. 10k, 1M, 10M.')
+@click.option('--seed', 'seed', type=int, default=None, help='Random seed for reproducible data.')
+@click.option('--skew', type=float, default=1.1, show_default=True, help='Zipf exponent for server/model popularity.')
+@click.option('--years', type=int, default=3, show_default=True, help='Years of deployment history to generate.')
+@click.option('--chunk-size', type=int, default=10000, show_default=True, help='Rows per insert batch and commit.')
+@click.option('--defer-indexes/--no-defer-indexes', default=True, show_default=True, help='Build secondary indexes after the load.')
+@with_appcontext
+def seed_command(scale, seed, skew, years, chunk_size, defer_indexes):
+    """Drop the database and fill it with generated data."""
+    seed_data(parse_scale(scale), seed, skew, years, chunk_size, defer_indexes)
 
-    # Seed Models
-    for _ in range(1000):
-        name = random.choice(model_names)
-        if 'GPT' in name or 'BERT' in name or 'Transformer' in name:
-            model_type = 'LLM'
-        elif 'Regression' in name:
-            model_type = 'Regression'
-        else:
-            model_type = 'Neural Network'
-        db.session.add(Model(name=name, description=f'{name} model description.', type=model_type))
-
-    # Seed Datasets
-    for _ in range(1000):
-        name = random.choice(dataset_names)
-        db.session.add(Dataset(name=name, description=f'{name} dataset description.', data_type=random.choice(["text", "image", "audio", "video"])))
-
-    db.session.commit()
-
-    # Seed Servers
-    for _ in range(1000):
-        provider = random.choice(server_providers)
-        ip_octets = [random.randint(0, 255) for _ in range(4)]
-        server_name = f"{provider} Server"
-        server_ip = f"{'.'.join(map(str, ip_octets))}"
-        db.session.add(Server(name=server_name, ip_address=server_ip))
-
-    db.session.commit()
-
-    # Assuming Version and ModelDeployment require existing Model, Dataset, and Server IDs
-    models = Model.query.all()
-    datasets = Dataset.query.all()
-    servers = Server.query.all()
-
-    # Seed Versions
-    for _ in range(1000):
-        db.session.add(Version(model_id=random.choice(models).id, dataset_id=random.choice(datasets).id, version_number=f'v{_}.0', performance_metrics='Accuracy: 95%'))
-
-    db.session.commit()
-
-    # Seed ModelDeployments
-    for _ in range(1000):
-        server = random.choice(servers)
-        deployment_time_int = generate_random_date_int(2024, 1, 1, 2024, 3, 25)
-        db.session.add(ModelDeployment(server_id=server.id, version_id=random.choice(Version.query.all()).id, deployment_time=deployment_time_int))
-    
-    db.session.commit()
-
-    print("Database seeded successfully with custom data.")
 
 # Use the app's context when running the script
-with app.app_context():
-    seed_data()
+if __name__ == '__main__':
+    from app import create_app
+    with create_app().app_context():
+        seed_data()
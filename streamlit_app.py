@@ -1,12 +1,74 @@
 import streamlit as st
 import requests
-from datetime import datetime
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import date, datetime, time, timedelta
 import matplotlib.pyplot as plt
 # Base URL of your Flask app
 BASE_URL = "http://127.0.0.1:5000"
 
 st.title('Model Deployment Service')
 
+REQUEST_TIMEOUT = 10  # Seconds before an API call is abandoned
+CACHE_TTL = 30        # Seconds a GET response is reused across reruns
+MAX_VALIDATORS = 256  # ETag-validated responses kept for conditional requests
+PAGE_SIZE = 50        # Rows rendered per page of an entity list
+OPTION_LIMIT = 20     # Options offered by a typeahead selector
+
+@st.cache(allow_output_mutation=True)
+def get_session():
+    """
+    Shared HTTP session for every call to the API.
+
+    Keeps connections alive between reruns and retries idempotent requests on
+    connection errors and 502/503/504 responses.
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=['GET', 'HEAD'])
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=16)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+@st.cache(allow_output_mutation=True)
+def get_client_state():
+    """Mutable state shared across reruns: the cache generation and ETag-validated responses."""
+    return {'generation': 0, 'validators': OrderedDict()}
+
+@st.cache(ttl=CACHE_TTL, max_entries=256, show_spinner=False, allow_output_mutation=True)
+def fetch_json(endpoint, params, generation):
+    """
+    GET an endpoint, cached by endpoint, params and cache generation.
+
+    Returns the decoded body and the keyset cursor of the next page (None on
+    the last page or for unpaginated endpoints). Responses carrying an ETag
+    are revalidated with If-None-Match once the TTL expires, so unchanged
+    reports are not transferred again. Failures raise so that they are never
+    cached.
+    """
+    validators = get_client_state()['validators']
+    key = (endpoint, params)
+    headers = {}
+    if key in validators:
+        headers['If-None-Match'] = validators[key][0]
+    response = get_session().get(f"{BASE_URL}/{endpoint}", params=dict(params) or None, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 304 and key in validators:
+        validators.move_to_end(key)
+        return validators[key][1]
+    response.raise_for_status()
+    result = (response.json(), response.headers.get('X-Next-After'))
+    if response.headers.get('ETag'):
+        validators[key] = (response.headers['ETag'], result)
+        validators.move_to_end(key)
+        while len(validators) > MAX_VALIDATORS:
+            validators.popitem(last=False)
+    return result
+
+def invalidate_cache():
+    """Drop every cached GET response; called after each successful mutation."""
+    get_client_state()['generation'] += 1
+
 def get_data(endpoint, params=None):
     """
     Fetch data from a specified endpoint. Optionally include query parameters.
@@ -18,31 +80,82 @@ def get_data(endpoint, params=None):
     Returns:
     - JSON response data if the request is successful, otherwise an empty list.
     """
-    if params is None:
-        response = requests.get(f"{BASE_URL}/{endpoint}")
-    else:
-        response = requests.get(f"{BASE_URL}/{endpoint}", params=params)
-    
-    return response.json() if response.status_code == 200 else []
+    return get_page(endpoint, params)[0]
+
+def get_page(endpoint, params=None):
+    """Like get_data, but also return the cursor of the next page (None on the last page)."""
+    params = tuple(sorted((params or {}).items()))
+    try:
+        return fetch_json(endpoint, params, get_client_state()['generation'])
+    except (requests.RequestException, ValueError):
+        return [], None
+
+def fetch_one(endpoint, item_id):
+    """Fetch a single row by id as a one-row keyset page starting just before it."""
+    rows = get_data(endpoint, {'after': int(item_id) - 1, 'limit': 1})
+    return rows[0] if rows and rows[0]['id'] == item_id else None
+
+def paged(endpoint, params=None):
+    """
+    Render Previous/Next controls and return the current page of a list endpoint.
+
+    The stack of cursors lives in session state under a key that includes the
+    filters, so changing a filter starts again from the first page.
+    """
+    params = dict(params or {})
+    state_key = f"cursors_{endpoint}_{sorted(params.items())}"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = [0]
+    cursors = st.session_state[state_key]
+    rows, next_after = get_page(endpoint, dict(params, after=cursors[-1], limit=PAGE_SIZE))
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    if prev_col.button("Previous", key=f"prev_{state_key}", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.experimental_rerun()
+    page_col.write(f"Page {len(cursors)}")
+    if next_col.button("Next", key=f"next_{state_key}", disabled=next_after is None):
+        cursors.append(int(next_after))
+        st.experimental_rerun()
+    return rows
+
+def lookup(label, endpoint, key, format_option):
+    """
+    Typeahead selector: fetch at most OPTION_LIMIT rows whose name starts with the typed prefix.
+
+    Returns the selected row, or None when nothing matches.
+    """
+    prefix = st.text_input(f"Search {label} by name", key=f"search_{key}")
+    params = {'limit': OPTION_LIMIT}
+    if prefix:
+        params['prefix'] = prefix
+    rows_by_id = {row['id']: row for row in get_data(endpoint, params)}
+    selected = st.selectbox(f"Select {label}", list(rows_by_id), format_func=lambda x: format_option(rows_by_id[x]), key=f"select_{key}")
+    return rows_by_id.get(selected)
 
 def update_data(endpoint, data):
     """Function to update data on the backend."""
-    response = requests.put(f"{BASE_URL}/{endpoint}", json=data)
+    response = get_session().put(f"{BASE_URL}/{endpoint}", json=data, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 200:
+        invalidate_cache()
     return response.status_code
 
 
 def post_data(endpoint, data):
     """Function to post data to the backend."""
-    response = requests.post(f"{BASE_URL}/{endpoint}", json=data)
+    response = get_session().post(f"{BASE_URL}/{endpoint}", json=data, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 201:
+        invalidate_cache()
     return response.status_code == 201
 
 def delete_data(endpoint, item_id):
     """Function to delete data from the backend."""
-    response = requests.delete(f"{BASE_URL}/{endpoint}/{item_id}")
+    response = get_session().delete(f"{BASE_URL}/{endpoint}/{item_id}", timeout=REQUEST_TIMEOUT)
+    if response.status_code == 200:
+        invalidate_cache()
     return response.status_code == 200
 # Sidebar for navigation
 st.sidebar.title("Navigation")
-options = ["Models","Datasets", "Versions", "Servers", "Deployments", "Deployment Reports", "Top Servers Report", "Model Types Count", "Top Datasets", "Top Models Report", "Dataset By Models", "Server Deployments"]
+options = ["Models","Datasets", "Versions", "Servers", "Deployments", "Deployment Reports", "Top Servers Report", "Model Types Count", "Top Datasets", "Top Models Report", "Dataset By Models", "Server Deployments", "Deployment Timeline", "Search"]
 choice = st.sidebar.radio("Choose an option", options)
 
 if choice == "Models":
@@ -66,28 +179,26 @@ if choice == "Models":
             else:
                 st.error("Failed to add model")
     st.subheader('Update Existing Model')
-    models = get_data('models')
-    model_id = st.selectbox("Select Model", [model['id'] for model in models], format_func=lambda x: f"ID {x}: {next(item['name'] for item in models if item['id'] == x)}")
-    if model_id:
-        selected_model = next((item for item in models if item['id'] == model_id), None)
-        if selected_model:
-            with st.form("update_model"):
-                new_name = st.text_input("Model Name", value=selected_model['name'])
-                new_description = st.text_area("Model Description", value=selected_model['description'])
-                new_type = st.selectbox("Model Type", ["LLM", "Regression", "Neural Network", "Other"], index=["LLM", "Regression", "Neural Network", "Other"].index(selected_model['type']))
-                submit_button = st.form_submit_button("Update Model")
-                if submit_button:
-                    model_update_data = {'name': new_name, 'description': new_description, 'type': new_type}
-                    if update_data('models/' + str(model_id), model_update_data) == 200:
-                        st.success("Model updated successfully")
-                    else:
-                        st.error("Failed to update model")
-
-    # List Models
-    models = get_data('models')
+    selected_model = lookup("Model", 'models', 'update_model', lambda item: f"ID {item['id']}: {item['name']}")
+    if selected_model:
+        model_id = selected_model['id']
+        with st.form("update_model"):
+            new_name = st.text_input("Model Name", value=selected_model['name'])
+            new_description = st.text_area("Model Description", value=selected_model['description'])
+            model_types = ["LLM", "Regression", "Neural Network", "Other"]
+            new_type = st.selectbox("Model Type", model_types, index=model_types.index(selected_model['type']) if selected_model['type'] in model_types else len(model_types) - 1)
+            submit_button = st.form_submit_button("Update Model")
+            if submit_button:
+                model_update_data = {'name': new_name, 'description': new_description, 'type': new_type}
+                if update_data('models/' + str(model_id), model_update_data) == 200:
+                    st.success("Model updated successfully")
+                else:
+                    st.error("Failed to update model")
+
+    # List Models, one page at a time, filtered by the server
+    st.subheader('Models')
     model_type = st.selectbox("Model Type", ["All", "LLM", "Regression", "Neural Network"])
-    if model_type != "All":
-        models = [model for model in models if model['type'] == model_type]
+    models = paged('models', {} if model_type == "All" else {'type': model_type})
     for model in models:
         st.text(f"ID: {model['id']} - Name: {model['name']} - Type: {model['type']} - Description: {model['description']}")
         if st.button("Delete", key=f"delete_model_{model['id']}"):
@@ -112,25 +223,24 @@ elif choice == "Datasets":
                 st.error("Failed to add dataset")
 
     st.subheader('Update Existing Dataset')
-    datasets = get_data('datasets')
-    dataset_id = st.selectbox("Select Dataset", [dataset['id'] for dataset in datasets], format_func=lambda x: f"ID {x}: {next(item['name'] for item in datasets if item['id'] == x)}")
-    if dataset_id:
-        selected_dataset = next((item for item in datasets if item['id'] == dataset_id), None)
-        if selected_dataset:
-            with st.form("update_dataset"):
-                new_name = st.text_input("Dataset Name", value=selected_dataset['name'])
-                new_description = st.text_area("Dataset Description", value=selected_dataset['description'])
-                new_data_type = st.selectbox("Data Type", ["text", "image", "video", "audio"], index=["text", "image", "video", "audio"].index(selected_dataset['data_type']))
-                submit_button = st.form_submit_button("Update Dataset")
-                if submit_button:
-                    dataset_update_data = {'name': new_name, 'description': new_description, 'data_type': new_data_type}
-                    if update_data('datasets/' + str(dataset_id), dataset_update_data) == 200:
-                        st.success("Dataset updated successfully")
-                    else:
-                        st.error("Failed to update dataset")
+    selected_dataset = lookup("Dataset", 'datasets', 'update_dataset', lambda item: f"ID {item['id']}: {item['name']}")
+    if selected_dataset:
+        dataset_id = selected_dataset['id']
+        with st.form("update_dataset"):
+            new_name = st.text_input("Dataset Name", value=selected_dataset['name'])
+            new_description = st.text_area("Dataset Description", value=selected_dataset['description'])
+            new_data_type = st.selectbox("Data Type", ["text", "image", "video", "audio"], index=["text", "image", "video", "audio"].index(selected_dataset['data_type']))
+            submit_button = st.form_submit_button("Update Dataset")
+            if submit_button:
+                dataset_update_data = {'name': new_name, 'description': new_description, 'data_type': new_data_type}
+                if update_data('datasets/' + str(dataset_id), dataset_update_data) == 200:
+                    st.success("Dataset updated successfully")
+                else:
+                    st.error("Failed to update dataset")
 
     # List Datasets
-    datasets = get_data('datasets')
+    st.subheader('Datasets')
+    datasets = paged('datasets')
     for dataset in datasets:
         st.text(f"ID: {dataset['id']} - Name: {dataset['name']} - Description: {dataset['description']} - Type: {dataset['data_type']}")
         if st.button("Delete", key=f"delete_dataset_{dataset['id']}"):
@@ -157,30 +267,31 @@ elif choice == "Versions":
             else:
                 st.error("Failed to add version")
     st.subheader('Update Existing Version')
-    versions = get_data('versions')
-    version_id = st.selectbox("Select Version", [version['id'] for version in versions], format_func=lambda x: f"ID {x}: Model ID {next(item['model_id'] for item in versions if item['id'] == x)}")
-    if version_id:
-        selected_version = next((item for item in versions if item['id'] == version_id), None)
-        if selected_version:
-            with st.form("update_version"):
-                new_model_id = st.number_input("Model ID", value=selected_version['model_id'], step=1)
-                new_dataset_id = st.number_input("Dataset ID", value=selected_version['dataset_id'], step=1)
-                new_version_number = st.text_input("Version Number", value=selected_version['version_number'])
-                new_performance_metrics = st.text_area("Performance Metrics", value=selected_version['performance_metrics'])
-                submit_button = st.form_submit_button("Update Version")
-                if submit_button:
-                    version_update_data = {
-                        'model_id': new_model_id,
-                        'dataset_id': new_dataset_id,
-                        'version_number': new_version_number,
-                        'performance_metrics': new_performance_metrics
-                    }
-                    if update_data('versions/' + str(version_id), version_update_data) == 200:
-                        st.success("Version updated successfully")
-                    else:
-                        st.error("Failed to update version")
+    version_id = st.number_input("Version ID", min_value=1, step=1)
+    selected_version = fetch_one('versions', version_id)
+    if selected_version is None:
+        st.info(f"No version with ID {version_id}")
+    else:
+        with st.form("update_version"):
+            new_model_id = st.number_input("Model ID", value=selected_version['model_id'], step=1)
+            new_dataset_id = st.number_input("Dataset ID", value=selected_version['dataset_id'], step=1)
+            new_version_number = st.text_input("Version Number", value=selected_version['version_number'])
+            new_performance_metrics = st.text_area("Performance Metrics", value=selected_version['performance_metrics'])
+            submit_button = st.form_submit_button("Update Version")
+            if submit_button:
+                version_update_data = {
+                    'model_id': new_model_id,
+                    'dataset_id': new_dataset_id,
+                    'version_number': new_version_number,
+                    'performance_metrics': new_performance_metrics
+                }
+                if update_data('versions/' + str(version_id), version_update_data) == 200:
+                    st.success("Version updated successfully")
+                else:
+                    st.error("Failed to update version")
     # List Versions
-    versions = get_data('versions')
+    st.subheader('Versions')
+    versions = paged('versions')
     for version in versions:
         st.text(f"ID: {version['id']} - Model ID: {version['model_id']} - Dataset ID: {version['dataset_id']} - Version Number: {version['version_number']} - Metrics: {version['performance_metrics']}")
         if st.button("Delete", key=f"delete_version_{version['id']}"):
@@ -207,23 +318,22 @@ elif choice == "Servers":
                 st.error("Failed to add server")
 
     st.subheader('Update Existing Server')
-    servers = get_data('servers')
-    server_id = st.selectbox("Select Server", [server['id'] for server in servers], format_func=lambda x: f"ID {x}: {next(item['name'] for item in servers if item['id'] == x)}")
-    if server_id:
-        selected_server = next((item for item in servers if item['id'] == server_id), None)
-        if selected_server:
-            with st.form("update_server"):
-                new_name = st.text_input("Server Name", value=selected_server['name'])
-                new_ip_address = st.text_input("IP Address", value=selected_server['ip_address'])
-                submit_button = st.form_submit_button("Update Server")
-                if submit_button:
-                    new_server_data = {'name': new_name, 'ip_address': new_ip_address}
-                    if update_data('servers/' + str(server_id), new_server_data) == 200:
-                        st.success("Server updated successfully")
-                    else:
-                        st.error("Failed to update server")
+    selected_server = lookup("Server", 'servers', 'update_server', lambda item: f"ID {item['id']}: {item['name']}")
+    if selected_server:
+        server_id = selected_server['id']
+        with st.form("update_server"):
+            new_name = st.text_input("Server Name", value=selected_server['name'])
+            new_ip_address = st.text_input("IP Address", value=selected_server['ip_address'])
+            submit_button = st.form_submit_button("Update Server")
+            if submit_button:
+                new_server_data = {'name': new_name, 'ip_address': new_ip_address}
+                if update_data('servers/' + str(server_id), new_server_data) == 200:
+                    st.success("Server updated successfully")
+                else:
+                    st.error("Failed to update server")
     # List Servers
-    servers = get_data('servers')
+    st.subheader('Servers')
+    servers = paged('servers')
     for server in servers:
         st.text(f"ID: {server['id']} - Name: {server['name']} - IP Address: {server['ip_address']}")
         if st.button("Delete", key=f"delete_server_{server['id']}"):
@@ -242,11 +352,13 @@ elif choice == "Deployments":
     with st.form("add_deployment"):
         server_id = st.number_input("Server ID", step=1)
         version_id = st.number_input("Version ID", step=1)
-        deployment_date = st.number_input("Deployment Date (MMDD)", min_value=101, max_value=1231, step=1)
+        deployment_date = st.date_input("Deployment Date (UTC)")
+        deployment_clock = st.time_input("Deployment Time (UTC)", value=time(0, 0))
 
         submit_button = st.form_submit_button("Add Deployment")
         if submit_button:
-            deployment_data = {'server_id': server_id, 'version_id': version_id, 'deployment_time': deployment_date}
+            deployment_time = datetime.combine(deployment_date, deployment_clock).isoformat() + 'Z'
+            deployment_data = {'server_id': server_id, 'version_id': version_id, 'deployment_time': deployment_time}
             if post_data('modeldeployments', deployment_data):
                 st.success("Deployment added successfully.")
                 st.experimental_rerun()
@@ -255,12 +367,14 @@ elif choice == "Deployments":
 
     # List Deployments
     st.subheader("Current Deployments")
-    deployments = get_data('modeldeployments')
+    # Names come nested in the same response instead of one lookup per server/version
+    deployments = paged('modeldeployments', {'expand': 'server,version.model'})
     if deployments:
         for deployment in deployments:
-            # Formatting MMDD integer for display
-            deployment_date_str = f"{str(deployment['deployment_time'])[:-2]}/{str(deployment['deployment_time'])[-2:]}"
-            st.write(f"ID: {deployment['id']} - Server ID: {deployment['server_id']} - Version ID: {deployment['version_id']} - Deployment Date: {deployment_date_str}")
+            server_name = deployment['server']['name'] if deployment.get('server') else 'unknown server'
+            version = deployment.get('version')
+            model_name = f"{version['model']['name']} {version['version_number']}" if version and version.get('model') else 'unknown version'
+            st.write(f"ID: {deployment['id']} - Server: {server_name} ({deployment['server_id']}) - Model: {model_name} (Version ID: {deployment['version_id']}) - Deployment Time: {deployment['deployment_time']}")
             if st.button("Delete", key=f"delete_{deployment['id']}"):
                 if delete_data('modeldeployments', deployment['id']):
                     st.success(f"Successfully deleted deployment {deployment['id']}")
@@ -272,15 +386,15 @@ elif choice == "Deployments":
 elif choice == "Deployment Reports":
     st.subheader('Deployment Reports by Name and Server')
 
-    start_date = st.number_input("Start Date (MMDD)", min_value=101, max_value=1231, step=1, format='%d')
-    end_date = st.number_input("End Date (MMDD)", min_value=101, max_value=1231, step=1, format='%d')
+    start_date = st.date_input("Start Date (UTC)", value=date.today() - timedelta(days=30))
+    end_date = st.date_input("End Date (UTC)")
     
-    # Assuming this part fetches model types successfully from another function
-    model_type_options = ["All"] + [model['type'] for model in get_data('models')]
+    # Distinct model types come from the per-type counter report, not the full model list
+    model_type_options = ["All"] + [item['model_type'] for item in get_data('reports/model-types-count')]
     selected_model_type = st.selectbox("Model Type", model_type_options)
 
     if st.button("Generate Report"):
-        params = {"start_date": start_date, "end_date": end_date}
+        params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
         if selected_model_type != "All":
             params["model_type"] = selected_model_type
             
@@ -382,15 +496,12 @@ elif choice == "Top Datasets":
             st.error("Failed to fetch top datasets report.")
 elif choice == "Dataset By Models":
     
-    # Fetch datasets for dropdown
-    datasets = get_data('datasets/list')
-    dataset_names = {dataset['dataset_name']: dataset['dataset_id'] for dataset in datasets} if datasets else {}
-
     st.subheader("Select a Dataset to View Models")
-    dataset_choice = st.selectbox("Choose Dataset", options=list(dataset_names.keys()))
+    # Typeahead over dataset names instead of downloading every dataset for the dropdown
+    dataset_choice = lookup("Dataset", 'datasets', 'models_by_dataset', lambda item: f"{item['name']} (ID: {item['id']})")
 
     if dataset_choice:
-        dataset_id = dataset_names[dataset_choice]
+        dataset_id = dataset_choice['id']
         models = get_data('models/by-dataset', params={'dataset_id': dataset_id})
         
         if models:
@@ -405,14 +516,14 @@ elif choice == "Dataset By Models":
 if choice == "Server Deployments":
         st.subheader('Deployment Reports by Server')
 
-        start_date = st.number_input("Start Date (MMDD)", min_value=101, max_value=1231, step=1, format='%d')
-        end_date = st.number_input("End Date (MMDD)", min_value=101, max_value=1231, step=1, format='%d')
+        start_date = st.date_input("Start Date (UTC)", value=date.today() - timedelta(days=30))
+        end_date = st.date_input("End Date (UTC)")
         
         #model_type_options = ["All"] + [model['type'] for model in get_data('models/list-types')]
         #selected_model_type = st.selectbox("Model Type", model_type_options)
 
         if st.button("Generate Report"):
-            params = {"start_date": start_date, "end_date": end_date}
+            params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
 
             report_data = get_data('reports/server-deployments', params=params)
 
@@ -421,4 +532,54 @@ if choice == "Server Deployments":
                 for deployment in report_data:
                     st.write(f"Server Name: {deployment['server_name']} - Server ID: {deployment['server_id']} - Deployments Count: {deployment['deployment_count']}")
             else:
-                st.error("Failed to fetch report.")
\ No newline at end of file
+                st.error("Failed to fetch report.")
+
+if choice == "Deployment Timeline":
+    st.subheader('Deployments Over Time')
+
+    start_date = st.date_input("Start Date (UTC)", value=date.today() - timedelta(days=90))
+    end_date = st.date_input("End Date (UTC)")
+    bucket = st.selectbox("Bucket", ["day", "week", "hour"])
+    group_by = st.selectbox("Group By", ["None", "server", "model_type"])
+
+    if st.button("Plot"):
+        params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "bucket": bucket}
+        if group_by != "None":
+            params["group_by"] = group_by
+        points = get_data('reports/deployments/timeseries', params=params)
+
+        if points:
+            # One line per group; the API returns only non-empty buckets, already aggregated
+            series = OrderedDict()
+            for point in points:
+                label = point.get('server_name') or point.get('model_type') or 'Deployments'
+                if group_by == "server":
+                    label = f"{label} ({point['server_id']})"
+                series.setdefault(label, []).append((datetime.fromisoformat(point['bucket'][:-1]), point['deployment_count']))
+            fig, ax = plt.subplots()
+            for label, values in series.items():
+                ax.plot([moment for moment, _ in values], [count for _, count in values], marker='.', label=label)
+            ax.set_ylabel('Deployments')
+            if group_by != "None":
+                ax.legend(fontsize='small')
+            fig.autofmt_xdate()
+            st.pyplot(fig)
+        else:
+            st.error("No deployments in the selected range.")
+
+if choice == "Search":
+    st.subheader('Search Models and Datasets')
+
+    query = st.text_input("Search", help="Every word is matched as a prefix of a name, description or type")
+    kind = st.radio("Kind", ["All", "model", "dataset"], horizontal=True)
+    if query:
+        params = {'q': query, 'limit': PAGE_SIZE}
+        if kind != "All":
+            params['kind'] = kind
+        results = get_data('search', params)
+        if results:
+            for result in results:
+                category = result.get('type') or result.get('data_type')
+                st.write(f"**{result['name']}** ({result['kind']} {result['id']}, {category}) - {result['description']}")
+        else:
+            st.write("No matches.")
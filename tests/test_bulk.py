@@ -0,0 +1,36 @@
+# tests/test_bulk.py
+import pytest
+
+from app import create_app
+from extensions import db
+from models import Model, Dataset, Version, Server
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('DB_OPTIMIZE_INTERVAL', '0')
+    app = create_app({'TESTING': True})
+    with app.app_context():
+        db.create_all()
+        model = Model(name='BERT', type='nlp')
+        dataset = Dataset(name='SQuAD', data_type='text')
+        db.session.add_all([model, dataset, Server(name='srv-1', ip_address='10.0.0.1')])
+        db.session.flush()
+        db.session.add(Version(model_id=model.id, dataset_id=dataset.id, version_number='1.0'))
+        db.session.commit()
+    return app.test_client()
+
+
+@pytest.mark.parametrize('server_id', [[1], {'id': 1}, True, '1'])
+def test_bulk_create_reports_non_integer_foreign_key_per_item(client, server_id):
+    response = client.post('/modeldeployments/bulk', json=[
+        {'server_id': server_id, 'version_id': 1, 'deployment_time': 1709294400},
+        {'server_id': 1, 'version_id': 1, 'deployment_time': 1709294400},
+    ])
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['ids'][0] is None
+    assert body['ids'][1] is not None
+    assert body['errors'] == [{'index': 0, 'error': 'invalid server_id: must be an integer id'}]
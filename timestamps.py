@@ -0,0 +1,95 @@
+# timestamps.py
+import math
+from datetime import datetime, time, timezone
+
+from flask import abort, current_app, has_app_context, request
+
+DEFAULT_LEGACY_YEAR = 2024  # Year assumed for legacy MMDD values, override with LEGACY_DEPLOYMENT_YEAR
+MAX_LEGACY_MMDD = 1231      # Integers up to this are MMDD dates from older clients, not epoch seconds
+
+# Epoch seconds of years 1 to 9999, the range datetime (and therefore to_iso) can represent
+MIN_EPOCH = int(datetime(1, 1, 1, tzinfo=timezone.utc).timestamp())
+MAX_EPOCH = int(datetime(9999, 12, 31, 23, 59, 59, tzinfo=timezone.utc).timestamp())
+
+# Bucket width and origin in seconds; weeks start on Monday (1970-01-05 is 4 days after the epoch)
+BUCKETS = {
+    'hour': (3600, 0),
+    'day': (86400, 0),
+    'week': (7 * 86400, 4 * 86400),
+}
+MAX_BUCKETS = 5000  # Upper bound on buckets per series, so one request cannot ask for years of hours
+
+
+def legacy_year():
+    if has_app_context():
+        return current_app.config.get('LEGACY_DEPLOYMENT_YEAR', DEFAULT_LEGACY_YEAR)
+    return DEFAULT_LEGACY_YEAR
+
+
+def mmdd_to_datetime(mmdd, year):
+    return datetime(year, mmdd // 100, mmdd % 100, tzinfo=timezone.utc)
+
+
+def to_epoch(value, end_of_day=False):
+    """
+    Convert an API timestamp to seconds since the Unix epoch (UTC).
+
+    Accepts epoch seconds, ISO-8601 strings (naive values are taken as UTC) and,
+    for older clients, MMDD integers in LEGACY_DEPLOYMENT_YEAR. With end_of_day,
+    a bare date (ISO date or MMDD) means the last second of that day so it can be
+    used as an inclusive upper bound.
+
+    Raises:
+        ValueError: If value is not a recognisable timestamp, or lies outside
+            years 1 to 9999 (e.g. epoch milliseconds).
+    """
+    epoch = parse_epoch(value, end_of_day)
+    if not MIN_EPOCH <= epoch <= MAX_EPOCH:
+        raise ValueError(f'timestamp out of range: {value!r}')
+    return epoch
+
+
+def parse_epoch(value, end_of_day):
+    if isinstance(value, bool) or value is None:
+        raise ValueError(f'invalid timestamp: {value!r}')
+    if isinstance(value, str) and value.strip().lstrip('-').isdigit():
+        value = int(value)
+    if isinstance(value, (int, float)):
+        if not math.isfinite(value):
+            raise ValueError(f'invalid timestamp: {value!r}')
+        if 0 < value <= MAX_LEGACY_MMDD:
+            moment = mmdd_to_datetime(int(value), legacy_year())
+            if end_of_day:
+                moment = datetime.combine(moment.date(), time.max, timezone.utc)
+            return int(moment.timestamp())
+        return int(value)
+    if not isinstance(value, str):
+        raise ValueError(f'invalid timestamp: {value!r}')
+    text = value.strip()
+    moment = datetime.fromisoformat(text[:-1] + '+00:00' if text.endswith('Z') else text)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    if end_of_day and len(text) == 10:  # YYYY-MM-DD
+        moment = datetime.combine(moment.date(), time.max, timezone.utc)
+    return int(moment.timestamp())
+
+
+def to_iso(epoch):
+    """Render epoch seconds as an ISO-8601 UTC string, e.g. 2024-03-01T12:00:00Z."""
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def parse_time(value, name, end_of_day=False):
+    """Convert the request value of field name with to_epoch, aborting with 400 if it is malformed."""
+    try:
+        return to_epoch(value, end_of_day)
+    except ValueError:
+        abort(400, description=f'{name} must be an ISO-8601 timestamp or epoch seconds')
+
+
+def time_arg(name, end_of_day=False):
+    """Read query parameter name as epoch seconds, or None when it is absent."""
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    return parse_time(value, name, end_of_day)
@@ -0,0 +1,103 @@
+# triggers.py
+from sqlalchemy import event, inspect, text
+
+from extensions import db
+
+# name -> (table, trigger event, statements run for each affected row); filled by register_triggers.
+# Triggers run after the row is written unless the event starts with BEFORE (e.g. 'BEFORE DELETE').
+TRIGGERS = {}
+# name -> dialects a trigger is limited to; triggers not listed here are installed everywhere
+TRIGGER_DIALECTS = {}
+# name -> tables a trigger writes to besides its own, which must exist before it is installed
+TRIGGER_REQUIRES = {}
+
+
+def register_triggers(triggers, dialects=None, requires=()):
+    """
+    Add row-level triggers to be installed whenever the schema is created.
+
+    Args:
+        triggers: Mapping of trigger name to (table, event, statements).
+        dialects: Only install these triggers on the named dialects (default: all).
+        requires: Tables the statements write to. Until a migration creates them
+            the triggers are left out, so data migrations that run before it do
+            not fire triggers writing to a table that is not there yet.
+    """
+    TRIGGERS.update(triggers)
+    if dialects is not None:
+        TRIGGER_DIALECTS.update({name: tuple(dialects) for name in triggers})
+    if requires:
+        TRIGGER_REQUIRES.update({name: tuple(requires) for name in triggers})
+
+
+def triggers_for(dialect):
+    return [(name, trigger) for name, trigger in TRIGGERS.items()
+            if dialect in TRIGGER_DIALECTS.get(name, (dialect,))]
+
+
+def upsert_add(counter, select):
+    """
+    Build an upsert adding the (key, amount) pairs produced by select to a counter table.
+
+    Args:
+        counter: (table, key column, count column) of the counter table.
+        select: A SELECT yielding (key, amount) rows; it must carry a WHERE clause
+            so SQLite can parse the trailing ON CONFLICT.
+    """
+    table, key, count = counter
+    return (f"INSERT INTO {table} ({key}, {count}) {select} "
+            f"ON CONFLICT ({key}) DO UPDATE SET {count} = {table}.{count} + excluded.{count}")
+
+
+def trigger_ddl(dialect, name, table, trigger_event, statements):
+    body = ''.join(f'    {statement};\n' for statement in statements)
+    before = trigger_event.startswith('BEFORE ')
+    if not before:
+        trigger_event = f'AFTER {trigger_event}'
+    if dialect == 'sqlite':
+        return [f"CREATE TRIGGER IF NOT EXISTS {name} {trigger_event} ON {table} FOR EACH ROW BEGIN\n{body}END"]
+    if dialect == 'postgresql':
+        # A row-level BEFORE trigger must return the row, or the write is skipped
+        returned = "    IF TG_OP = 'DELETE' THEN RETURN OLD; END IF;\n    RETURN NEW;\n" if before else "    RETURN NULL;\n"
+        return [
+            f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$\nBEGIN\n{body}{returned}END\n$$ LANGUAGE plpgsql",
+            f"DROP TRIGGER IF EXISTS {name} ON {table}",
+            f"CREATE TRIGGER {name} {trigger_event} ON {table} FOR EACH ROW EXECUTE FUNCTION {name}()",
+        ]
+    raise NotImplementedError(f"triggers are not implemented for the {dialect} dialect")
+
+
+def create_triggers(conn, names=None):
+    """
+    Install the registered triggers; safe to run again on a schema that already has them.
+
+    Args:
+        conn: Connection to install them on.
+        names: Only install these triggers (default: all). Migrations pass the
+            triggers they introduce, as later ones may not apply to their schema yet.
+    """
+    inspector = inspect(conn)
+    for name, (table, trigger_event, statements) in triggers_for(conn.dialect.name):
+        if names is not None and name not in names:
+            continue
+        if not all(inspector.has_table(required) for required in TRIGGER_REQUIRES.get(name, ())):
+            continue
+        for ddl in trigger_ddl(conn.dialect.name, name, table, trigger_event, statements):
+            conn.execute(text(ddl))
+
+
+def drop_triggers(conn, names=None):
+    """Remove the registered triggers (only those named, if names is given), e.g. before a bulk load that rebuilds derived data afterwards."""
+    for name, (table, _, _) in triggers_for(conn.dialect.name):
+        if names is not None and name not in names:
+            continue
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name} ON {table}"))
+            conn.execute(text(f"DROP FUNCTION IF EXISTS {name}()"))
+        else:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+
+@event.listens_for(db.metadata, 'after_create')
+def install_triggers(target, connection, **kw):
+    create_triggers(connection)
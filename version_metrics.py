@@ -0,0 +1,116 @@
+# version_metrics.py
+import itertools
+import json
+import math
+import re
+
+from sqlalchemy import text
+
+from triggers import register_triggers
+
+MAX_METRIC_NAME_LENGTH = 50  # VersionMetric.name
+REBUILD_CHUNK_SIZE = 10000   # Versions read and metric rows inserted per round trip by rebuild_metrics
+
+# "Accuracy: 95%", "F1: 0.91, Latency ms: 12": what performance_metrics held before it became JSON
+LEGACY_METRIC = re.compile(r'\s*([^:,;\n]+?)\s*:\s*(-?\d+(?:\.\d+)?)\s*(%?)\s*(?:[,;\n]|$)')
+
+
+def parse_legacy_metrics(value):
+    """Read "Name: 95%" pairs (comma, semicolon or newline separated) as {name: value}, or None if value is not such a list."""
+    metrics = {}
+    position = 0
+    for match in LEGACY_METRIC.finditer(value):
+        if match.start() != position:
+            return None
+        name, number, percent = match.groups()
+        metrics[name] = float(number) / 100 if percent else float(number)
+        position = match.end()
+    if not metrics or value[position:].strip():
+        return None
+    return metrics
+
+
+def normalize_metrics(value):
+    """
+    Convert a submitted performance_metrics value to the text stored in Version.performance_metrics.
+
+    A JSON object of metric name to number, given as an object or as its JSON
+    text, is stored as canonical JSON with lower-cased names; so is a legacy
+    "Accuracy: 95%" list (percentages become fractions). Any other string is
+    kept as free text and yields no metrics.
+
+    Raises:
+        ValueError: If an object has a name or value that cannot be stored.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            parsed = parse_legacy_metrics(value)
+        if not isinstance(parsed, dict):
+            return value
+        value = parsed
+    if not isinstance(value, dict):
+        raise ValueError('must be an object of metric name to number, or text')
+    metrics = {}
+    for name, number in value.items():
+        name = name.strip().lower()
+        if not name or len(name) > MAX_METRIC_NAME_LENGTH:
+            raise ValueError(f'metric names must be 1 to {MAX_METRIC_NAME_LENGTH} characters')
+        if isinstance(number, bool) or not isinstance(number, (int, float)) or not math.isfinite(number):
+            raise ValueError(f'{name} must be a finite number')
+        metrics[name] = number
+    return json.dumps(metrics, sort_keys=True)
+
+
+def metrics_of(stored):
+    """The {name: value} rows the triggers derive from a stored performance_metrics value."""
+    try:
+        parsed = json.loads(stored) if stored is not None else None
+    except ValueError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    return {name.lower(): float(value) for name, value in parsed.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)}
+
+
+# The numeric entries of a JSON object in performance_metrics; anything else (free text, arrays) yields none.
+# SQLite evaluates json_each for every row it is given, so non-objects are turned into NULL first.
+SQLITE_METRICS = ("INSERT OR IGNORE INTO version_metric (version_id, name, value) "
+                  "SELECT NEW.id, lower(j.key), j.value FROM json_each(CASE WHEN json_valid(NEW.performance_metrics) "
+                  "THEN CASE json_type(NEW.performance_metrics) WHEN 'object' THEN NEW.performance_metrics END END) j "
+                  "WHERE j.type IN ('integer', 'real')")
+# PostgreSQL raises on text that is not JSON, or not an object; the block's handler skips such rows
+POSTGRESQL_METRICS = ("BEGIN INSERT INTO version_metric (version_id, name, value) "
+                      "SELECT NEW.id, lower(j.key), (j.value #>> '{}')::double precision "
+                      "FROM jsonb_each(NEW.performance_metrics::jsonb) j WHERE jsonb_typeof(j.value) = 'number' "
+                      "ON CONFLICT DO NOTHING; "
+                      "EXCEPTION WHEN invalid_text_representation OR invalid_parameter_value THEN NULL; END")
+
+for dialect, insert_metrics in (('sqlite', SQLITE_METRICS), ('postgresql', POSTGRESQL_METRICS)):
+    register_triggers({
+        f'trg_version_insert_metrics_{dialect}': ('version', 'INSERT', [insert_metrics]),
+        f'trg_version_update_metrics_{dialect}': ('version', 'UPDATE OF performance_metrics', [
+            "DELETE FROM version_metric WHERE version_id = OLD.id",
+            insert_metrics,
+        ]),
+    }, dialects=(dialect,), requires=('version_metric',))
+# Deleting a version deletes its metrics through the foreign key's ON DELETE CASCADE
+
+
+def rebuild_metrics(conn):
+    """Recompute version_metric from every version's performance_metrics, as the triggers would."""
+    conn.execute(text("DELETE FROM version_metric"))
+    result = conn.execute(text("SELECT id, performance_metrics FROM version WHERE performance_metrics IS NOT NULL"))
+    rows = ({'version_id': version_id, 'name': name, 'value': value}
+            for version_id, stored in result
+            for name, value in metrics_of(stored).items())
+    insert = text("INSERT INTO version_metric (version_id, name, value) VALUES (:version_id, :name, :value)")
+    while True:
+        chunk = list(itertools.islice(rows, REBUILD_CHUNK_SIZE))
+        if not chunk:
+            return
+        conn.execute(insert, chunk)